@@ -21,6 +21,7 @@ def mypy() -> int:
         Path('scripts/tutorials'),
         Path('scripts/simulator_experiments'),
         Path('scripts/calibration'),
+        Path('scripts/benchmarks'),
         Path('test/environment')
     ]
     # we need --scripts-are-modules since we specify some files on the command line and they have usages of __main__
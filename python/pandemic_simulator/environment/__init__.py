@@ -5,18 +5,24 @@ from typing import Optional
 import numpy as np
 from structlog import BoundLogger
 
+from .checkpoint import *
 from .city_registry import *
+from .contact_sampler import *
 from .contact_tracing import *
 from .done import *
+from .exposure import *
 from .infection_model import *
 from .interfaces import *
 from .job_counselor import *
 from .location import *
+from .location_shards import *
 from .make_population import *
 from .pandemic_env import *
+from .pandemic_vector_env import *
 from .pandemic_sim import *
 from .pandemic_testing_strategies import *
 from .person import *
+from .person_scheduler import *
 from .reward import *
 from .simulator_config import *
 from .simulator_opts import *
@@ -29,11 +35,13 @@ def init_globals(registry: Optional[Registry] = None,
     Initialize globals for the simulator
 
     :param registry: Registry instance for the environment
-    :param seed: numpy random seed
+    :param seed: numpy random seed of the generator that builds the population and of the random number streams of
+        the simulation
     :param log: optional logger
     :return: None
     """
     globals.registry = registry or CityRegistry()
     globals.numpy_rng = np.random.RandomState(seed)
+    globals.random_streams = RandomStreams(seed)
     if log:
         log.info('Initialized globals for the simulator')
@@ -0,0 +1,448 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import dataclasses
+import gc
+import hashlib
+import io
+import math
+import mmap
+import os
+import pickle
+import struct
+from contextlib import contextmanager
+from itertools import chain, repeat
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+from orderedset import OrderedSet
+
+from .interfaces import LocationID, LocationState, Occupancy, PersonID
+from .pandemic_sim import PandemicSim, PandemicSimSnapshot
+
+__all__ = ['save_checkpoint', 'read_checkpoint', 'load_checkpoint']
+
+_MAGIC = b'PSIMCKP2'
+_ALIGNMENT = 64
+# the magic bytes, the digest of the persons and locations of the simulator and the size of the header
+_PREAMBLE_SIZE = len(_MAGIC) + 16 + 8
+_Treedef = Any
+_Ids = Sequence[Union[PersonID, LocationID]]
+_EncodedRecords = Tuple[int, List[Tuple[_Treedef, str, np.ndarray, np.ndarray, List[np.ndarray]]]]
+_EncodedLocations = List[Tuple[type, Tuple[str, ...], str, Tuple[str, ...], np.ndarray, List[np.ndarray]]]
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # the checkpoints hold many small objects that all survive, the garbage collector is paused while they are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _flatten(value: Any, leaves: List[Any]) -> _Treedef:
+    # containers and dataclass instances are flattened, everything else is a leaf
+    value_type = type(value)
+    if value_type is tuple or value_type is list or value_type is OrderedSet:
+        return value_type, tuple([_flatten(v, leaves) for v in value])
+    if value_type is dict:
+        return dict, tuple(value.keys()), tuple([_flatten(v, leaves) for v in value.values()])
+    if hasattr(value_type, '__dataclass_fields__') and value_type is not PersonID and value_type is not LocationID:
+        attributes = vars(value)
+        return value_type, tuple(attributes.keys()), tuple([_flatten(v, leaves) for v in attributes.values()])
+    leaves.append(value)
+    return None
+
+
+def _make_builder(treedef: _Treedef) -> Callable[[Iterator[Any]], Any]:
+    if treedef is None:
+        return next
+    if treedef[0] is dict:
+        keys, children = treedef[1], [_make_builder(child) for child in treedef[2]]
+        return lambda it: {key: child(it) for key, child in zip(keys, children)}
+    if len(treedef) == 2:
+        container_type, children = treedef[0], [_make_builder(child) for child in treedef[1]]
+        if container_type is tuple:
+            return lambda it: tuple([child(it) for child in children])
+        return lambda it: container_type([child(it) for child in children])
+
+    # dataclass instances are rebuilt without calling __init__, such that frozen and init=False fields are restored
+    cls, names, children = treedef[0], treedef[1], [_make_builder(child) for child in treedef[2]]
+
+    def build_dataclass(it: Iterator[Any]) -> Any:
+        instance = cls.__new__(cls)
+        instance.__dict__.update(zip(names, [child(it) for child in children]))
+        return instance
+
+    def build_flat_dataclass(it: Iterator[Any]) -> Any:
+        # the fields are leaves, they are read from the iterator directly
+        instance = cls.__new__(cls)
+        instance.__dict__.update(zip(names, it))
+        return instance
+
+    return build_flat_dataclass if all(child is None for child in treedef[2]) else build_dataclass
+
+
+class _ObjectTable:
+    """Interns the non-numeric leaves. The person and location ids of the simulator are referenced by their index and
+    the other objects are pickled with the header of the checkpoint."""
+
+    _ids: Dict[Hashable, int]
+    _objects: List[Any]
+    _object_indices: Dict[Tuple[type, Any], int]
+
+    def __init__(self, ids: _Ids):
+        self._ids = {object_id: i for i, object_id in enumerate(ids)}
+        self._objects = []
+        self._object_indices = {}
+
+    @property
+    def objects(self) -> List[Any]:
+        return self._objects
+
+    def index(self, value: Any) -> int:
+        value_type = type(value)
+        if value_type is PersonID or value_type is LocationID:
+            index = self._ids.get(value)
+            if index is not None:
+                return index
+        try:
+            key: Tuple[type, Any] = (value_type, value)
+            hash(key)
+        except TypeError:
+            key = (value_type, id(value))
+        index = self._object_indices.get(key)
+        if index is None:
+            index = self._object_indices[key] = len(self._ids) + len(self._objects)
+            self._objects.append(value)
+        return index
+
+
+def _leaf_column(leaves: Sequence[Any], object_table: _ObjectTable) -> Tuple[str, np.ndarray]:
+    leaf_types = set(map(type, leaves))
+    if leaf_types == {bool}:
+        return 'b', np.array(leaves, dtype=bool)
+    if leaf_types == {int}:
+        return 'i', np.array(leaves, dtype=np.int64)
+    if leaf_types <= {float, np.float64}:
+        return 'f', np.array(leaves, dtype=np.float64)
+    return 'o', np.array([object_table.index(leaf) for leaf in leaves], dtype=np.int32)
+
+
+def _leaf_list(kind: str, column: np.ndarray, objects: np.ndarray) -> List[Any]:
+    leaves: List[Any] = objects[column].tolist() if kind == 'o' else column.tolist()
+    return leaves
+
+
+def _unique_rows(columns: Sequence[np.ndarray], num_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the position of the first occurrence of each distinct row of the columns and, for each row, the index of
+    its distinct row. The values are compared bitwise."""
+    if len(columns) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(num_rows, dtype=np.int64)
+    rows = np.stack([column.view(np.int64) if column.dtype == np.float64 else column.astype(np.int64)
+                     for column in columns], axis=1)
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    return first, inverse
+
+
+def _encode_records(records: Sequence[Any], object_table: _ObjectTable) -> _EncodedRecords:
+    """Group the records by structure and store the leaves of the distinct records of each group column by column,
+    with the index of the distinct record of each record of the group."""
+    groups: Dict[_Treedef, Tuple[List[int], List[List[Any]]]] = {}
+    for i, record in enumerate(records):
+        leaves: List[Any] = []
+        treedef = _flatten(record, leaves)
+        group = groups.get(treedef)
+        if group is None:
+            group = groups[treedef] = ([], [])
+        group[0].append(i)
+        group[1].append(leaves)
+
+    encoded = []
+    for treedef, (indices, group_leaves) in groups.items():
+        kinds, columns = [], []
+        for column_leaves in zip(*group_leaves):
+            kind, column = _leaf_column(column_leaves, object_table)
+            kinds.append(kind)
+            columns.append(column)
+        first, inverse = _unique_rows(columns, len(indices))
+        encoded.append((treedef, ''.join(kinds), np.array(indices, dtype=np.int64), inverse,
+                        [column[first] for column in columns]))
+    return len(records), encoded
+
+
+def _decode_records(encoded: _EncodedRecords, objects: np.ndarray) -> np.ndarray:
+    # the records are immutable or replaced as a whole by the persons and the infection model (see
+    # PandemicSim.snapshot), equal records are built once and shared
+    num_records, groups = encoded
+    records = np.empty(num_records, dtype=object)
+    for treedef, kinds, indices, inverse, columns in groups:
+        builder = _make_builder(treedef)
+        leaf_lists = [_leaf_list(kind, column, objects) for kind, column in zip(kinds, columns)]
+        distinct_records = [builder(iter(leaves)) for leaves in (zip(*leaf_lists) if leaf_lists else [()])]
+        records[indices] = _object_array(distinct_records)[inverse]
+    return records
+
+
+def _encode_locations(states: Sequence[LocationState], object_table: _ObjectTable) -> _EncodedLocations:
+    """Group the location states by type and store their fields column by column. The occupancies are stored as the
+    number of members, the person ids and the members of each occupancy. The assignees are not stored, they are
+    part of the digest of the simulator (see _simulator_ids)."""
+    groups: Dict[Tuple[type, Tuple[str, ...]], List[int]] = {}
+    for i, state in enumerate(states):
+        assert isinstance(state, LocationState), 'The locations must be snapshot as location states.'
+        groups.setdefault((type(state), tuple(name for name in vars(state) if name != 'assignees')), []).append(i)
+
+    encoded = []
+    for (state_type, names), indices in groups.items():
+        group_states = [vars(states[i]) for i in indices]
+        kinds, value_names, occupancy_names = [], [], []
+        value_columns: List[np.ndarray] = []
+        occupancy_columns: List[np.ndarray] = []
+        for name in names:
+            values = [state[name] for state in group_states]
+            if all(type(value) is Occupancy for value in values):
+                occupancy_names.append(name)
+                occupancy_columns += [np.array([len(occupancy) for occupancy in values], dtype=np.int64),
+                                      np.array([object_table.index(person_id) for occupancy in values
+                                                for person_id in occupancy.person_ids], dtype=np.int32),
+                                      np.concatenate([occupancy.members for occupancy in values])]
+            else:
+                kind, column = _leaf_column(values, object_table)
+                kinds.append(kind)
+                value_names.append(name)
+                value_columns.append(column)
+        encoded.append((state_type, (*value_names, *occupancy_names), ''.join(kinds), tuple(occupancy_names),
+                        np.array(indices, dtype=np.int64), value_columns + occupancy_columns))
+    return encoded
+
+
+def _decode_locations(states: Sequence[LocationState], encoded: _EncodedLocations, objects: np.ndarray) -> None:
+    """Set the fields of the given location states, in place. The empty occupancies clear the current occupancies of
+    the states, the other occupancies are replaced."""
+    for state_type, names, kinds, occupancy_names, indices, columns in encoded:
+        field_lists = [_leaf_list(kind, column, objects) for kind, column in zip(kinds, columns)]
+        for k, name in enumerate(occupancy_names):
+            lengths, person_indices, members = columns[len(kinds) + 3 * k:len(kinds) + 3 * k + 3]
+            # the members are copied at once, each occupancy takes over a slice of the copy as its storage
+            storage = members.copy()
+            person_ids = objects[person_indices].tolist()
+            ends = np.cumsum(lengths).tolist()
+            occupancies = iter([Occupancy.from_members(person_ids[start:end], storage[start:end])
+                                for start, end in zip([0] + ends[:-1], ends) if start != end])
+            occupancy_values: List[Occupancy] = []
+            for i, length in zip(indices.tolist(), lengths.tolist()):
+                if length > 0:
+                    occupancy = next(occupancies)
+                else:
+                    occupancy = vars(states[i]).get(name)
+                    if type(occupancy) is Occupancy:
+                        occupancy.clear()
+                    else:
+                        occupancy = Occupancy()
+                occupancy_values.append(occupancy)
+            field_lists.append(occupancy_values)
+        for i, values in zip(indices.tolist(), zip(*field_lists)):
+            state = states[i]
+            assert type(state) is state_type, 'The checkpoint holds another type of location state.'
+            state.__dict__.update(zip(names, values))
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles the person and location ids of the simulator by their index and stores the numeric arrays apart, such
+    that they can be memory-mapped."""
+
+    def __init__(self, file: io.BytesIO, ids: _Ids):
+        super().__init__(file, protocol=4)
+        self._id_to_index = {object_id: i for i, object_id in enumerate(ids)}
+        self.arrays: List[np.ndarray] = []
+        self._array_indices: Dict[int, int] = {}
+
+    def persistent_id(self, obj: Any) -> Any:
+        obj_type = type(obj)
+        if obj_type is PersonID or obj_type is LocationID:
+            return self._id_to_index.get(obj)
+        if obj_type is np.ndarray and not obj.dtype.hasobject:
+            index = self._array_indices.get(id(obj))
+            if index is None:
+                index = self._array_indices[id(obj)] = len(self.arrays)
+                self.arrays.append(obj)
+            return 'array', index
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, ids: _Ids, arrays: Sequence[np.ndarray]):
+        super().__init__(file)
+        self._ids = ids
+        self._arrays = arrays
+
+    def persistent_load(self, pid: Any) -> Any:
+        if type(pid) is int:
+            return self._ids[pid]
+        return self._arrays[pid[1]]
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+def _simulator_ids(sim: PandemicSim) -> Tuple[List[Union[PersonID, LocationID]], bytes]:
+    # the persons and the locations of the simulator state follow the order of the snapshot. The persons are matched
+    # by their order, their age and the locations they are assigned to (the assignees of each location, which are not
+    # stored in the checkpoint), since the names of generated persons are random.
+    person_ids = list(sim.state.id_to_person_state)
+    location_ids = list(sim.state.id_to_location_state)
+    assignees = [state.assignees for state in sim.state.id_to_location_state.values()]
+    flat_assignees = list(chain.from_iterable(assignees))
+
+    # the assignees are the id instances of the persons, they are matched by identity first since hashing ids is slow
+    person_indices: Dict[Any, int] = dict(zip(map(id, person_ids), range(len(person_ids))))
+    assignee_indices = np.fromiter(map(person_indices.get, map(id, flat_assignees), repeat(-1)), dtype=np.int64,
+                                   count=len(flat_assignees))
+    unmatched = np.flatnonzero(assignee_indices < 0).tolist()
+    if len(unmatched) > 0:
+        person_indices = dict(zip(person_ids, range(len(person_ids))))
+        assignee_indices[unmatched] = [person_indices.get(flat_assignees[i], -1) for i in unmatched]
+
+    digest = hashlib.md5(struct.pack('<QQ', len(person_ids), len(location_ids)))
+    digest.update(np.fromiter(map(attrgetter('age'), person_ids), dtype=np.int64, count=len(person_ids)).tobytes())
+    digest.update('\n'.join([location_id.name for location_id in location_ids]).encode())
+    digest.update(np.fromiter(map(len, assignees), dtype=np.int64, count=len(assignees)).tobytes())
+    digest.update(assignee_indices.tobytes())
+    return [*person_ids, *location_ids], digest.digest()
+
+
+def save_checkpoint(sim: PandemicSim, path: Union[str, Path]) -> None:
+    """
+    Write a checkpoint of the simulator (see PandemicSim.snapshot) to a binary file. The population columns, the
+    persons (and the status of their routines) and the location states are stored column by column, and the arrays of
+    the other components of the snapshot (registry, contact tracer, etc.) are stored apart from the pickled header,
+    such that all of them can be memory-mapped when the checkpoint is read. The file is replaced atomically, the
+    simulators that map a previous checkpoint at the same path keep their arrays.
+
+    :param sim: PandemicSim instance.
+    :param path: Path of the checkpoint file.
+    """
+    with _gc_paused():
+        _write_checkpoint(sim, Path(path))
+
+
+def _write_checkpoint(sim: PandemicSim, path: Path) -> None:
+    snapshot = sim.snapshot()
+    ids, digest = _simulator_ids(sim)
+    object_table = _ObjectTable(ids)
+
+    # the infection states are objects, they are stored as records
+    population = dict(snapshot.population)
+    infection_states = population.pop('_infection_state').tolist()
+    contents: Dict[str, Any] = dict(
+        population=population,
+        infection_states=_encode_records(infection_states, object_table),
+        persons=_encode_records(snapshot.persons, object_table),
+        locations=_encode_locations(snapshot.locations, object_table),
+        components=dataclasses.replace(snapshot, population={}, persons=[], locations=[],
+                                       state=dataclasses.replace(snapshot.state, id_to_person_state={},
+                                                                 id_to_location_state={},
+                                                                 global_location_summary={})),
+    )
+    contents['objects'] = object_table.objects
+
+    contents_file = io.BytesIO()
+    pickler = _Pickler(contents_file, ids)
+    pickler.dump(contents)
+    arrays = [np.ascontiguousarray(array) for array in pickler.arrays]
+    array_table = []
+    offset = 0
+    for array in arrays:
+        array_table.append((array.dtype, array.shape, offset))
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    header_bytes = pickle.dumps((array_table, contents_file.getvalue()), protocol=4)
+    data_offset = -(-(_PREAMBLE_SIZE + len(header_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+    temp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(digest)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for array, (_, _, array_offset) in zip(arrays, array_table):
+                f.seek(data_offset + array_offset)
+                f.write(array.tobytes())
+            f.truncate(data_offset + offset)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink()
+        raise
+
+
+def _read_snapshot(sim: PandemicSim, path: Union[str, Path],
+                   location_states: Sequence[LocationState]) -> PandemicSimSnapshot:
+    """Read a checkpoint as a snapshot of the simulator, whose location states are the given location states, decoded
+    in place."""
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{path} is not a simulator checkpoint.')
+        ids, digest = _simulator_ids(sim)
+        if f.read(len(digest)) != digest:
+            raise ValueError(f'The checkpoint {path} was written for a simulator with other persons or locations.')
+        header_length, = struct.unpack('<Q', f.read(8))
+        header_bytes = f.read(header_length)
+        # the pages of the mapped arrays are copied when they are written, the file is never updated
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    array_table, contents_bytes = pickle.loads(header_bytes)
+    data_offset = -(-(_PREAMBLE_SIZE + header_length) // _ALIGNMENT) * _ALIGNMENT
+    arrays = [np.frombuffer(data, dtype=dtype, count=math.prod(shape), offset=data_offset + offset).reshape(shape)
+              for dtype, shape, offset in array_table]
+    contents = _Unpickler(io.BytesIO(contents_bytes), ids, arrays).load()
+    objects = _object_array(ids + contents['objects'])
+
+    population = dict(contents['population'])
+    population['_infection_state'] = _decode_records(contents['infection_states'], objects)
+    _decode_locations(location_states, contents['locations'], objects)
+    snapshot: PandemicSimSnapshot = dataclasses.replace(contents['components'],
+                                                        population=population,
+                                                        persons=_decode_records(contents['persons'], objects).tolist(),
+                                                        locations=list(location_states))
+    return snapshot
+
+
+def read_checkpoint(sim: PandemicSim, path: Union[str, Path]) -> PandemicSimSnapshot:
+    """
+    Read a checkpoint written by save_checkpoint as a snapshot of the given simulator. The arrays of the snapshot are
+    memory-mapped from the file. The header of the checkpoint is unpickled, so only checkpoints from a trusted source
+    must be read.
+
+    :param sim: PandemicSim instance with the same persons and locations as the simulator of the checkpoint (e.g.
+        built from the same config).
+    :param path: Path of the checkpoint file.
+    :return: A PandemicSimSnapshot instance that can be restored with PandemicSim.restore.
+    """
+    with _gc_paused():
+        return _read_snapshot(sim, path, [location.snapshot() for location in sim.locations])
+
+
+def load_checkpoint(sim: PandemicSim, path: Union[str, Path]) -> None:
+    """
+    Restore the simulator from a checkpoint written by save_checkpoint. This is the same as restoring the snapshot
+    returned by read_checkpoint, except that the location states are decoded in place. The header of the checkpoint is
+    unpickled (see read_checkpoint), so only checkpoints from a trusted source must be loaded.
+
+    :param sim: PandemicSim instance with the same persons and locations as the simulator of the checkpoint (e.g.
+        built from the same config).
+    :param path: Path of the checkpoint file.
+    """
+    with _gc_paused():
+        snapshot = _read_snapshot(sim, path, [location.state for location in sim.locations])
+        for person, person_snapshot in zip(sim.persons, snapshot.persons):
+            person.restore(person_snapshot)
+        sim._restore_components(snapshot)
@@ -1,8 +1,8 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
-import dataclasses
-from typing import Dict, List, Optional, cast, Set, Type, Mapping, Tuple, Union
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterator, List, Optional, cast, Sequence, Set, Type, Mapping, Tuple, Union
 
-from cachetools import cached
+import numpy as np
 
 from .interfaces import LocationID, Location, PersonID, Person, Registry, RegistrationError, InfectionSummary, \
     IndividualInfectionState, BusinessLocationState, PandemicTestResult, LocationSummary, SimTimeTuple, SimTime, \
@@ -13,48 +13,162 @@ from .location.cemetery import Cemetery
 __all__ = ['CityRegistry']
 
 
+class _GlobalLocationSummary(Mapping[Tuple[str, str], LocationSummary]):
+    """A read-only view of the location entry counters of a registry. The location summaries (the counters normalized by
+    the number of persons of the person type) are only computed when they are read."""
+
+    _registry: 'CityRegistry'
+
+    def __init__(self, registry: 'CityRegistry'):
+        self._registry = registry
+
+    def __getitem__(self, key: Tuple[str, str]) -> LocationSummary:
+        location_type, person_type = key
+        registry = self._registry
+        row = registry._location_type_rows[location_type]
+        column = registry._person_type_columns[person_type]
+        person_count = registry._person_type_to_count[person_type]
+        return LocationSummary(entry_count=int(registry._location_entry_counts[row, column]) / person_count,
+                               visitor_count=int(registry._location_visitor_counts[row, column]) / person_count)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        registry = self._registry
+        return ((location_type, person_type) for person_type in registry._person_type_columns
+                for location_type in registry._location_type_rows)
+
+    def __len__(self) -> int:
+        return len(self._registry._location_type_rows) * len(self._registry._person_type_columns)
+
+
 class CityRegistry(Registry):
     """A global registry for all persons and location instances"""
 
     _location_register: Dict[LocationID, Location]
     _person_register: Dict[PersonID, Person]
 
+    _location_ids_by_index: List[LocationID]
+    """The registered location ids, in registration order (see location_index)."""
+
+    _location_indices: Dict[LocationID, int]
+
+    _person_ids_by_index: List[PersonID]
+    """The registered person ids, in registration order (see person_index)."""
+
+    _person_indices: Dict[PersonID, int]
+
+    _type_to_location_indices: Dict[type, List[int]]
+    """The indices of the registered locations of each (exact) location type, in increasing order."""
+
+    _location_ids_of_type: Dict[Union[type, Tuple[type, ...]], Tuple[LocationID, ...]]
+    """The answers of location_ids_of_type, cleared when a location is registered."""
+
     _location_ids: Set[LocationID]
     _business_location_ids: Set[LocationID]
     _person_ids: Set[PersonID]
 
-    _quarantined: Set[PersonID]
+    _quarantined: np.ndarray
+    """A flag per registered person (by index) that is set while the person is quarantined. The arrays over persons and
+    locations have a capacity that grows by doubling, such that registrations are amortized O(1)."""
+
+    _person_home_indices: np.ndarray
+    """The index of the home of each registered person (by index)."""
+
+    _household_quarantined_counts: np.ndarray
+    """The number of quarantined persons living in each location (by index), non-zero only for homes."""
+
+    _social_event_num_persons: Dict[int, int]
+    """The number of persons in each location (by index) with an active social event."""
+
+    _social_events_by_num_persons: List[Tuple[int, int]]
+    """The (number of persons, index) pairs of the locations with an active social event, in increasing order."""
+
+    _location_ids_with_social_events: Optional[List[LocationID]]
+    """The ids of the locations with an active social event in registration order, None if they changed since the
+    list was built."""
 
-    _location_ids_with_social_events: List[LocationID]
-    _global_location_summary: Dict[Tuple[str, str], LocationSummary]
     _location_types: Set[str]
     _person_type_to_count: Dict[str, int]
 
+    _location_type_rows: Dict[str, int]
+    _person_type_columns: Dict[str, int]
+    _location_entry_counts: np.ndarray
+    """Number of entries to the locations of a type (row) by the persons of a type (column)."""
+
+    _location_visitor_counts: np.ndarray
+    """Number of entries to the locations of a type (row) by visiting persons of a type (column)."""
+
+    _global_location_summary: _GlobalLocationSummary
+
     IGNORE_LOCS_SUMMARY: Set[Type] = {Cemetery}
 
     def __init__(self) -> None:
         self._location_register = {}
         self._person_register = {}
 
+        self._location_ids_by_index = []
+        self._location_indices = {}
+        self._person_ids_by_index = []
+        self._person_indices = {}
+        self._type_to_location_indices = {}
+        self._location_ids_of_type = {}
+
         self._location_ids = set()
         self._business_location_ids = set()
         self._person_ids = set()
 
-        self._quarantined = set()
-        self._global_location_summary = dict()
+        self._quarantined = np.zeros(0, dtype=bool)
+        self._person_home_indices = np.zeros(0, dtype=np.int64)
+        self._household_quarantined_counts = np.zeros(0, dtype=np.int64)
+        self._social_event_num_persons = {}
+        self._social_events_by_num_persons = []
+        self._location_ids_with_social_events = None
         self._location_types = set()
         self._person_type_to_count = dict()
 
+        self._location_type_rows = dict()
+        self._person_type_columns = dict()
+        self._location_entry_counts = np.zeros((0, 0), dtype=np.int64)
+        self._location_visitor_counts = np.zeros((0, 0), dtype=np.int64)
+        self._global_location_summary = _GlobalLocationSummary(self)
+
+    def _resize_location_counts(self) -> None:
+        """Grow the location entry counters to the registered location and person types."""
+        shape = (len(self._location_type_rows), len(self._person_type_columns))
+        for name in ('_location_entry_counts', '_location_visitor_counts'):
+            counts = getattr(self, name)
+            resized = np.zeros(shape, dtype=np.int64)
+            resized[:counts.shape[0], :counts.shape[1]] = counts
+            setattr(self, name, resized)
+
+    @staticmethod
+    def _grown(array: np.ndarray, size: int) -> np.ndarray:
+        """Return the array if it holds at least size values, else a copy with a doubled capacity."""
+        if size <= len(array):
+            return array
+        grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
     def register_location(self, location: Location) -> None:
         if location.id in self._location_register:
             raise RegistrationError(f'Location {location.id.name} is already registered.')
         self._location_register[location.id] = location
         self._location_ids.add(location.id)
+        self._location_indices[location.id] = len(self._location_ids_by_index)
+        self._type_to_location_indices.setdefault(type(location), []).append(len(self._location_ids_by_index))
+        self._location_ids_by_index.append(location.id)
+        self._household_quarantined_counts = self._grown(self._household_quarantined_counts,
+                                                         len(self._location_ids_by_index))
+        self._location_ids_of_type.clear()
+        self._update_social_event(location)
         if isinstance(location.state, BusinessLocationState):
             self._business_location_ids.add(location.id)
 
-        if type(location) not in self.IGNORE_LOCS_SUMMARY:
-            self._location_types.add(type(location).__name__)
+        location_type = type(location).__name__
+        if type(location) not in self.IGNORE_LOCS_SUMMARY and location_type not in self._location_types:
+            self._location_types.add(location_type)
+            self._location_type_rows[location_type] = len(self._location_type_rows)
+            self._resize_location_counts()
 
     def register_person(self, person: Person) -> None:
         if person.id in self._person_register:
@@ -78,19 +192,26 @@ class CityRegistry(Registry):
                 raise RegistrationError('Unable to register the person because the person is not allowed in his/her'
                                         'claimed current location.')
 
-        # everything checks out, register the person
+        # everything checks out, register the person (indexed first, the occupancy of locations holds the indices)
+        self._person_register[person.id] = person
+        self._person_ids.add(person.id)
+        person_index = self._person_indices[person.id] = len(self._person_ids_by_index)
+        self._person_ids_by_index.append(person.id)
+        self._quarantined = self._grown(self._quarantined, person_index + 1)
+        self._person_home_indices = self._grown(self._person_home_indices, person_index + 1)
+        self._person_home_indices[person_index] = self._location_indices[person.home]
         for loc in assigned_locations:
             loc.assign_person(person.id)
         current_location.add_person_to_location(person.id)
-        self._person_register[person.id] = person
-        self._person_ids.add(person.id)
+        if current_location.state.social_gathering_event:
+            self._update_social_event(current_location)
 
-        # init entry in global_location_summary
+        # init the column of the person type in the location entry counters
         person_type = type(person).__name__
         if person_type not in self._person_type_to_count:
             self._person_type_to_count[person_type] = 0
-            for loc_type in self._location_types:
-                self._global_location_summary[(loc_type, person_type)] = LocationSummary()
+            self._person_type_columns[person_type] = len(self._person_type_columns)
+            self._resize_location_counts()
         self._person_type_to_count[person_type] += 1
 
     def register_person_entry_in_location(self, person_id: PersonID, location_id: LocationID) -> bool:
@@ -106,31 +227,76 @@ class CityRegistry(Registry):
         current_location.remove_person_from_location(person_id)  # exit current
         next_location.add_person_to_location(person_id)  # enter next
         person.state.current_location = next_location.id  # update person state
-
-        # update global location summary
-        if type(next_location) not in self.IGNORE_LOCS_SUMMARY:
-            location_type = type(next_location).__name__
-            person_type = type(person).__name__
-            key = (location_type, person_type)
-            summary = self._global_location_summary[key]
-            is_visitor = person_id not in next_location.state.assignees
-            person_cnt = self._person_type_to_count[person_type]
-            self._global_location_summary[key] = dataclasses.replace(
-                summary,
-                entry_count=(person_cnt * summary.entry_count + 1) / person_cnt,
-                visitor_count=(person_cnt * summary.visitor_count + is_visitor) / person_cnt
-            )
+        if current_location.state.social_gathering_event:
+            self._update_social_event(current_location)
+        if next_location.state.social_gathering_event:
+            self._update_social_event(next_location)
+
+        # update the location entry counters (the location types ignored by the summary have no row)
+        row = self._location_type_rows.get(type(next_location).__name__)
+        if row is not None:
+            column = self._person_type_columns[type(person).__name__]
+            self._location_entry_counts[row, column] += 1
+            if person_id not in next_location.state.assignees:
+                self._location_visitor_counts[row, column] += 1
         return True
 
+    def _update_social_event(self, location: Location) -> None:
+        """Add, move or remove the location in the social events, following its state."""
+        index = self._location_indices[location.id]
+        num_persons = self._social_event_num_persons.get(index)
+        by_num_persons = self._social_events_by_num_persons
+        if location.state.social_gathering_event:
+            new_num_persons = location.state.num_persons_in_location
+            if new_num_persons == num_persons:
+                return
+            if num_persons is None:
+                self._location_ids_with_social_events = None
+            else:
+                del by_num_persons[bisect_left(by_num_persons, (num_persons, index))]
+            insort(by_num_persons, (new_num_persons, index))
+            self._social_event_num_persons[index] = new_num_persons
+        elif num_persons is not None:
+            del by_num_persons[bisect_left(by_num_persons, (num_persons, index))]
+            del self._social_event_num_persons[index]
+            self._location_ids_with_social_events = None
+
+    def update_social_gathering_event(self, location_id: LocationID) -> None:
+        self._update_social_event(self._location_register[location_id])
+
     def update_location_specific_information(self) -> None:
-        self._location_ids_with_social_events = [loc_id for loc_id, loc in self._location_register.items()
-                                                 if loc.state.social_gathering_event]
+        # the social events are kept up to date by the locations and the person entries, only the list of their ids
+        # is built again if they changed
+        if self._location_ids_with_social_events is None:
+            self._location_ids_with_social_events = [self._location_ids_by_index[index]
+                                                     for index in sorted(self._social_event_num_persons)]
 
     def reassign_locations(self, person: Person) -> None:
         assigned_locations = [self._location_register[loc_id] for loc_id in person.assigned_locations]
         for loc in assigned_locations:
             loc.assign_person(person.id)
 
+    def snapshot(self) -> Any:
+        num_persons = len(self._person_ids_by_index)
+        return (self._quarantined[:num_persons].copy(), dict(self._social_event_num_persons),
+                self._location_entry_counts.copy(), self._location_visitor_counts.copy())
+
+    def restore(self, snapshot: Any) -> None:
+        quarantined, social_event_num_persons, entry_counts, visitor_counts = snapshot
+        num_persons = len(self._person_ids_by_index)
+        self._quarantined[:] = False
+        self._quarantined[:len(quarantined)] = quarantined
+        home_indices = self._person_home_indices[:num_persons][self._quarantined[:num_persons]]
+        self._household_quarantined_counts[:] = np.bincount(home_indices,
+                                                            minlength=len(self._household_quarantined_counts))
+        self._social_event_num_persons = dict(social_event_num_persons)
+        self._social_events_by_num_persons = sorted((num_persons, index)
+                                                    for index, num_persons in social_event_num_persons.items())
+        self._location_ids_with_social_events = None
+        # the summary mapping shared with the simulator state is a view of the counters, it sees the restored counters
+        self._location_entry_counts = entry_counts.copy()
+        self._location_visitor_counts = visitor_counts.copy()
+
     # ----------------public attributes-----------------
 
     @property
@@ -143,7 +309,13 @@ class CityRegistry(Registry):
 
     @property
     def location_ids_with_social_events(self) -> List[LocationID]:
-        return self._location_ids_with_social_events
+        self.update_location_specific_information()
+        return cast(List[LocationID], self._location_ids_with_social_events)
+
+    def location_ids_with_social_events_below(self, gathering_size: int) -> Sequence[LocationID]:
+        by_num_persons = self._social_events_by_num_persons
+        return [self._location_ids_by_index[index]
+                for _, index in by_num_persons[:bisect_left(by_num_persons, (gathering_size, -1))]]
 
     @property
     def location_types(self) -> Set[str]:
@@ -155,9 +327,30 @@ class CityRegistry(Registry):
 
     # ----------------location utility methods-----------------
 
-    @cached(cache={})
+    def person_index(self, person_id: PersonID) -> int:
+        return self._person_indices[person_id]
+
+    def location_index(self, location_id: LocationID) -> int:
+        return self._location_indices[location_id]
+
+    @property
+    def person_ids_by_index(self) -> Sequence[PersonID]:
+        return self._person_ids_by_index
+
+    @property
+    def location_ids_by_index(self) -> Sequence[LocationID]:
+        return self._location_ids_by_index
+
     def location_ids_of_type(self, location_type: Union[type, Tuple[type, ...]]) -> Tuple[LocationID, ...]:
-        return tuple(loc_id for loc_id, loc in self._location_register.items() if isinstance(loc, location_type))
+        location_ids = self._location_ids_of_type.get(location_type)
+        if location_ids is None:
+            # merge the indices of the registered types that are subclasses of the queried types, to return the
+            # locations in registration order
+            indices = sorted(index for registered_type, type_indices in self._type_to_location_indices.items()
+                             if issubclass(registered_type, location_type) for index in type_indices)
+            location_ids = self._location_ids_of_type[location_type] = tuple(self._location_ids_by_index[index]
+                                                                             for index in indices)
+        return location_ids
 
     def get_persons_in_location(self, location_id: LocationID) -> Set[PersonID]:
         return cast(LocationState, self._location_register[location_id].state).persons_in_location
@@ -178,6 +371,9 @@ class CityRegistry(Registry):
     def get_person_home_id(self, person_id: PersonID) -> LocationID:
         return self._person_register[person_id].home
 
+    def is_household_quarantined(self, person_id: PersonID) -> bool:
+        return bool(self._household_quarantined_counts[self._person_home_indices[self._person_indices[person_id]]])
+
     def get_households(self, person_id: PersonID) -> Set[PersonID]:
         home_id = self._person_register[person_id].home
         home = self._location_register[home_id]
@@ -197,11 +393,16 @@ class CityRegistry(Registry):
         return state.test_result
 
     def quarantine_person(self, person_id: PersonID) -> None:
-        self._quarantined.add(person_id)
+        person_index = self._person_indices[person_id]
+        if not self._quarantined[person_index]:
+            self._quarantined[person_index] = True
+            self._household_quarantined_counts[self._person_home_indices[person_index]] += 1
 
     def clear_quarantined(self, person_id: PersonID) -> None:
-        if person_id in self._quarantined:
-            self._quarantined.remove(person_id)
+        person_index = self._person_indices[person_id]
+        if self._quarantined[person_index]:
+            self._quarantined[person_index] = False
+            self._household_quarantined_counts[self._person_home_indices[person_index]] -= 1
 
     def get_person_quarantined_state(self, person_id: PersonID) -> bool:
-        return person_id in self._quarantined
+        return bool(self._quarantined[self._person_indices[person_id]])
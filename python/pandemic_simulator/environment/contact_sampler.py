@@ -0,0 +1,148 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .interfaces import ContactRate
+
+__all__ = ['num_possible_contacts', 'decode_contact_indices', 'sample_contact_indices',
+           'sample_location_contact_indices']
+
+_no_contacts = np.zeros(0, dtype=np.int64)
+
+
+def num_possible_contacts(num_persons_1: int, num_persons_2: Optional[int] = None) -> int:
+    """
+    Return the number of possible contacts (pairs) between two groups of persons.
+
+    :param num_persons_1: Number of persons in the first group.
+    :param num_persons_2: Number of persons in the second group. If None, the contacts are computed within the first
+        group (unordered pairs of distinct persons).
+    :return: Number of possible contacts.
+    """
+    if num_persons_2 is None:
+        return num_persons_1 * (num_persons_1 - 1) // 2
+    return num_persons_1 * num_persons_2
+
+
+def decode_contact_indices(flat_indices: np.ndarray,
+                           num_persons_1: int,
+                           num_persons_2: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode flat contact indices into (i, j) person indices without enumerating all possible pairs.
+
+    The flat index follows the order of itertools.combinations(range(num_persons_1), 2) when num_persons_2 is None
+    (the upper triangle, row by row) and the order of itertools.product(range(num_persons_1), range(num_persons_2))
+    otherwise.
+
+    :param flat_indices: An integer array of flat contact indices.
+    :param num_persons_1: Number of persons in the first group.
+    :param num_persons_2: Number of persons in the second group. If None, the contacts are within the first group.
+    :return: A tuple of integer arrays (i, j) holding the decoded person indices of each contact.
+    """
+    k = np.asarray(flat_indices, dtype=np.int64)
+
+    if num_persons_2 is not None:
+        return k // num_persons_2, k % num_persons_2
+
+    # row i of the upper triangle starts at the flat index i * n - i * (i + 1) / 2
+    n = num_persons_1
+    b = 2 * n - 1
+    i = np.floor((b - np.sqrt(b * b - 8. * k)) / 2.).astype(np.int64)
+
+    # correct off-by-one errors from the floating point square root
+    row_start = i * n - i * (i + 1) // 2
+    i = np.where(row_start > k, i - 1, i)
+    next_row_start = (i + 1) * n - (i + 1) * (i + 2) // 2
+    i = np.where(next_row_start <= k, i + 1, i)
+
+    row_start = i * n - i * (i + 1) // 2
+    j = k - row_start + i + 1
+    return i, j
+
+
+def sample_contact_indices(num_persons_1: int,
+                           num_persons_2: Optional[int],
+                           minimum: int,
+                           fraction: float,
+                           numpy_rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample contacts between two groups of persons following the ContactRate semantics. The cost is proportional to
+    the number of sampled contacts and not to the number of possible contacts.
+
+    A fraction of all possible contacts is sampled (with replacement), where the fraction is drawn from a gaussian
+    around the given fraction and at least `minimum` contacts are sampled.
+
+    :param num_persons_1: Number of persons in the first group.
+    :param num_persons_2: Number of persons in the second group. If None, the contacts are sampled within the first
+        group.
+    :param minimum: Minimum number of contacts to sample.
+    :param fraction: Fraction of all possible contacts to sample. A value in [0, 1].
+    :param numpy_rng: Random number generator.
+    :return: A tuple of integer arrays (i, j) holding the person indices (in their respective groups) of each sampled
+        contact. The contacts may contain duplicates.
+    """
+    num_possible = num_possible_contacts(num_persons_1, num_persons_2)
+    if num_possible == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    fraction_sample = min(1., max(0., numpy_rng.normal(fraction, 1e-2)))
+    num_samples = max(minimum, int(fraction_sample * num_possible))
+
+    flat_indices = numpy_rng.integers(0, num_possible, num_samples)
+    return decode_contact_indices(flat_indices, num_persons_1, num_persons_2)
+
+
+def sample_location_contact_indices(num_assignees: int,
+                                    num_visitors: int,
+                                    contact_rate: ContactRate,
+                                    numpy_rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample the contacts of one location for one hour: the contacts among assignees, between assignees and visitors and
+    among visitors, following the contact rate of the location. Repeated contacts are dropped.
+
+    :param num_assignees: Number of assignees in the location.
+    :param num_visitors: Number of visitors in the location.
+    :param contact_rate: ContactRate of the location.
+    :param numpy_rng: Random number generator.
+    :return: A tuple of integer arrays (i, j) holding the indices of the persons of each contact in the persons of the
+        location (assignees followed by visitors).
+    """
+    if num_assignees + num_visitors < 2:
+        # no possible contacts (and hence no random draws)
+        return _no_contacts, _no_contacts
+
+    # groups are given by (offset, size) into the persons in the location (assignees followed by visitors)
+    cr = contact_rate
+    groups = [((0, num_assignees), None),
+              ((0, num_assignees), (num_assignees, num_visitors)),
+              ((num_assignees, num_visitors), None)]
+    constraints = [(cr.min_assignees, cr.fraction_assignees),
+                   (cr.min_assignees_visitors, cr.fraction_assignees_visitors),
+                   (cr.min_visitors, cr.fraction_visitors)]
+
+    contacts_1: List[np.ndarray] = []
+    contacts_2: List[np.ndarray] = []
+
+    for grp, cst in zip(groups, constraints):
+        grp1, grp2 = grp
+        minimum, fraction = cst
+
+        # pairs are drawn directly by their index (in the order of combinations/cartesian product of the groups)
+        idx1, idx2 = sample_contact_indices(grp1[1], grp2[1] if grp2 is not None else None, minimum, fraction,
+                                            numpy_rng)
+        if len(idx1) == 0:
+            continue
+
+        # drop repeated draws, keeping the order of their first occurrence (the contacts are a repeatable set)
+        grp2 = grp2 if grp2 is not None else grp1
+        _, first_occurrence = np.unique(idx1 * grp2[1] + idx2, return_index=True)
+        first_occurrence.sort()
+
+        contacts_1.append(idx1[first_occurrence] + grp1[0])
+        contacts_2.append(idx2[first_occurrence] + grp2[0])
+
+    if len(contacts_1) == 0:
+        return _no_contacts, _no_contacts
+    return np.concatenate(contacts_1), np.concatenate(contacts_2)
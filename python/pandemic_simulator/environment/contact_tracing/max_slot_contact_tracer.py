@@ -1,7 +1,7 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
 from orderedset import OrderedSet
-from typing import Dict, FrozenSet, List, Mapping, Set
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 import numpy as np
 
@@ -9,17 +9,114 @@ from ..interfaces import ContactTracer, PersonID
 
 __all__ = ['MaxSlotContactTracer']
 
+_Csr = Tuple[np.ndarray, np.ndarray, np.ndarray]
+"""The row pointers, the column indices and the counts of a sparse contact matrix."""
+
+_EMPTY_CSR: _Csr = (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+
+class _ContactSlot:
+    """The contacts of a time slot, as a symmetric sparse matrix of contact counts between persons (by the index of
+    the persons in the contact tracer).
+
+    Contacts added to the slot are appended as pair keys (COO). The CSR form is built when the slot is read, the
+    pairs are then kept compacted as sorted unique keys with their counts. A slot is closed (only its CSR form is kept)
+    when a new time slot is started, it is never updated after that and can be shared between snapshots."""
+
+    __slots__ = ('_keys', '_counts', '_csr')
+
+    _keys: List[np.ndarray]
+    _counts: List[np.ndarray]
+    _csr: Optional[_Csr]
+
+    def __init__(self) -> None:
+        self._keys = []
+        self._counts = []
+        self._csr = _EMPTY_CSR
+
+    def add(self, rows: np.ndarray, columns: np.ndarray) -> None:
+        # both directions of each pair are stored, such that the contacts of a person are one row of the matrix
+        self._keys.append(np.concatenate((rows << 32 | columns, columns << 32 | rows)))
+        self._counts.append(np.ones(2 * len(rows), dtype=np.int32))
+        self._csr = None
+
+    def csr(self, num_persons: int) -> _Csr:
+        if self._csr is None:
+            keys, inverse = np.unique(np.concatenate(self._keys), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate(self._counts)).astype(np.int32)
+            self._keys = [keys]
+            self._counts = [counts]
+            rows = keys >> 32
+            indptr = np.zeros(num_persons + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=num_persons), out=indptr[1:])
+            self._csr = (indptr, (keys & 0xFFFFFFFF).astype(np.int32), counts)
+        return self._csr
+
+    def contacts_of(self, persons: np.ndarray) -> np.ndarray:
+        """Return the contacts (with repetitions) of the persons flagged in the given array (by index)."""
+        if self._csr is not None:
+            indptr, indices, _ = self._csr
+            rows = np.flatnonzero(persons[:len(indptr) - 1])
+            contacts: np.ndarray = indices[_csr_rows(self._csr, rows)]
+            return contacts
+        # the slot is open and updated since it was last read, scan its pairs instead of building the CSR form
+        keys = np.concatenate(self._keys)
+        contacts = (keys[persons[keys >> 32]] & 0xFFFFFFFF).astype(np.int32)
+        return contacts
+
+    def close(self, num_persons: int) -> None:
+        self.csr(num_persons)
+        self._keys = []
+        self._counts = []
+
+    def copy(self) -> '_ContactSlot':
+        slot_copy = _ContactSlot()
+        slot_copy._keys = list(self._keys)
+        slot_copy._counts = list(self._counts)
+        slot_copy._csr = self._csr
+        return slot_copy
+
+    def __getstate__(self) -> Tuple[List[np.ndarray], List[np.ndarray], Optional[_Csr]]:
+        # the pairs are appended in many small arrays, they are pickled (and deep copied) as one array
+        if len(self._keys) > 1:
+            return [np.concatenate(self._keys)], [np.concatenate(self._counts)], self._csr
+        return self._keys, self._counts, self._csr
+
+    def __setstate__(self, state: Tuple[List[np.ndarray], List[np.ndarray], Optional[_Csr]]) -> None:
+        self._keys, self._counts, self._csr = state
+
+
+def _csr_rows(csr: _Csr, rows: np.ndarray) -> np.ndarray:
+    """Return the positions in the column indices of the entries of the given rows of a CSR matrix."""
+    indptr = csr[0]
+    rows = rows[rows < len(indptr) - 1]
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) > 0 else 0)
+
 
 class MaxSlotContactTracer(ContactTracer):
     """A max slot contact tracing app. In this app, contacts are discarded after the maximum storage slots are reached.
     For example, if storage_slots is 5, and the time_slot_scale is 24 (a day), only the last 5 days of contacts
     will be kept. Note that time_slot_scale is only used as a scale and it should be care of the user to
-    make sure that the contacts are added in a proper way (respecting that scale)."""
+    make sure that the contacts are added in a proper way (respecting that scale).
+
+    The persons are indexed in the order they are first traced, and each slot holds a sparse matrix of the contact
+    counts between them (see _ContactSlot). The slots are kept in a circular buffer, such that a new time slot only
+    replaces the oldest slot."""
 
     _storage_slots: int
     _time_slot_scale: int
-    _memory: List[Dict[FrozenSet[PersonID], int]]
-    _indices: List[Dict[PersonID, Set[FrozenSet[PersonID]]]]
+    _slots: List[_ContactSlot]
+    _latest: int
+    """The position of the latest (open) slot in the circular buffer of slots. The slot of age k is at
+    (_latest + k) % storage_slots."""
+
+    _person_ids: List[PersonID]
+    _person_indices: Dict[PersonID, int]
+    _positive_contacts: np.ndarray
+    """A flag per traced person (by index) set by update_positive_contacts."""
 
     def __init__(self, storage_slots: int = 5, time_slot_scale: int = 24):
         """
@@ -28,24 +125,41 @@ class MaxSlotContactTracer(ContactTracer):
         """
         self._storage_slots = storage_slots
         self._time_slot_scale = time_slot_scale
-        self._memory = [dict() for i in range(0, storage_slots)]
-        self._indices = [dict() for i in range(0, storage_slots)]
+        self._person_ids = []
+        self._person_indices = {}
+        self.reset()
 
     def new_time_slot(self) -> None:
         """
         Adds a new time slot to the contact tracing (e.g., a new day, or a new hour, depending on the granularity).
         """
-        self._memory = np.roll(self._memory, 1)
-        self._indices = np.roll(self._indices, 1)
-        self._memory[0] = dict()
-        self._indices[0] = dict()
+        self._slots[self._latest].close(len(self._person_ids))
+        self._latest = (self._latest - 1) % self._storage_slots
+        self._slots[self._latest] = _ContactSlot()
 
     def reset(self) -> None:
         """
         Resets the traces.
         """
-        self._memory = [dict() for i in range(0, self._storage_slots)]
-        self._indices = [dict() for i in range(0, self._storage_slots)]
+        self._slots = [_ContactSlot() for _ in range(self._storage_slots)]
+        self._latest = 0
+        self._positive_contacts = np.zeros(0, dtype=bool)
+
+    def snapshot(self) -> Any:
+        # only the latest slot can be updated, the closed slots are shared
+        slots = list(self._slots)
+        slots[self._latest] = slots[self._latest].copy()
+        return tuple(self._person_ids), slots, self._latest
+
+    def restore(self, snapshot: Any) -> None:
+        person_ids, slots, self._latest = snapshot
+        # the persons are only ever appended, a snapshot of this tracer holds a prefix of its persons
+        if tuple(self._person_ids[:len(person_ids)]) != person_ids:
+            self._person_ids = list(person_ids)
+            self._person_indices = {person_id: index for index, person_id in enumerate(person_ids)}
+        self._slots = list(slots)
+        self._slots[self._latest] = self._slots[self._latest].copy()
+        self._positive_contacts = np.zeros(0, dtype=bool)
 
     def add_contacts(self, contacts: OrderedSet) -> None:
         """
@@ -53,18 +167,16 @@ class MaxSlotContactTracer(ContactTracer):
 
         :param contacts: Contacts to add.
         """
-        for c in contacts:
-            idx = frozenset(c)
-
-            if idx not in self._memory[0]:
-                self._memory[0][idx] = 0
-
-            self._memory[0][idx] += 1
-
-            for pid in idx:
-                if pid not in self._indices[0]:
-                    self._indices[0][pid] = OrderedSet()
-                self._indices[0][pid].add(idx)
+        if len(contacts) == 0:
+            return
+        indices = self._person_indices
+        person_ids = [person_id for pair in contacts for person_id in pair]
+        for person_id in person_ids:
+            if person_id not in indices:
+                indices[person_id] = len(self._person_ids)
+                self._person_ids.append(person_id)
+        pairs = np.array([indices[person_id] for person_id in person_ids], dtype=np.int64)
+        self._slots[self._latest].add(pairs[0::2], pairs[1::2])
 
     def get_contacts(self, person_id: PersonID) -> Mapping[PersonID, np.ndarray]:
         """
@@ -75,19 +187,48 @@ class MaxSlotContactTracer(ContactTracer):
         the contact hours scaled on a day (24 hours). The length of the sequence depends on the number of days for
         data conservation.
         """
+        res: Dict[PersonID, np.ndarray] = dict()
+        index = self._person_indices.get(person_id)
+        if index is None:
+            return res
+
+        num_persons = len(self._person_ids)
+        contacts, slot_nums, counts = [], [], []
+        for slot_num in range(self._storage_slots):
+            indptr, indices, slot_counts = self._slots[(self._latest + slot_num) % self._storage_slots].csr(num_persons)
+            if index < len(indptr) - 1:
+                start, end = indptr[index], indptr[index + 1]
+                contacts.append(indices[start:end])
+                slot_nums.append(np.full(end - start, slot_num))
+                counts.append(slot_counts[start:end])
+        if len(contacts) == 0:
+            return res
+
+        # one row of traces per contact, the rows are views of one array
+        contact_indices, rows = np.unique(np.concatenate(contacts), return_inverse=True)
+        traces = np.zeros((len(contact_indices), self._storage_slots))
+        np.add.at(traces, (rows, np.concatenate(slot_nums)), np.concatenate(counts) / float(self._time_slot_scale))
+        person_ids = self._person_ids
+        res.update(zip([person_ids[contact] for contact in contact_indices.tolist()], traces))
+        return res
 
-        res = dict()
-
-        for slot_num, indices in enumerate(self._memory):
-            if person_id not in self._indices[slot_num]:
-                continue
-
-            p_indices = self._indices[slot_num][person_id]
-
-            for idx in p_indices:
-                pid = [val for val in idx if val != person_id]
-                if pid[0] not in res:
-                    res[pid[0]] = np.zeros(self._storage_slots)
-                res[pid[0]][slot_num] += self._memory[slot_num][idx]/float(self._time_slot_scale)
+    def update_positive_contacts(self, positive_person_ids: Iterable[PersonID]) -> None:
+        """
+        Flag the persons with a contact in the given positive persons. The contacts of the positive persons are the
+        rows of the sparse matrices of the slots, so the cost depends on the number of positive persons and of their
+        contacts, not on the number of traced persons.
 
-        return res
+        :param positive_person_ids: Ids of the persons whose contacts are flagged.
+        """
+        num_persons = len(self._person_ids)
+        positive = np.zeros(num_persons, dtype=bool)
+        positive[[self._person_indices[person_id] for person_id in positive_person_ids
+                  if person_id in self._person_indices]] = True
+        positive_contacts = np.zeros(num_persons, dtype=bool)
+        for slot in self._slots:
+            positive_contacts[slot.contacts_of(positive)] = True
+        self._positive_contacts = positive_contacts
+
+    def has_positive_contact(self, person_id: PersonID) -> bool:
+        index = self._person_indices.get(person_id)
+        return index is not None and index < len(self._positive_contacts) and bool(self._positive_contacts[index])
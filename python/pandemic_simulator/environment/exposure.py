@@ -0,0 +1,70 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import numpy as np
+
+from .interfaces import InfectionSummary, PopulationStore
+
+__all__ = ['accumulate_exposures', 'accumulate_column_exposures']
+
+
+def accumulate_exposures(population_store: PopulationStore,
+                         slots_1: np.ndarray,
+                         slots_2: np.ndarray) -> np.ndarray:
+    """
+    Apply the exposure updates of a batch of contacts to the not_infection_probability column of the population store.
+
+    A contact exposes a person only if exactly one of the two persons is infectious (infected or critical). The
+    not_infection_probability of the exposed person is then multiplied by (1 - spread probability of the infectious
+    person's state * spread multiplier of the infectious person). The updates are applied in the order of the contacts,
+    so the results are identical to updating each contact one after the other.
+
+    :param population_store: PopulationStore instance that holds the states of the persons.
+    :param slots_1: An integer array of the population store slots of the first person of each contact.
+    :param slots_2: An integer array of the population store slots of the second person of each contact.
+    :return: An integer array of the slots of the exposed persons, with one entry per applied exposure in the order of
+        the contacts.
+    """
+    return accumulate_column_exposures(population_store.infection_summary,
+                                       population_store.spread_probability,
+                                       population_store.infection_spread_multiplier,
+                                       population_store.not_infection_probability,
+                                       slots_1, slots_2)
+
+
+def accumulate_column_exposures(infection_summary: np.ndarray,
+                                spread_probability: np.ndarray,
+                                infection_spread_multiplier: np.ndarray,
+                                not_infection_probability: np.ndarray,
+                                slots_1: np.ndarray,
+                                slots_2: np.ndarray) -> np.ndarray:
+    """
+    Same as accumulate_exposures but on the population columns given as arrays (for instance copies of the columns
+    of a population store in shared memory).
+
+    :param infection_summary: Infection summary codes (see PopulationStore.summary_to_code) of each person.
+    :param spread_probability: Spread probability of the infection state of each person.
+    :param infection_spread_multiplier: Infection spread multiplier of each person.
+    :param not_infection_probability: Not infection probability of each person, updated in place.
+    :param slots_1: An integer array of the slots of the first person of each contact.
+    :param slots_2: An integer array of the slots of the second person of each contact.
+    :return: An integer array of the slots of the exposed persons, with one entry per applied exposure in the order of
+        the contacts.
+    """
+    infected = PopulationStore.summary_to_code[InfectionSummary.INFECTED]
+    critical = PopulationStore.summary_to_code[InfectionSummary.CRITICAL]
+
+    codes_1 = infection_summary[slots_1]
+    codes_2 = infection_summary[slots_2]
+    infectious_1 = (codes_1 == infected) | (codes_1 == critical)
+    infectious_2 = (codes_2 == infected) | (codes_2 == critical)
+
+    exposure = infectious_1 != infectious_2
+    sources = np.where(infectious_1, slots_1, slots_2)[exposure]
+    exposed: np.ndarray = np.where(infectious_1, slots_2, slots_1)[exposure]
+    if len(exposed) == 0:
+        return exposed
+
+    factors = 1 - spread_probability[sources] * infection_spread_multiplier[sources]
+
+    # multiply.at is unbuffered, repeated slots are multiplied in order
+    np.multiply.at(not_infection_probability, exposed, factors)
+    return exposed
@@ -3,12 +3,13 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import numpy as np
 from scipy.stats import truncnorm
 
-from ..interfaces import IndividualInfectionState, InfectionModel, InfectionSummary, Risk, globals
+from ..interfaces import BatchInfectionModel, IndividualInfectionState, InfectionSummary, PopulationStore, Risk, \
+    BufferedRandom, globals
 from ...utils import required
 
 __all__ = ['SEIRInfectionState', 'SEIRModel', 'SpreadProbabilityParams']
@@ -35,6 +36,12 @@ class _AgeLimit(Enum):
     _200 = 200
 
 
+_label_to_code: Dict[_SEIRLabel, int] = {label: code for code, label in enumerate(_SEIRLabel)}
+_code_to_label: List[_SEIRLabel] = list(_SEIRLabel)
+_age_limit_values = np.array([a.value for a in _AgeLimit])
+_show_symptoms_states = {_SEIRLabel.symp, _SEIRLabel.hospitalized, _SEIRLabel.needs_hospitalization}
+
+
 _DEFAULT_HOSP_RATE_SYMP = {
     (_AgeLimit._4, Risk.LOW): 0.0279,
     (_AgeLimit._24, Risk.LOW): 0.0215,
@@ -86,11 +93,20 @@ def _get_age_limit_from_age(age: int) -> _AgeLimit:
     return value
 
 
+def _get_age_buckets_from_ages(ages: np.ndarray) -> np.ndarray:
+    # index of the first age limit that is not below the age (the last one for larger ages)
+    return np.minimum(np.searchsorted(_age_limit_values, ages, side='left'), len(_age_limit_values) - 1)
+
+
 @dataclass(frozen=True)
 class SEIRInfectionState(IndividualInfectionState):
     """State of the infection according to SEIR."""
     label: _SEIRLabel = required()
 
+    @property
+    def label_code(self) -> int:
+        return _label_to_code[self.label]
+
 
 @dataclass(frozen=True)
 class SpreadProbabilityParams:
@@ -104,10 +120,13 @@ _ModelDescriptionValue = Dict[Optional[Tuple[_AgeLimit, Risk]], _TransitionProba
 _ModelDescription = Dict[_SEIRLabel, _ModelDescriptionValue]
 
 
-class SEIRModel(InfectionModel):
+class SEIRModel(BatchInfectionModel):
     """Model of the spreading of the infection."""
 
     _model: _ModelDescription
+    _transition_targets: np.ndarray
+    _transition_cdf: np.ndarray
+    _has_transitions: np.ndarray
     _seir_to_summary: Dict[_SEIRLabel, InfectionSummary] = {
         _SEIRLabel.susceptible: InfectionSummary.NONE,
         _SEIRLabel.exposed: InfectionSummary.NONE,
@@ -121,7 +140,7 @@ class SEIRModel(InfectionModel):
         _SEIRLabel.deceased: InfectionSummary.DEAD
     }
     _spread_probability: Any
-    _numpy_rng: np.random.RandomState
+    _numpy_rng: BufferedRandom
     _pandemic_started_counter: int
     _pandemic_start_limit: int
 
@@ -142,18 +161,19 @@ class SEIRModel(InfectionModel):
                  from_hosp_to_death_rate: Optional[float] = None,
                  spread_probability_params: Optional[SpreadProbabilityParams] = None,
                  pandemic_start_limit: int = 5):
-        self._numpy_rng = globals.numpy_rng
-        assert self._numpy_rng, 'No numpy rng found. Either pass a rng or set the default repo wide rng.'
+        self._numpy_rng = globals.random_streams.buffered('infection')
 
-        exposed_rate = 1. / self._numpy_rng.triangular(1.9, 2.9, 3.9) if exposed_rate is None else exposed_rate
-        recovery_rate_asymp = 1. / self._numpy_rng.triangular(3.0, 4.0, 5.0) if recovery_rate_asymp is None else \
+        # the parameters of the model are drawn with the generator that builds the simulator
+        numpy_rng = globals.numpy_rng
+        exposed_rate = 1. / numpy_rng.triangular(1.9, 2.9, 3.9) if exposed_rate is None else exposed_rate
+        recovery_rate_asymp = 1. / numpy_rng.triangular(3.0, 4.0, 5.0) if recovery_rate_asymp is None else \
             recovery_rate_asymp
-        recovery_rate_symp_non_treated = 1. / self._numpy_rng.triangular(3.0, 4.0, 5.0) \
+        recovery_rate_symp_non_treated = 1. / numpy_rng.triangular(3.0, 4.0, 5.0) \
             if recovery_rate_symp_non_treated is None else recovery_rate_symp_non_treated
 
-        recovery_rate_hosp = 1. / self._numpy_rng.triangular(9.4, 10.7, 12.8) if recovery_rate_hosp is None \
+        recovery_rate_hosp = 1. / numpy_rng.triangular(9.4, 10.7, 12.8) if recovery_rate_hosp is None \
             else recovery_rate_hosp
-        from_hosp_to_death_rate = 1. / self._numpy_rng.triangular(5.2, 8.1, 10.1) if from_hosp_to_death_rate is None \
+        from_hosp_to_death_rate = 1. / numpy_rng.triangular(5.2, 8.1, 10.1) if from_hosp_to_death_rate is None \
             else from_hosp_to_death_rate
 
         hosp_rate_symp = hosp_rate_symp if hosp_rate_symp else _DEFAULT_HOSP_RATE_SYMP
@@ -251,6 +271,37 @@ class SEIRModel(InfectionModel):
         self._pandemic_start_limit = pandemic_start_limit
         self._pandemic_started_counter = 0
 
+        self._build_transition_tables()
+
+    def _build_transition_tables(self) -> None:
+        """Precompute the transitions of the model as cdf matrices indexed by (label, age bucket, risk) codes."""
+        num_transitions = max(len(self._model[label][(a, r)])
+                              for label in self._model for a in _AgeLimit for r in Risk)
+        shape = (len(_SEIRLabel), len(_AgeLimit), max(r.value for r in Risk) + 1, num_transitions)
+
+        # the cdf is padded with inf, such that the number of cdf values below a uniform draw is the drawn transition
+        self._transition_targets = np.zeros(shape, dtype=np.int8)
+        self._transition_cdf = np.full(shape, np.inf)
+        self._has_transitions = np.zeros(len(_SEIRLabel), dtype=bool)
+
+        for label in self._model:
+            for age_bucket, age_limit in enumerate(_AgeLimit):
+                for risk in Risk:
+                    state_probs = self._model[label][(age_limit, risk)]
+                    if len(state_probs) == 0:
+                        continue
+                    probs = np.array(list(state_probs.values()))
+                    assert abs(1. - sum(probs)) < 1e-3, f'Probabilities {probs} do not sum to one'
+
+                    # same normalization as numpy's choice
+                    cdf = probs.cumsum()
+                    cdf /= cdf[-1]
+
+                    index = (_label_to_code[label], age_bucket, risk.value)
+                    self._transition_targets[index][:len(cdf)] = [_label_to_code[lb] for lb in state_probs]
+                    self._transition_cdf[index][:len(cdf)] = cdf
+                    self._has_transitions[_label_to_code[label]] = True
+
     def _create_default(self, state: _SEIRLabel, probs: Dict[_SEIRLabel, float]) -> _ModelDescriptionValue:
         return defaultdict(lambda: self._model[state][None], {None: probs})
 
@@ -273,7 +324,6 @@ class SEIRModel(InfectionModel):
 
         :return: New SEIR state of the subject.
         """
-        show_symptoms_states = {_SEIRLabel.symp, _SEIRLabel.hospitalized, _SEIRLabel.needs_hospitalization}
         pandemic_started = self._pandemic_started_counter >= self._pandemic_start_limit
         label = _SEIRLabel.susceptible if pandemic_started else _SEIRLabel.exposed
         self._pandemic_started_counter += 1 if not pandemic_started else 0
@@ -281,12 +331,12 @@ class SEIRModel(InfectionModel):
         subject_state = cast(SEIRInfectionState, subject_state) if subject_state \
             else SEIRInfectionState(summary=self._seir_to_summary[label],
                                     label=label,
-                                    spread_probability=self._spread_probability.rvs(random_state=self._numpy_rng))
+                                    spread_probability=self._spread_probability.ppf(self._numpy_rng.random()))
         label = subject_state.label
         exposed_rnb = -1.
 
         if subject_state.label == _SEIRLabel.susceptible:
-            rnb = self._numpy_rng.uniform()
+            rnb = self._numpy_rng.random()
             if rnb < infection_probability:
                 label = _SEIRLabel.exposed
                 exposed_rnb = rnb
@@ -303,9 +353,115 @@ class SEIRModel(InfectionModel):
                                   spread_probability=subject_state.spread_probability,
                                   exposed_rnb=exposed_rnb,
                                   is_hospitalized=subject_state.is_hospitalized,
-                                  shows_symptoms=label in show_symptoms_states,
+                                  shows_symptoms=label in _show_symptoms_states,
                                   label=label)
 
+    def _needs_draw(self, labels: np.ndarray, is_hospitalized: np.ndarray) -> np.ndarray:
+        hospitalization = (labels == _label_to_code[_SEIRLabel.needs_hospitalization]) & is_hospitalized
+        needs_draw: np.ndarray = ((labels == _label_to_code[_SEIRLabel.susceptible]) |
+                                  (self._has_transitions[labels] & ~hospitalization))
+        return needs_draw
+
+    def _transition(self,
+                    labels: np.ndarray,
+                    age_buckets: np.ndarray,
+                    risks: np.ndarray,
+                    infection_probabilities: np.ndarray,
+                    is_hospitalized: np.ndarray,
+                    uniforms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        new_labels = labels.copy()
+        exposed_rnb = np.full(len(labels), -1.)
+
+        susceptible = labels == _label_to_code[_SEIRLabel.susceptible]
+        newly_exposed = susceptible & (uniforms < infection_probabilities)
+        new_labels[newly_exposed] = _label_to_code[_SEIRLabel.exposed]
+        exposed_rnb[newly_exposed] = uniforms[newly_exposed]
+
+        hospitalization = (labels == _label_to_code[_SEIRLabel.needs_hospitalization]) & is_hospitalized
+        new_labels[hospitalization] = _label_to_code[_SEIRLabel.hospitalized]
+
+        # categorical draws: the drawn transition is the number of cdf values that are not above the uniform draw
+        idx = np.flatnonzero(self._has_transitions[labels] & ~hospitalization)
+        index = (labels[idx], age_buckets[idx], risks[idx])
+        transitions = np.count_nonzero(self._transition_cdf[index] <= uniforms[idx, None], axis=1)
+        new_labels[idx] = self._transition_targets[index + (transitions,)]
+
+        return new_labels, exposed_rnb
+
+    def step_batch(self,
+                   labels: np.ndarray,
+                   age_buckets: np.ndarray,
+                   risks: np.ndarray,
+                   infection_probabilities: np.ndarray,
+                   is_hospitalized: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of step for a batch of subjects with an infection state. The random draws are made in the
+        order of the subjects, so the result is identical to calling step for each subject in order.
+
+        :param labels: An integer array of the SEIR label codes (see SEIRInfectionState.label_code) of the subjects.
+        :param age_buckets: An integer array of the age bucket of each subject (index of its age limit).
+        :param risks: An integer array of the Risk values of the subjects.
+        :param infection_probabilities: Probability of each subject of getting infected.
+        :param is_hospitalized: A boolean array that is True for the hospitalized subjects.
+        :return: A tuple of arrays (new label codes, exposed random numbers), where the exposed random number is -1
+            for subjects that did not get exposed.
+        """
+        needs_draw = self._needs_draw(labels, is_hospitalized)
+        uniforms = np.full(len(labels), np.nan)
+        uniforms[needs_draw] = self._numpy_rng.random(np.count_nonzero(needs_draw))
+        return self._transition(labels, age_buckets, risks, infection_probabilities, is_hospitalized, uniforms)
+
+    def step_population(self, population_store: PopulationStore, ages: np.ndarray) -> None:
+        num_persons = len(population_store)
+        is_new = population_store.infection_summary == -1
+        labels = population_store.infection_label.astype(np.int64)
+        assert np.all(labels[~is_new] >= 0), 'SEIRModel can only step SEIR infection states.'
+
+        # persons without a state start susceptible, except for the ones stepped before the pandemic started
+        num_exposed = min(num_persons, max(0, self._pandemic_start_limit - self._pandemic_started_counter))
+        self._pandemic_started_counter += num_exposed
+        default_labels = np.full(num_persons, _label_to_code[_SEIRLabel.susceptible])
+        default_labels[:num_exposed] = _label_to_code[_SEIRLabel.exposed]
+        labels[is_new] = default_labels[is_new]
+
+        # the draws follow the order of step: the spread probability of a new state, then the transition, person by
+        # person
+        is_hospitalized = population_store.is_hospitalized
+        needs_draw = self._needs_draw(labels, is_hospitalized)
+        num_draws = is_new.astype(np.int64) + needs_draw
+        draws = self._numpy_rng.random(num_draws.sum())
+        offsets = np.cumsum(num_draws) - num_draws
+
+        spread_probability = population_store.spread_probability.copy()
+        if np.any(is_new):
+            spread_probability[is_new] = self._spread_probability.ppf(draws[offsets[is_new]])
+        uniforms = np.full(num_persons, np.nan)
+        uniforms[needs_draw] = draws[(offsets + is_new)[needs_draw]]
+
+        new_labels, exposed_rnb = self._transition(labels, _get_age_buckets_from_ages(ages),
+                                                   population_store.risk.astype(np.int64),
+                                                   1 - population_store.not_infection_probability,
+                                                   is_hospitalized, uniforms)
+
+        # new state objects are only created for the persons whose state changes
+        shows_symptoms = np.isin(new_labels, [_label_to_code[lb] for lb in _show_symptoms_states])
+        changed = np.flatnonzero(is_new |
+                                 (new_labels != population_store.infection_label) |
+                                 (exposed_rnb != population_store.exposed_rnb) |
+                                 (shows_symptoms != population_store.shows_symptoms))
+        new_states = []
+        for code, sp, rnb, hosp, symp in zip(new_labels[changed].tolist(), spread_probability[changed].tolist(),
+                                             exposed_rnb[changed].tolist(), is_hospitalized[changed].tolist(),
+                                             shows_symptoms[changed].tolist()):
+            label = _code_to_label[code]
+            new_states.append(SEIRInfectionState(summary=self._seir_to_summary[label],
+                                                 spread_probability=sp,
+                                                 exposed_rnb=rnb,
+                                                 is_hospitalized=hosp,
+                                                 shows_symptoms=symp,
+                                                 label=label))
+        population_store.set_infection_states(changed.tolist(), new_states)
+
     def needs_contacts(self, subject_state: Optional[IndividualInfectionState]) -> bool:
         pandemic_started = self._pandemic_started_counter >= self._pandemic_start_limit
         label = _SEIRLabel.susceptible if pandemic_started else _SEIRLabel.exposed
@@ -315,5 +471,11 @@ class SEIRModel(InfectionModel):
             spread_probability=self._spread_probability.rvs())
         return cast(SEIRInfectionState, subject_state).label == _SEIRLabel.exposed
 
+    def snapshot(self) -> Any:
+        return self._pandemic_started_counter
+
+    def restore(self, snapshot: Any) -> None:
+        self._pandemic_started_counter = snapshot
+
     def reset(self) -> None:
         self._pandemic_started_counter = 0
@@ -10,12 +10,15 @@ from .location_base import *
 from .location_base_business import *
 from .location_rules import *
 from .location_states import *
+from .occupancy import *
 from .pandemic_observation import *
 from .pandemic_testing import *
 from .pandemic_testing_result import *
 from .pandemic_types import *
 from .person import *
 from .person_routine import *
+from .population_store import *
+from .random_streams import *
 from .registry import *
 from .regulation import *
 from .sim_state import *
@@ -1,7 +1,7 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
 from abc import ABC, abstractmethod
-from typing import Mapping
+from typing import AbstractSet, Any, Iterable, Mapping
 
 import numpy as np
 from orderedset import OrderedSet
@@ -14,6 +14,8 @@ __all__ = ['ContactTracer']
 class ContactTracer(ABC):
     """An interface for contact tracing apps."""
 
+    _positive_person_ids: AbstractSet[PersonID] = frozenset()
+
     @abstractmethod
     def new_time_slot(self) -> None:
         """
@@ -28,6 +30,24 @@ class ContactTracer(ABC):
         """
         pass
 
+    def snapshot(self) -> Any:
+        """
+        Return a snapshot of the traces that can be restored later. Snapshots are opt-in, the default implementation
+        raises NotImplementedError.
+
+        :return: An opaque snapshot object.
+        :raises NotImplementedError: if the contact tracer does not support snapshots.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
+    def restore(self, snapshot: Any) -> None:
+        """
+        Restore the traces from a snapshot. The snapshot is left untouched and can be restored again.
+
+        :param snapshot: A snapshot returned by the snapshot method of the contact tracer.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
     @abstractmethod
     def add_contacts(self, contacts: OrderedSet) -> None:
         """
@@ -48,3 +68,25 @@ class ContactTracer(ABC):
         data conservation.
         """
         pass
+
+    def update_positive_contacts(self, positive_person_ids: Iterable[PersonID]) -> None:
+        """
+        Compute once, for every traced person, whether one of the contacts of the person is in the given positive
+        persons, such that has_positive_contact is a lookup. The simulator calls it before persons step, after the
+        contacts and test results of the previous step are known. The default keeps the positive persons and checks
+        the contacts of a person on each query.
+
+        :param positive_person_ids: Ids of the persons whose contacts are flagged (e.g. the persons tested positive).
+        """
+        self._positive_person_ids = set(positive_person_ids)
+
+    def has_positive_contact(self, person_id: PersonID) -> bool:
+        """
+        Return True if one of the traced contacts of the person is in the persons given to the last call of
+        update_positive_contacts.
+
+        :param person_id: Person's id to trace.
+        :return: True if the person has a positive contact.
+        """
+        positive_person_ids = self._positive_person_ids
+        return any(contact in positive_person_ids for contact in self.get_contacts(person_id))
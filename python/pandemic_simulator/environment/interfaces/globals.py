@@ -3,7 +3,11 @@ from typing import Optional
 
 import numpy as np
 
+from .random_streams import RandomStreams
 from .registry import Registry
 
 registry: Optional[Registry] = None
 numpy_rng: np.random.RandomState = np.random.RandomState()
+"""Random number generator used to build the population, the locations and the routines"""
+random_streams: RandomStreams = RandomStreams()
+"""Random number streams of the simulation (person steps, contacts, infection and testing)"""
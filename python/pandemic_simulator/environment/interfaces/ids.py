@@ -1,5 +1,6 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 from dataclasses import dataclass
+from typing import Any, ClassVar, Dict
 
 __all__ = ['LocationID', 'PersonID']
 
@@ -8,8 +9,59 @@ __all__ = ['LocationID', 'PersonID']
 class LocationID:
     name: str
 
+    _hash: ClassVar[int]
+    """The hash of the id, computed once since the ids are the keys of most lookups of the simulator. It is set on
+    each instance in __post_init__ but declared as a ClassVar, such that it is not a dataclass field (the fields of
+    the id stay its public values). It is not pickled, the hash of a string differs between interpreters."""
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, '_hash', hash((self.name,)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not LocationID:
+            return NotImplemented
+        return bool(self._hash == other._hash and self.name == other.name)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'name': self.name}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        object.__setattr__(self, 'name', state['name'])
+        self.__post_init__()
+
 
 @dataclass(frozen=True)
 class PersonID:
     name: str
     age: int
+
+    _hash: ClassVar[int]
+    """The hash of the id, computed once since the ids are the keys of most lookups of the simulator. It is set on
+    each instance in __post_init__ but declared as a ClassVar, such that it is not a dataclass field (the fields of
+    the id stay its public values). It is not pickled, the hash of a string differs between interpreters."""
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, '_hash', hash((self.name, self.age)))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not PersonID:
+            return NotImplemented
+        return bool(self._hash == other._hash and self.name == other.name and self.age == other.age)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'name': self.name, 'age': self.age}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        object.__setattr__(self, 'name', state['name'])
+        object.__setattr__(self, 'age', state['age'])
+        self.__post_init__()
@@ -3,9 +3,15 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional, TYPE_CHECKING
 
-__all__ = ['IndividualInfectionState', 'InfectionModel', 'InfectionSummary', 'Risk', 'sorted_infection_summary']
+import numpy as np
+
+if TYPE_CHECKING:
+    from .population_store import PopulationStore
+
+__all__ = ['IndividualInfectionState', 'InfectionModel', 'BatchInfectionModel', 'InfectionSummary', 'Risk',
+           'sorted_infection_summary']
 
 
 class InfectionSummary(Enum):
@@ -33,6 +39,11 @@ class IndividualInfectionState:
     is_hospitalized: bool = False
     shows_symptoms: bool = False
 
+    @property
+    def label_code(self) -> int:
+        """An integer code of the model specific label of the state, -1 if the model does not label its states."""
+        return -1
+
 
 class InfectionModel(ABC):
     """Model of the spreading of the infection."""
@@ -59,6 +70,40 @@ class InfectionModel(ABC):
         """
         pass
 
+    def snapshot(self) -> Any:
+        """
+        Return a snapshot of the internal state of the infection model that can be restored later. The random number
+        generator is not part of the snapshot. Snapshots are opt-in, the default implementation raises
+        NotImplementedError.
+
+        :return: An opaque snapshot object.
+        :raises NotImplementedError: if the infection model does not support snapshots.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
+    def restore(self, snapshot: Any) -> None:
+        """
+        Restore the internal state of the infection model from a snapshot.
+
+        :param snapshot: A snapshot returned by the snapshot method of the infection model.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
     @abstractmethod
     def reset(self) -> None:
         """Reset the infection model"""
+
+
+class BatchInfectionModel(InfectionModel):
+    """An infection model that can also step the infection states of a whole population at once."""
+
+    @abstractmethod
+    def step_population(self, population_store: 'PopulationStore', ages: np.ndarray) -> None:
+        """
+        Step the infection state of every person in the population store (in the order of the slots), as step would
+        do for each person. The infection probability of each person is given by 1 - not_infection_probability.
+
+        :param population_store: PopulationStore instance that holds the states of the persons.
+        :param ages: An integer array with the age of each person in the population store.
+        """
+        pass
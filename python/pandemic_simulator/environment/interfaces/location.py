@@ -109,6 +109,24 @@ class Location(ABC, Generic[_State]):
         """Removes a person with the given ID from the location"""
         pass
 
+    def snapshot(self) -> _State:
+        """
+        Return a copy of the current state of the location that can be restored later. Snapshots are opt-in, the
+        default implementation raises NotImplementedError.
+
+        :return: A copy of the state of the location.
+        :raises NotImplementedError: if the location does not support snapshots.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
+    def restore(self, snapshot: _State) -> None:
+        """
+        Restore the state of the location from a snapshot. The snapshot is left untouched and can be restored again.
+
+        :param snapshot: A snapshot returned by the snapshot method of the location.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
     @abstractmethod
     def reset(self) -> None:
         """Reset location to its initial state."""
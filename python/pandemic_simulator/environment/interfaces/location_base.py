@@ -1,10 +1,10 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 from abc import ABCMeta
-from copy import deepcopy
+from copy import copy, deepcopy
 from typing import Optional, cast, TypeVar, Union
 from uuid import uuid4
 
-import numpy as np
+from orderedset import OrderedSet
 
 from . import globals
 from .ids import PersonID, LocationID
@@ -28,8 +28,8 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
     _init_state: _State
     _state: _State
     _registry: Registry
-    _numpy_rng: np.random.RandomState
     _current_sim_time: SimTime
+    _index: int
 
     def __init__(self, loc_id: Union[str, LocationID, None] = None, init_state: Optional[_State] = None):
         """
@@ -38,7 +38,6 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
         """
         assert globals.registry, 'No registry found. Create the repo wide registry first by calling init_globals()'
         self._registry = globals.registry
-        self._numpy_rng = globals.numpy_rng
 
         if loc_id is None:
             self._id = LocationID(type(self).__name__ + str(uuid4()))
@@ -48,11 +47,17 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
 
         self._state = deepcopy(self._init_state)
         self._registry.register_location(self)
+        self._index = self._registry.location_index(self._id)
 
     @property
     def id(self) -> LocationID:
         return self._id
 
+    @property
+    def index(self) -> int:
+        """Return the index of the location in the registry (see Registry.location_index)."""
+        return self._index
+
     @property
     def init_state(self) -> _State:
         return self._init_state
@@ -64,6 +69,12 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
     def sync(self, sim_time: SimTime) -> None:
         self._current_sim_time = sim_time
 
+    def _set_social_gathering_event(self, social_gathering_event: bool) -> None:
+        """Advertise a social gathering at the location (or stop advertising it) in the state and in the registry."""
+        if social_gathering_event != self._state.social_gathering_event:
+            self._state.social_gathering_event = social_gathering_event
+            self._registry.update_social_gathering_event(self._id)
+
     def update_rules(self, new_rule: LocationRule) -> None:
         cr = new_rule.contact_rate
         if cr is not None:
@@ -81,7 +92,7 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
 
         allow_visitor = (self._current_sim_time in self._state.visitor_time and
                          (self._state.visitor_capacity == -1 or
-                          len(self._state.visitors_in_location) < self._state.visitor_capacity))
+                          len(self._state.visitor_occupancy) < self._state.visitor_capacity))
 
         return self._state.is_open and (allow_assignee or allow_visitor)
 
@@ -90,18 +101,35 @@ class BaseLocation(Location[_State], metaclass=ABCMeta):
 
     def add_person_to_location(self, person_id: PersonID) -> None:
         if person_id in self._state.assignees:
-            self._state.assignees_in_location.add(person_id)
+            self._state.assignee_occupancy.add(person_id, self._registry.person_index(person_id))
         else:
-            self._state.visitors_in_location.add(person_id)
+            self._state.visitor_occupancy.add(person_id, self._registry.person_index(person_id))
 
     def remove_person_from_location(self, person_id: PersonID) -> None:
-        if person_id in self._state.assignees_in_location:
-            self._state.assignees_in_location.remove(person_id)
-        elif person_id in self._state.visitors_in_location:
-            self._state.visitors_in_location.remove(person_id)
+        if person_id in self._state.assignee_occupancy:
+            self._state.assignee_occupancy.remove(person_id)
+        elif person_id in self._state.visitor_occupancy:
+            self._state.visitor_occupancy.remove(person_id)
         else:
             # person is not in location
             pass
 
+    @staticmethod
+    def _copy_state(state: _State) -> _State:
+        # the other state values are immutable or replaced as a whole, only the sets of persons are updated in place
+        state_copy = copy(state)
+        state_copy.assignees = OrderedSet(state.assignees)
+        state_copy.assignee_occupancy = state.assignee_occupancy.copy()
+        state_copy.visitor_occupancy = state.visitor_occupancy.copy()
+        return state_copy
+
+    def snapshot(self) -> _State:
+        return self._copy_state(self._state)
+
+    def restore(self, snapshot: _State) -> None:
+        self._state = self._copy_state(snapshot)
+        self._registry.update_social_gathering_event(self._id)
+
     def reset(self) -> None:
         self._state = deepcopy(self._init_state)
+        self._registry.update_social_gathering_event(self._id)
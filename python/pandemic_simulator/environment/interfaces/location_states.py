@@ -7,6 +7,7 @@ from typing import Set
 from orderedset import OrderedSet
 
 from .ids import PersonID
+from .occupancy import Occupancy
 from .sim_time import SimTimeTuple
 
 __all__ = ['LocationState', 'ContactRate', 'NonEssentialBusinessLocationState',
@@ -62,15 +63,25 @@ class LocationState:
     assignees: OrderedSet = field(default_factory=OrderedSet, init=False)
     """A set of ids of persons assigned to the location. Default is an empty set where nobody is assigned."""
 
-    assignees_in_location: OrderedSet = field(default_factory=OrderedSet, init=False)
-    """A set of ids of assignes who are currently in the location. Default is an empty set."""
+    assignee_occupancy: Occupancy = field(default_factory=Occupancy, init=False)
+    """The assignees who are currently in the location, by person id and registry index. Default is empty."""
 
-    visitors_in_location: OrderedSet = field(default_factory=OrderedSet, init=False)
-    """A set of ids of visitors who are currently in the location. Default is an empty set."""
+    visitor_occupancy: Occupancy = field(default_factory=Occupancy, init=False)
+    """The visitors who are currently in the location, by person id and registry index. Default is empty."""
 
     social_gathering_event: bool = field(default=False, init=False)
     """Set to True to advertise a social gathering at the location."""
 
+    @property
+    def assignees_in_location(self) -> OrderedSet:
+        """Return a set of ids of assignees who are currently in the location (a copy of assignee_occupancy)."""
+        return OrderedSet(self.assignee_occupancy.person_ids)
+
+    @property
+    def visitors_in_location(self) -> OrderedSet:
+        """Return a set of ids of visitors who are currently in the location (a copy of visitor_occupancy)."""
+        return OrderedSet(self.visitor_occupancy.person_ids)
+
     @property
     def persons_in_location(self) -> Set[PersonID]:
         """
@@ -78,14 +89,14 @@ class LocationState:
 
         :return: ID of the persons in the location.
         """
-        persons = set(self.assignees_in_location)
-        persons.union(self.visitors_in_location)
+        persons = set(self.assignee_occupancy.person_ids)
+        persons.update(self.visitor_occupancy.person_ids)
         return persons
 
     @property
     def num_persons_in_location(self) -> int:
         """Returns the number of persons in the location."""
-        return len(self.assignees_in_location) + len(self.visitors_in_location)
+        return len(self.assignee_occupancy) + len(self.visitor_occupancy)
 
 
 @dataclass
@@ -0,0 +1,118 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from .ids import PersonID
+
+__all__ = ['Occupancy']
+
+_INITIAL_CAPACITY = 4
+
+
+class Occupancy:
+    """A set of persons currently in a location, held as a dense array of members with swap-remove.
+
+    Each member is stored as its person id and as an int (the registry index of the person, see
+    Registry.person_index), such that the contact sampling can consume the members as an array directly. A map from
+    person id to position makes membership tests, inserts and removes O(1). A remove moves the last member into the
+    freed position, so the order of the members is deterministic (it only depends on the sequence of inserts and
+    removes) but it is not the insertion order."""
+
+    _person_ids: List[PersonID]
+    _members: np.ndarray
+    _positions: Dict[PersonID, int]
+
+    def __init__(self) -> None:
+        self._person_ids = []
+        self._members = np.empty(_INITIAL_CAPACITY, dtype=np.int64)
+        self._positions = {}
+
+    @classmethod
+    def from_members(cls, person_ids: List[PersonID], members: np.ndarray) -> 'Occupancy':
+        """
+        Return an occupancy that holds the given members (at least one), in the given order.
+
+        :param person_ids: The ids of the members, without duplicates. The list is taken over, not copied.
+        :param members: The ints stored for the members, in the order of the person ids, as a non-empty int64 array.
+            The array is taken over as the storage of the members (e.g. a slice of a larger array), it is replaced when
+            more members are added.
+        :return: An Occupancy instance.
+        """
+        occupancy = cls.__new__(cls)
+        occupancy._person_ids = person_ids
+        occupancy._members = members
+        occupancy._positions = dict(zip(person_ids, range(len(person_ids))))
+        return occupancy
+
+    def add(self, person_id: PersonID, member: int) -> None:
+        """
+        Add a person, if it is not a member already.
+
+        :param person_id: PersonID instance
+        :param member: The int stored for the person in the members array, usually its registry index.
+        """
+        if person_id in self._positions:
+            return
+        position = len(self._person_ids)
+        if position == len(self._members):
+            self._members = np.concatenate((self._members, np.empty(position, dtype=np.int64)))
+        self._members[position] = member
+        self._person_ids.append(person_id)
+        self._positions[person_id] = position
+
+    def remove(self, person_id: PersonID) -> None:
+        """
+        Remove a member. The last member takes its position.
+
+        :param person_id: PersonID instance
+        :raises KeyError: if the person is not a member.
+        """
+        position = self._positions.pop(person_id)
+        last_id = self._person_ids.pop()
+        last = len(self._person_ids)
+        if position != last:
+            self._person_ids[position] = last_id
+            self._members[position] = self._members[last]
+            self._positions[last_id] = position
+
+    def clear(self) -> None:
+        """Remove all the members."""
+        self._person_ids.clear()
+        self._positions.clear()
+
+    @property
+    def person_ids(self) -> List[PersonID]:
+        """Return the ids of the members, in the order of the members array. The list is not copied, it must not be
+        modified."""
+        return self._person_ids
+
+    @property
+    def members(self) -> np.ndarray:
+        """Return the members array (a view, valid until the next insert or remove)."""
+        return self._members[:len(self._person_ids)]
+
+    def copy(self) -> 'Occupancy':
+        """Return a copy of the occupancy, with the members in the same order."""
+        occupancy_copy = Occupancy.__new__(Occupancy)
+        occupancy_copy._person_ids = list(self._person_ids)
+        occupancy_copy._members = self._members.copy()
+        occupancy_copy._positions = dict(self._positions)
+        return occupancy_copy
+
+    def __contains__(self, person_id: object) -> bool:
+        return person_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self._person_ids)
+
+    def __iter__(self) -> Iterator[PersonID]:
+        return iter(self._person_ids)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Occupancy):
+            return NotImplemented
+        return self._person_ids == other._person_ids and bool(np.array_equal(self.members, other.members))
+
+    def __repr__(self) -> str:
+        return f'Occupancy({self._person_ids})'
@@ -1,6 +1,6 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 from dataclasses import dataclass
-from typing import Sequence, Type, cast, Optional
+from typing import List, Sequence, Type, cast, Optional
 
 import numpy as np
 
@@ -45,6 +45,26 @@ class PandemicObservation:
                                                                                        num_non_essential_business))
                                    if num_non_essential_business is not None else None)
 
+    @classmethod
+    def stack(cls: Type['PandemicObservation'],
+              observations: Sequence['PandemicObservation']) -> 'PandemicObservation':
+        """
+        Stacks observations along the N axis of the TNC layout, for instance the observations of a batch of
+        environments.
+
+        :param observations: A sequence of PandemicObservation instances with the same history size.
+        :return: a PandemicObservation instance with one entry per observation in the N axis
+        """
+        unlocked = [obs.unlocked_non_essential_business_locations for obs in observations]
+        return PandemicObservation(
+            global_infection_summary=np.concatenate([obs.global_infection_summary for obs in observations], axis=1),
+            global_testing_summary=np.concatenate([obs.global_testing_summary for obs in observations], axis=1),
+            stage=np.concatenate([obs.stage for obs in observations], axis=1),
+            infection_above_threshold=np.concatenate([obs.infection_above_threshold for obs in observations], axis=1),
+            time_day=np.concatenate([obs.time_day for obs in observations], axis=1),
+            unlocked_non_essential_business_locations=(np.concatenate(cast(List[np.ndarray], unlocked), axis=1)
+                                                       if all(u is not None for u in unlocked) else None))
+
     def update_obs_with_sim_state(self, sim_state: PandemicSimState,
                                   hist_index: int = 0,
                                   business_location_ids: Optional[Sequence[LocationID]] = None) -> None:
@@ -1,13 +1,15 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Tuple
+
+import numpy as np
 
 from .pandemic_testing_result import PandemicTestResult
 from .infection_model import InfectionSummary
 from .person import PersonState
 
-__all__ = ['PandemicTesting', 'GlobalTestingState']
+__all__ = ['PandemicTesting', 'BatchPandemicTesting', 'GlobalTestingState']
 
 
 @dataclass
@@ -35,3 +37,26 @@ class PandemicTesting(ABC):
         :param person_state: Person's state
         :return: PandemicTestResult instance
         """
+
+
+class BatchPandemicTesting(PandemicTesting):
+    """A pandemic testing that can also admit and test a whole population at once."""
+
+    @abstractmethod
+    def test_population(self,
+                        infection_summary: np.ndarray,
+                        shows_symptoms: np.ndarray,
+                        is_hospitalized: np.ndarray,
+                        test_result: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Admit and test every person of a population, as admit_person and test_person would do for each person. The
+        columns are the ones of a population store.
+
+        :param infection_summary: The infection summary code of each person (see PopulationStore.summary_to_code).
+        :param shows_symptoms: A boolean array set for the persons that show symptoms.
+        :param is_hospitalized: A boolean array set for the persons that are hospitalized.
+        :param test_result: The previous test result of each person (the values of PandemicTestResult).
+        :return: A boolean array set for the admitted persons and the new test result of each person (the previous
+            test result for the persons that are not admitted).
+        """
+        pass
@@ -1,8 +1,8 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import Optional, Sequence, List, Tuple
+from dataclasses import dataclass, field, fields
+from typing import Any, ClassVar, Dict, Optional, Sequence, List, Tuple, TYPE_CHECKING
 
 from .contact_tracer import ContactTracer
 from .ids import PersonID, LocationID
@@ -10,7 +10,10 @@ from .infection_model import IndividualInfectionState, Risk
 from .pandemic_testing_result import PandemicTestResult
 from .pandemic_types import NoOP
 from .regulation import PandemicRegulation
-from .sim_time import SimTime
+from .sim_time import SimTime, SimTimeInterval
+
+if TYPE_CHECKING:
+    from .population_store import PopulationStore
 
 __all__ = ['Person', 'PersonState']
 
@@ -33,7 +36,72 @@ class PersonState:
 
     avoid_location_types: List[type] = field(default_factory=list, init=False)
     not_infection_probability: float = field(default=1., init=False)
-    not_infection_probability_history: List[Tuple[LocationID, float]] = field(default_factory=list, init=False)
+
+    # the population store (and the row in it) that holds the stored fields, if the state is bound to one
+    _store: Optional['PopulationStore'] = field(default=None, init=False, repr=False, compare=False)
+    _slot: int = field(default=-1, init=False, repr=False, compare=False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # copies (deepcopy, pickle) are detached from the population store
+        state = {name: value for name, value in self.__dict__.items() if name not in ('_store', '_slot')}
+        for name in PersonState.stored_fields:
+            state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the values of the fields of the state, except the stored fields if the state is bound to a population
+        store. The values are immutable or replaced as a whole (never updated in place), so they are not copied."""
+        names = _public_fields if self._store is None else _unstored_fields
+        return {name: getattr(self, name) for name in names}
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Set the fields of the state from a snapshot returned by the snapshot method."""
+        if self._store is None or len(snapshot) == len(_unstored_fields):
+            # the fields are instance attributes (the stored fields too, when the state is not bound to a store)
+            self.__dict__.update(snapshot)
+        else:
+            for name, value in snapshot.items():
+                setattr(self, name, value)
+
+    stored_fields: ClassVar[Tuple[str, ...]] = ('current_location', 'risk', 'infection_state',
+                                                'infection_spread_multiplier', 'test_result',
+                                                'not_infection_probability')
+    """Names of the fields that are held by the population store when the state is bound to one."""
+
+
+class _StoredField:
+    """A data descriptor that reads and writes a PersonState field from its population store row when the state is
+    bound to a store and from the instance dictionary otherwise."""
+
+    def __init__(self, name: str, default: Any):
+        self._name = name
+        self._default = default
+
+    def __get__(self, instance: Optional[PersonState], owner: type) -> Any:
+        if instance is None:
+            return self
+        store = instance._store
+        if store is None:
+            return instance.__dict__.get(self._name, self._default)
+        return store.get_value(self._name, instance._slot)
+
+    def __set__(self, instance: PersonState, value: Any) -> None:
+        store = instance._store
+        if store is None:
+            instance.__dict__[self._name] = value
+        else:
+            store.set_value(self._name, instance._slot, value)
+
+
+for _field in fields(PersonState):
+    if _field.name in PersonState.stored_fields:
+        setattr(PersonState, _field.name, _StoredField(_field.name, _field.default))
+
+_public_fields = tuple(f.name for f in fields(PersonState) if not f.name.startswith('_'))
+_unstored_fields = tuple(name for name in _public_fields if name not in PersonState.stored_fields)
 
 
 class Person(ABC):
@@ -70,6 +138,25 @@ class Person(ABC):
         """
         pass
 
+    def next_wake_time(self, sim_time: SimTime) -> Optional[SimTime]:
+        """
+        Return the next sim time at which a step of the person could change its state or location, given that the
+        person was stepped at sim_time. The default is to step the person every hour.
+
+        :param sim_time: Sim time of the last step of the person.
+        :return: The next sim time to step the person or None if only an external event (an infection update or a new
+            regulation) can change what the step of the person does.
+        """
+        return sim_time + SimTimeInterval(hour=1)
+
+    def compile_routines(self) -> None:
+        """
+        Optionally compile the routines of the person into a faster form once they are assigned, such that the cost of
+        a step does not grow with the number of routines of the person. The compilation must not change what the steps
+        of the person do. The default is a no-op.
+        """
+        pass
+
     @property
     @abstractmethod
     def id(self) -> PersonID:
@@ -109,6 +196,26 @@ class Person(ABC):
         """
         pass
 
+    def snapshot(self) -> Any:
+        """
+        Return a snapshot of the state of the person and of its policy (e.g. the status of its routines) that can be
+        restored later. If the state of the person is bound to a population store, the fields held by the store are
+        left to the snapshot of the store. Snapshots are opt-in, the default implementation raises NotImplementedError.
+
+        :return: An opaque snapshot object.
+        :raises NotImplementedError: if the person does not support snapshots.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
+    def restore(self, snapshot: Any) -> None:
+        """
+        Restore the state of the person and of its policy from a snapshot. The snapshot is left untouched and can be
+        restored again.
+
+        :param snapshot: A snapshot returned by the snapshot method of the person.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
     @abstractmethod
     def reset(self) -> None:
         """Reset person to its initial state."""
@@ -2,7 +2,7 @@
 import enum
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, Sequence, Union, Type
+from typing import Optional, Sequence, Tuple, Union, Type
 
 from .ids import LocationID
 from .location import Location
@@ -92,6 +92,14 @@ class PersonRoutineWithStatus:
 
         self.due = self._is_routine_due(sim_time, person_state)
 
+    def snapshot(self) -> Tuple[bool, bool, int, bool, Optional[LocationID]]:
+        """Return the status variables."""
+        return self.due, self.started, self.duration, self.done, self.end_loc_selected
+
+    def restore(self, snapshot: Tuple[bool, bool, int, bool, Optional[LocationID]]) -> None:
+        """Set the status variables from a snapshot returned by the snapshot method."""
+        self.due, self.started, self.duration, self.done, self.end_loc_selected = snapshot
+
     def reset(self) -> None:
         """Reset status variables"""
         self.due = False
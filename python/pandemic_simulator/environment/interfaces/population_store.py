@@ -0,0 +1,454 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ids import LocationID
+from .infection_model import IndividualInfectionState, InfectionSummary, Risk
+from .pandemic_testing_result import PandemicTestResult
+from .person import PersonState
+
+__all__ = ['PopulationStore']
+
+
+class PopulationStore:
+    """A struct-of-arrays store of the population state. Each bound PersonState is a thin view over one row (slot) of
+    contiguous numpy columns, so existing code keeps working on PersonState instances while vectorized kernels can
+    operate on whole columns."""
+
+    summary_to_code: Dict[InfectionSummary, int] = {s: i for i, s in enumerate(InfectionSummary)}
+    """Codes of the infection summaries in the infection_summary column. Persons without an infection state have the
+    code -1."""
+
+    _infectious_codes: Tuple[int, ...] = (summary_to_code[InfectionSummary.INFECTED],
+                                          summary_to_code[InfectionSummary.CRITICAL])
+
+    _row_columns: Tuple[str, ...] = ('_current_location', '_risk', '_infection_state', '_infection_summary',
+                                     '_infection_label', '_spread_probability', '_exposed_rnb', '_is_hospitalized',
+                                     '_shows_symptoms', '_infection_spread_multiplier', '_test_result',
+                                     '_not_infection_probability', '_num_exposure_runs', '_exposure_run_location',
+                                     '_exposure_run_value')
+
+    _risks: Dict[int, Risk] = {r.value: r for r in Risk}
+    _test_results: Dict[int, PandemicTestResult] = {r.value: r for r in PandemicTestResult}
+
+    _size: int
+    _states: List[PersonState]
+    _location_ids: List[LocationID]
+    _location_to_slot: Dict[LocationID, int]
+
+    # number of persons and of infectious persons in each location slot, kept up to date on moves and on infection
+    # state changes
+    _location_occupants: np.ndarray
+    _location_infectious: np.ndarray
+
+    _current_location: np.ndarray
+    _risk: np.ndarray
+    _infection_state: np.ndarray
+    _infection_summary: np.ndarray
+    _infection_label: np.ndarray
+    _spread_probability: np.ndarray
+    _exposed_rnb: np.ndarray
+    _is_hospitalized: np.ndarray
+    _shows_symptoms: np.ndarray
+    _infection_spread_multiplier: np.ndarray
+    _test_result: np.ndarray
+    _not_infection_probability: np.ndarray
+
+    # exposure record: the location slot and the not_infection_probability at the end of each run of exposures at the
+    # same location since the last clear_exposures
+    _num_exposure_runs: np.ndarray
+    _exposure_run_location: np.ndarray
+    _exposure_run_value: np.ndarray
+
+    def __init__(self, location_ids: Optional[Sequence[LocationID]] = None, capacity: int = 16):
+        """
+        :param location_ids: Optional sequence of location ids to intern first, such that their slots follow the
+            order of the sequence. Other locations are interned when persons enter them.
+        :param capacity: Initial number of rows of the columns.
+        """
+        self._size = 0
+        self._states = []
+        self._location_ids = []
+        self._location_to_slot = {}
+        self._location_occupants = np.zeros(max(len(location_ids or []), 1), dtype=np.int64)
+        self._location_infectious = np.zeros(max(len(location_ids or []), 1), dtype=np.int64)
+        for location_id in location_ids or []:
+            self.location_slot(location_id)
+
+        capacity = max(capacity, 1)
+        self._current_location = np.full(capacity, -1, dtype=np.int32)
+        self._risk = np.zeros(capacity, dtype=np.int8)
+        self._infection_state = np.full(capacity, None, dtype=object)
+        self._infection_summary = np.full(capacity, -1, dtype=np.int8)
+        self._infection_label = np.full(capacity, -1, dtype=np.int8)
+        self._spread_probability = np.zeros(capacity, dtype=np.float64)
+        self._exposed_rnb = np.full(capacity, -1., dtype=np.float64)
+        self._is_hospitalized = np.zeros(capacity, dtype=bool)
+        self._shows_symptoms = np.zeros(capacity, dtype=bool)
+        self._infection_spread_multiplier = np.ones(capacity, dtype=np.float64)
+        self._test_result = np.zeros(capacity, dtype=np.int8)
+        self._not_infection_probability = np.ones(capacity, dtype=np.float64)
+
+        self._num_exposure_runs = np.zeros(capacity, dtype=np.int32)
+        self._exposure_run_location = np.zeros((capacity, 4), dtype=np.int32)
+        self._exposure_run_value = np.ones((capacity, 4), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # the person states of a copy (deepcopy, pickle) of the store are detached copies (see PersonState.__getstate__)
+        # that hold the same values as the copied rows, bind them again to the rows
+        self.__dict__.update(state)
+        for slot, person_state in enumerate(self._states):
+            for name in PersonState.stored_fields:
+                person_state.__dict__.pop(name, None)
+            person_state._store = self
+            person_state._slot = slot
+
+    def _grow(self, capacity: int) -> None:
+        for name in self._row_columns:
+            column = getattr(self, name)
+            new_column = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            new_column[:len(column)] = column
+            setattr(self, name, new_column)
+
+    def bind(self, state: PersonState) -> int:
+        """
+        Move the stored fields of the given state into a new row of the store and make the state a view over it.
+
+        :param state: An unbound PersonState instance.
+        :return: The slot of the state in the store.
+        """
+        assert state._store is None, 'The person state is already bound to a population store.'
+        if self._size == len(self._current_location):
+            self._grow(2 * self._size)
+
+        slot = self._size
+        self._current_location[slot] = -1
+        self._infection_summary[slot] = -1
+        values = {name: getattr(state, name) for name in PersonState.stored_fields}
+        for name in PersonState.stored_fields:
+            state.__dict__.pop(name, None)
+        state._store = self
+        state._slot = slot
+        self._states.append(state)
+        self._size += 1
+
+        for name, value in values.items():
+            self.set_value(name, slot, value)
+        self._num_exposure_runs[slot] = 0
+        return slot
+
+    def bind_all(self, states: Sequence[PersonState]) -> None:
+        """
+        Bind a sequence of person states in order.
+
+        :param states: A sequence of unbound PersonState instances.
+        """
+        if self._size + len(states) > len(self._current_location):
+            self._grow(self._size + len(states))
+        for state in states:
+            self.bind(state)
+
+    def clear(self) -> None:
+        """Detach all bound person states (they keep their current values) and empty the store."""
+        for state in self._states:
+            values = {name: getattr(state, name) for name in PersonState.stored_fields}
+            state._store = None
+            state._slot = -1
+            state.__dict__.update(values)
+        self._states = []
+        self._size = 0
+        self._location_occupants[:] = 0
+        self._location_infectious[:] = 0
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Return a copy of the rows of the bound person states and of the location counts, that can be restored later.
+        The infection states are immutable and are shared with the snapshot.
+
+        :return: A mapping from the column names to the column copies.
+        """
+        snapshot = {name: getattr(self, name)[:self._size].copy() for name in self._row_columns}
+        num_locations = len(self._location_ids)
+        snapshot['_location_occupants'] = self._location_occupants[:num_locations].copy()
+        snapshot['_location_infectious'] = self._location_infectious[:num_locations].copy()
+        return snapshot
+
+    def restore(self, snapshot: Dict[str, np.ndarray]) -> None:
+        """
+        Restore the rows and the location counts from a snapshot. The same person states must be bound in the same
+        slots as when the snapshot was taken (they can be bound again after a clear). The locations that were interned
+        after the snapshot are dropped. The snapshot is left untouched and can be restored again.
+
+        :param snapshot: A snapshot returned by the snapshot method.
+        """
+        assert len(snapshot['_current_location']) == self._size, 'The number of bound person states changed.'
+        for name in self._row_columns:
+            column = getattr(self, name)
+            column_snapshot = snapshot[name]
+            if column.shape[1:] != column_snapshot.shape[1:]:
+                # the exposure record was widened after the snapshot
+                column = np.empty((len(column),) + column_snapshot.shape[1:], dtype=column.dtype)
+                setattr(self, name, column)
+            column[:self._size] = column_snapshot
+
+        num_locations = len(snapshot['_location_occupants'])
+        for location_id in self._location_ids[num_locations:]:
+            del self._location_to_slot[location_id]
+        del self._location_ids[num_locations:]
+        for name in ('_location_occupants', '_location_infectious'):
+            column = getattr(self, name)
+            column[:num_locations] = snapshot[name]
+            column[num_locations:] = 0
+
+    def location_slot(self, location_id: LocationID) -> int:
+        """
+        Return the slot of the given location id in the current_location column, interning it if required.
+
+        :param location_id: LocationID instance
+        :return: slot of the location id
+        """
+        slot = self._location_to_slot.get(location_id)
+        if slot is None:
+            slot = len(self._location_ids)
+            self._location_to_slot[location_id] = slot
+            self._location_ids.append(location_id)
+            if slot == len(self._location_occupants):
+                self._location_occupants = np.concatenate([self._location_occupants,
+                                                           np.zeros_like(self._location_occupants)])
+                self._location_infectious = np.concatenate([self._location_infectious,
+                                                            np.zeros_like(self._location_infectious)])
+        return slot
+
+    def get_value(self, name: str, slot: int) -> Any:
+        """
+        Return the value of a stored PersonState field.
+
+        :param name: Name of the PersonState field.
+        :param slot: Slot of the person state.
+        :return: The field value.
+        """
+        if name == 'current_location':
+            return self._location_ids[self._current_location[slot]]
+        elif name == 'infection_state':
+            return self._infection_state[slot]
+        elif name == 'not_infection_probability':
+            return float(self._not_infection_probability[slot])
+        elif name == 'test_result':
+            return self._test_results[self._test_result[slot]]
+        elif name == 'risk':
+            return self._risks[self._risk[slot]]
+        elif name == 'infection_spread_multiplier':
+            return float(self._infection_spread_multiplier[slot])
+        raise ValueError(f'{name} is not a stored field.')
+
+    def set_value(self, name: str, slot: int, value: Any) -> None:
+        """
+        Set the value of a stored PersonState field.
+
+        :param name: Name of the PersonState field.
+        :param slot: Slot of the person state.
+        :param value: The field value.
+        """
+        if name == 'current_location':
+            self._set_current_location(slot, self.location_slot(value))
+        elif name == 'infection_state':
+            self._set_infection_state(slot, value)
+        elif name == 'not_infection_probability':
+            self._not_infection_probability[slot] = value
+        elif name == 'test_result':
+            self._test_result[slot] = value.value
+        elif name == 'risk':
+            self._risk[slot] = value.value
+        elif name == 'infection_spread_multiplier':
+            self._infection_spread_multiplier[slot] = value
+        else:
+            raise ValueError(f'{name} is not a stored field.')
+
+    def _set_current_location(self, slot: int, location_slot: int) -> None:
+        previous_location_slot = self._current_location[slot]
+        if previous_location_slot == location_slot:
+            return
+        infectious = self._infection_summary[slot] in self._infectious_codes
+        if previous_location_slot != -1:
+            self._location_occupants[previous_location_slot] -= 1
+            self._location_infectious[previous_location_slot] -= infectious
+        self._location_occupants[location_slot] += 1
+        self._location_infectious[location_slot] += infectious
+        self._current_location[slot] = location_slot
+
+    def _set_infection_state(self, slot: int, infection_state: Optional[IndividualInfectionState]) -> None:
+        was_infectious = self._infection_summary[slot] in self._infectious_codes
+        self._infection_state[slot] = infection_state
+        if infection_state is None:
+            self._infection_summary[slot] = -1
+            self._infection_label[slot] = -1
+            self._spread_probability[slot] = 0.
+            self._exposed_rnb[slot] = -1.
+            self._is_hospitalized[slot] = False
+            self._shows_symptoms[slot] = False
+        else:
+            self._infection_summary[slot] = self.summary_to_code[infection_state.summary]
+            self._infection_label[slot] = infection_state.label_code
+            self._spread_probability[slot] = infection_state.spread_probability
+            self._exposed_rnb[slot] = infection_state.exposed_rnb
+            self._is_hospitalized[slot] = infection_state.is_hospitalized
+            self._shows_symptoms[slot] = infection_state.shows_symptoms
+
+        is_infectious = self._infection_summary[slot] in self._infectious_codes
+        location_slot = self._current_location[slot]
+        if location_slot != -1 and is_infectious != was_infectious:
+            self._location_infectious[location_slot] += 1 if is_infectious else -1
+
+    def set_infection_states(self, slots: Sequence[int], infection_states: Sequence[IndividualInfectionState]) -> None:
+        """
+        Set the infection state of many persons at once.
+
+        :param slots: Slots of the person states.
+        :param infection_states: The new infection state of each slot.
+        """
+        for slot, infection_state in zip(slots, infection_states):
+            self._set_infection_state(slot, infection_state)
+
+    def record_exposures(self, slots: np.ndarray) -> None:
+        """
+        Record the exposures of the given persons at their current location, after their not_infection_probability was
+        updated. The record keeps one entry per run of exposures at the same location, so its size does not grow with
+        the number of contacts.
+
+        :param slots: An integer array of the slots of the exposed persons (may contain repeated slots).
+        """
+        slots = np.unique(slots)
+        locations = self._current_location[slots]
+        values = self._not_infection_probability[slots]
+        num_runs = self._num_exposure_runs[slots]
+
+        # extend the last run of the persons that are still in the same location
+        last_run = np.maximum(num_runs - 1, 0)
+        same_location = (num_runs > 0) & (self._exposure_run_location[slots, last_run] == locations)
+        self._exposure_run_value[slots[same_location], last_run[same_location]] = values[same_location]
+
+        # start a new run for the others
+        new_run = ~same_location
+        if np.any(new_run):
+            max_runs = self._exposure_run_location.shape[1]
+            if num_runs[new_run].max() == max_runs:
+                for name in ('_exposure_run_location', '_exposure_run_value'):
+                    column = getattr(self, name)
+                    setattr(self, name, np.concatenate([column, np.empty_like(column)], axis=1))
+            self._exposure_run_location[slots[new_run], num_runs[new_run]] = locations[new_run]
+            self._exposure_run_value[slots[new_run], num_runs[new_run]] = values[new_run]
+            self._num_exposure_runs[slots[new_run]] += 1
+
+    def exposure_locations(self, slots: np.ndarray, exposed_rnb: np.ndarray) -> np.ndarray:
+        """
+        Return the location slot of the exposure that infected each of the given persons: the first recorded exposure
+        after which the infection probability (1 - not_infection_probability) exceeded the exposed random number.
+
+        :param slots: An integer array of the slots of the infected persons.
+        :param exposed_rnb: The random number that was drawn for the infection of each person.
+        :return: An integer array of location slots (see location_ids).
+        """
+        max_runs = self._exposure_run_location.shape[1]
+        recorded = np.arange(max_runs) < self._num_exposure_runs[slots, None]
+        # the values past the recorded runs are not initialized
+        values = np.where(recorded, self._exposure_run_value[slots], 1.)
+        crossed = recorded & (exposed_rnb[:, None] < 1 - values)
+        locations: np.ndarray = self._exposure_run_location[slots, np.argmax(crossed, axis=1)]
+        return locations
+
+    def clear_exposures(self) -> None:
+        """Clear the exposure record of all persons."""
+        self._num_exposure_runs[:] = 0
+
+    @property
+    def states(self) -> Sequence[PersonState]:
+        """The bound person states in the order of their slots."""
+        return self._states
+
+    @property
+    def location_ids(self) -> Sequence[LocationID]:
+        """The interned location ids in the order of their slots."""
+        return self._location_ids
+
+    @property
+    def location_occupants(self) -> np.ndarray:
+        """Number of persons in each location slot (see location_ids). This column is derived from current_location
+        and must not be written directly."""
+        return self._location_occupants[:len(self._location_ids)]
+
+    @property
+    def location_infectious(self) -> np.ndarray:
+        """Number of infectious (infected or critical) persons in each location slot (see location_ids). This column is
+        derived from current_location and infection_state and must not be written directly."""
+        return self._location_infectious[:len(self._location_ids)]
+
+    @property
+    def current_location(self) -> np.ndarray:
+        """Location slots (see location_ids) of the current location of each person."""
+        return self._current_location[:self._size]
+
+    @property
+    def risk(self) -> np.ndarray:
+        """Risk values of each person."""
+        return self._risk[:self._size]
+
+    @property
+    def infection_state(self) -> np.ndarray:
+        """Infection state (IndividualInfectionState or None) of each person."""
+        return self._infection_state[:self._size]
+
+    @property
+    def infection_summary(self) -> np.ndarray:
+        """Infection summary codes (see summary_to_code) of each person. This column is derived from infection_state
+        and must not be written directly."""
+        return self._infection_summary[:self._size]
+
+    @property
+    def infection_label(self) -> np.ndarray:
+        """Model specific label codes (see IndividualInfectionState.label_code) of the infection state of each person.
+        This column is derived from infection_state and must not be written directly."""
+        return self._infection_label[:self._size]
+
+    @property
+    def spread_probability(self) -> np.ndarray:
+        """Spread probability of the infection state of each person (0 when there is no infection state). This column
+        is derived from infection_state and must not be written directly."""
+        return self._spread_probability[:self._size]
+
+    @property
+    def exposed_rnb(self) -> np.ndarray:
+        """Exposed random number of the infection state of each person (-1 when there is no infection state). This
+        column is derived from infection_state and must not be written directly."""
+        return self._exposed_rnb[:self._size]
+
+    @property
+    def is_hospitalized(self) -> np.ndarray:
+        """Whether the infection state of each person is hospitalized. This column is derived from infection_state and
+        must not be written directly."""
+        return self._is_hospitalized[:self._size]
+
+    @property
+    def shows_symptoms(self) -> np.ndarray:
+        """Whether the infection state of each person shows symptoms. This column is derived from infection_state and
+        must not be written directly."""
+        return self._shows_symptoms[:self._size]
+
+    @property
+    def infection_spread_multiplier(self) -> np.ndarray:
+        """Infection spread multiplier of each person."""
+        return self._infection_spread_multiplier[:self._size]
+
+    @property
+    def test_result(self) -> np.ndarray:
+        """PandemicTestResult values of each person."""
+        return self._test_result[:self._size]
+
+    @property
+    def not_infection_probability(self) -> np.ndarray:
+        """Probability of each person of not getting infected since the last infection update."""
+        return self._not_infection_probability[:self._size]
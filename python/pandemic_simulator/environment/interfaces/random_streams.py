@@ -0,0 +1,212 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar, Union, cast
+
+import numpy as np
+
+__all__ = ['BufferedRandom', 'RandomStreams']
+
+_T = TypeVar('_T')
+
+
+class BufferedRandom:
+    """A random source for the scalar draws of the hot loops. Uniforms and normals are drawn from a numpy Generator in
+    blocks and handed out one by one from a python list, which is several times cheaper than a scalar call into the
+    generator. The values are the ones the generator would return one at a time, in the same order (e.g. random()
+    returns the same sequence as Generator.random()), but the generator itself runs ahead of the handed out values."""
+
+    _generator: np.random.Generator
+    _block_size: int
+    _uniforms: List[float]
+    _normals: List[float]
+
+    def __init__(self, generator: np.random.Generator, block_size: int = 4096):
+        """
+        :param generator: The numpy Generator that fills the blocks. It should not be used elsewhere.
+        :param block_size: Number of values drawn at once.
+        """
+        self._generator = generator
+        self._block_size = block_size
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop the buffered values (e.g. after the generator was reseeded)."""
+        # the blocks are stored reversed, so that the next value is popped from the end of the list
+        self._uniforms = []
+        self._normals = []
+
+    @property
+    def generator(self) -> np.random.Generator:
+        return self._generator
+
+    def random(self, size: Optional[int] = None) -> Any:
+        """
+        Draw uniforms in [0, 1).
+
+        :param size: Number of values. If None, a single float is returned.
+        :return: A float or an array of floats.
+        """
+        if size is None:
+            try:
+                return self._uniforms.pop()
+            except IndexError:
+                self._uniforms = self._generator.random(self._block_size)[::-1].tolist()
+                return self._uniforms.pop()
+
+        # array draws take the buffered values first and the rest directly from the generator
+        num_buffered = min(size, len(self._uniforms))
+        values = np.empty(size)
+        values[:num_buffered] = self._uniforms[len(self._uniforms) - num_buffered:][::-1]
+        del self._uniforms[len(self._uniforms) - num_buffered:]
+        values[num_buffered:] = self._generator.random(size - num_buffered)
+        return values
+
+    def uniform(self, low: float = 0., high: float = 1.) -> float:
+        """Draw a uniform in [low, high)."""
+        return low + (high - low) * cast(float, self.random())
+
+    def normal(self, loc: float = 0., scale: float = 1.) -> float:
+        """Draw a gaussian value."""
+        try:
+            value = self._normals.pop()
+        except IndexError:
+            self._normals = self._generator.standard_normal(self._block_size)[::-1].tolist()
+            value = self._normals.pop()
+        return loc + scale * value
+
+    def integers(self, low: int, high: int) -> int:
+        """
+        Draw an integer in [low, high) from a buffered uniform. The bias of the rounding is below 2 ** -53 per value
+        of the range, which is negligible for the small ranges of the simulator.
+        """
+        return low + int(cast(float, self.random()) * (high - low))
+
+    def choice(self, options: Sequence[_T], p: Optional[Union[Sequence[float], np.ndarray]] = None) -> _T:
+        """
+        Draw one of the options from a buffered uniform.
+
+        :param options: A sequence of options.
+        :param p: Optional probability of each option (default is uniform). The draw follows numpy's choice: the
+            number of values of the normalized cdf that are not above the uniform.
+        :return: An option.
+        """
+        if p is None:
+            return options[self.integers(0, len(options))]
+        cdf = np.cumsum(p)
+        cdf /= cdf[-1]
+        return options[int(np.searchsorted(cdf, self.random(), side='right'))]
+
+    def permutation(self, n: int) -> np.ndarray:
+        """Return a random permutation of range(n), drawn directly from the generator."""
+        return self._generator.permutation(n)
+
+    def get_state(self) -> Tuple[Any, List[float], List[float]]:
+        return self._generator.bit_generator.state, list(self._uniforms), list(self._normals)
+
+    def set_state(self, state: Tuple[Any, List[float], List[float]]) -> None:
+        bit_generator_state, uniforms, normals = state
+        self._generator.bit_generator.state = bit_generator_state
+        self._uniforms = list(uniforms)
+        self._normals = list(normals)
+
+
+class RandomStreams:
+    """Independent random number streams of the simulator, one numpy Generator per subsystem (e.g. 'persons',
+    'contacts', 'infection', 'testing'). The seed sequence of a stream is derived from the root seed and the name of the
+    stream, so the draws of a subsystem do not depend on the draws of the other subsystems or on the order in which the
+    streams are created. Substreams (e.g. one per shard of a parallel kernel) are spawned from the seed sequence of a
+    stream. The streams of scalar draws are consumed through a BufferedRandom source (see buffered) and the streams of
+    array draws directly through their generator (see stream), a stream should not be consumed both ways."""
+
+    _root: np.random.SeedSequence
+    _seed_sequences: Dict[str, np.random.SeedSequence]
+    _streams: Dict[str, np.random.Generator]
+    _buffered: Dict[str, BufferedRandom]
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        :param seed: Root seed of the streams. If None, fresh entropy is drawn from the OS.
+        """
+        self._seed_sequences = {}
+        self._streams = {}
+        self._buffered = {}
+        self.seed(seed)
+
+    def _make_seed_sequence(self, name: str, n_children_spawned: int = 0) -> np.random.SeedSequence:
+        # crc32 is stable across processes, unlike the hash of a string
+        return np.random.SeedSequence(self._root.entropy, spawn_key=(zlib.crc32(name.encode()),),
+                                      n_children_spawned=n_children_spawned)
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        """
+        Reseed all the streams. The streams are reseeded in place, so the generators handed out by the stream method
+        remain valid.
+
+        :param seed: Root seed of the streams. If None, fresh entropy is drawn from the OS.
+        """
+        self._root = np.random.SeedSequence(seed)
+        for name, generator in self._streams.items():
+            seed_sequence = self._seed_sequences[name] = self._make_seed_sequence(name)
+            generator.bit_generator.state = np.random.PCG64(seed_sequence).state
+        for buffered in self._buffered.values():
+            buffered.clear()
+
+    def stream(self, name: str) -> np.random.Generator:
+        """
+        Return the generator of a stream, created on first use.
+
+        :param name: Name of the stream.
+        :return: A numpy Generator.
+        """
+        generator = self._streams.get(name)
+        if generator is None:
+            seed_sequence = self._seed_sequences[name] = self._make_seed_sequence(name)
+            generator = self._streams[name] = np.random.Generator(np.random.PCG64(seed_sequence))
+        return generator
+
+    def buffered(self, name: str) -> BufferedRandom:
+        """
+        Return the buffered random source of a stream, created on first use.
+
+        :param name: Name of the stream.
+        :return: A BufferedRandom instance.
+        """
+        buffered = self._buffered.get(name)
+        if buffered is None:
+            buffered = self._buffered[name] = BufferedRandom(self.stream(name))
+        return buffered
+
+    def spawn(self, name: str, num_substreams: int) -> List[np.random.SeedSequence]:
+        """
+        Spawn new substreams of a stream. Successive calls spawn different substreams.
+
+        :param name: Name of the stream.
+        :param num_substreams: Number of substreams.
+        :return: The seed sequence of each substream (e.g. to be sent to a worker process and turned into a generator
+            with numpy.random.default_rng).
+        """
+        self.stream(name)
+        return cast(List[np.random.SeedSequence], self._seed_sequences[name].spawn(num_substreams))
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        :return: The state of the streams, a picklable dict that can be given to set_state.
+        """
+        return dict(entropy=self._root.entropy,
+                    streams={name: (generator.bit_generator.state, self._seed_sequences[name].n_children_spawned)
+                             for name, generator in self._streams.items()},
+                    buffered={name: buffered.get_state() for name, buffered in self._buffered.items()})
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Set the state of the streams to a state returned by get_state.
+
+        :param state: State of the streams.
+        """
+        self._root = np.random.SeedSequence(state['entropy'])
+        for name, (bit_generator_state, n_children_spawned) in state['streams'].items():
+            generator = self.stream(name)
+            generator.bit_generator.state = bit_generator_state
+            self._seed_sequences[name] = self._make_seed_sequence(name, n_children_spawned)
+        for name, buffered_state in state['buffered'].items():
+            self.buffered(name).set_state(buffered_state)
@@ -1,7 +1,7 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Set, Mapping, Tuple, Union
+from typing import Any, List, Optional, Sequence, Set, Mapping, Tuple, Union
 
 from .ids import LocationID, PersonID
 from .infection_model import InfectionSummary
@@ -51,10 +51,38 @@ class Registry(ABC):
     def update_location_specific_information(self) -> None:
         """update any location specific information that is accessed by person."""
 
+    @abstractmethod
+    def update_social_gathering_event(self, location_id: LocationID) -> None:
+        """
+        Update the social events of the registry after the social_gathering_event flag or the persons of a location
+        were changed by the location itself (e.g. in sync, restore or reset).
+
+        :param location_id: LocationID instance
+        """
+
     @abstractmethod
     def reassign_locations(self, person: Person) -> None:
         """Re-assign locations for the given person."""
 
+    def snapshot(self) -> Any:
+        """
+        Return a snapshot of the run time information of the registry (quarantined persons, location summaries, etc.)
+        that can be restored later. Snapshots are opt-in, the default implementation raises NotImplementedError.
+
+        :return: An opaque snapshot object.
+        :raises NotImplementedError: if the registry does not support snapshots.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
+    def restore(self, snapshot: Any) -> None:
+        """
+        Restore the run time information of the registry from a snapshot. The snapshot is left untouched and can be
+        restored again.
+
+        :param snapshot: A snapshot returned by the snapshot method of the registry.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support snapshots')
+
     # ----------------public attributes-----------------
 
     @property
@@ -74,6 +102,15 @@ class Registry(ABC):
     def location_ids_with_social_events(self) -> List[LocationID]:
         """Return a list of location ids where there are active social events."""
 
+    @abstractmethod
+    def location_ids_with_social_events_below(self, gathering_size: int) -> Sequence[LocationID]:
+        """
+        Return the ids of the locations with an active social event that hold fewer than gathering_size persons.
+
+        :param gathering_size: The number of persons in the location to stay below.
+        :return: A sequence of location ids, ordered by number of persons.
+        """
+
     @property
     @abstractmethod
     def global_location_summary(self) -> Mapping[Tuple[str, str], LocationSummary]:
@@ -88,6 +125,36 @@ class Registry(ABC):
 
     # ----------------location utility methods-----------------
 
+    @abstractmethod
+    def person_index(self, person_id: PersonID) -> int:
+        """
+        Return the index of a registered person. The persons are indexed densely (0, 1, ...) in registration order,
+        such that hot paths can address arrays over the persons with ints instead of hashing person ids.
+
+        :param person_id: PersonID instance
+        :return: Index of the person.
+        """
+
+    @abstractmethod
+    def location_index(self, location_id: LocationID) -> int:
+        """
+        Return the index of a registered location. The locations are indexed densely (0, 1, ...) in registration
+        order.
+
+        :param location_id: LocationID instance
+        :return: Index of the location.
+        """
+
+    @property
+    @abstractmethod
+    def person_ids_by_index(self) -> Sequence[PersonID]:
+        """Return the registered person ids, the id of the person of index i is at position i."""
+
+    @property
+    @abstractmethod
+    def location_ids_by_index(self) -> Sequence[LocationID]:
+        """Return the registered location ids, the id of the location of index i is at position i."""
+
     @abstractmethod
     def location_ids_of_type(self, location_type: Union[type, Tuple[type, ...]]) -> Tuple[LocationID, ...]:
         """Return a tuple of location ids for the given type of location."""
@@ -136,3 +203,12 @@ class Registry(ABC):
     @abstractmethod
     def get_person_quarantined_state(self, person_id: PersonID) -> bool:
         """Return person's quarantined state."""
+
+    @abstractmethod
+    def is_household_quarantined(self, person_id: PersonID) -> bool:
+        """
+        Return True if a person living in the same home as the given person (including the person) is quarantined.
+
+        :param person_id: PersonID instance
+        :return: True if a member of the household of the person is quarantined.
+        """
@@ -1,10 +1,45 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional, Type, Union
+from typing import Any, Dict, List, Tuple, Optional, Type, Union
 
 __all__ = ['SimTime', 'SimTimeInterval', 'SimTimeTuple']
 
 
+class _TriggerTable:
+    """The distinct (period, offset) pairs of the sim time intervals, in hours. Which pairs fire is computed for all
+    the pairs at once, the first time a sim hour is looked up, such that the many intervals that share a pair (e.g. the
+    routine triggers of all the persons) only look up a precomputed flag."""
+
+    _ids: Dict[Tuple[int, int], int]
+    _pairs: List[Tuple[int, int]]
+    _hours: int
+    _fired: bytes
+
+    def __init__(self) -> None:
+        self._ids = {}
+        self._pairs = []
+        self._hours = -1
+        self._fired = b''
+
+    def register(self, period: int, offset: int) -> int:
+        """Return the index of the (period, offset) pair in the table, registering it on first use."""
+        trigger_id = self._ids.get((period, offset))
+        if trigger_id is None:
+            trigger_id = self._ids[(period, offset)] = len(self._pairs)
+            self._pairs.append((period, offset))
+            self._hours = -1
+        return trigger_id
+
+    def update(self, sim_hours: int) -> None:
+        """Compute the flags of all the pairs for the given sim time (in hours)."""
+        self._fired = bytes(int(sim_hours >= offset and (sim_hours - offset) % period == 0)
+                            for period, offset in self._pairs)
+        self._hours = sim_hours
+
+
+_trigger_table = _TriggerTable()
+
+
 @dataclass(frozen=True)
 class SimTime:
     hour: int = 0
@@ -12,10 +47,14 @@ class SimTime:
     day: int = 0
     year: int = 0
 
+    _hours: int = field(init=False, repr=False, compare=False)
+    """The sim time in hours (see in_hours), kept up to date by step."""
+
     def __post_init__(self) -> None:
         assert self.hour in range(0, 24), 'hour must be in (0, 23)'
         assert self.week_day in range(0, 7), 'Weekday must be in (0, 6)'
         assert self.day in range(0, 365), 'day must be in (0, 364)'
+        object.__setattr__(self, '_hours', self.year * 365 * 24 + self.day * 24 + self.hour)
 
     def now(self, frmt: str = 'ydwh') -> List[int]:
         """Returns current time as list of ints in the specified format"""
@@ -42,9 +81,10 @@ class SimTime:
         object.__setattr__(self, 'week_day', w)
         object.__setattr__(self, 'day', d)
         object.__setattr__(self, 'year', y)
+        object.__setattr__(self, '_hours', self._hours + 1)
 
     def in_hours(self) -> int:
-        return self.year * 365 * 24 + self.day * 24 + self.hour
+        return self._hours
 
     @classmethod
     def from_hours(cls: Type, hours: int) -> 'SimTime':
@@ -81,28 +121,89 @@ class SimTimeInterval:
     _trigger_hr: int = field(init=False)
     _offset_hr: int = field(init=False)
 
+    _trigger_id: int = field(init=False, repr=False, compare=False)
+    """Index of the (period, offset) pair of the interval in the trigger table. The index is local to the process, it
+    is registered again when the interval is unpickled."""
+
     def __post_init__(self) -> None:
         assert self.hour in range(24), 'Set a value in [1, 23] for an interval in hours'
         assert self.day in range(365), 'Set a value in [1, 365] for an interval in days'
         assert self.hour + self.day + self.year > 0, 'Provide a non-zero value at least for either of hour/day/year'
         object.__setattr__(self, '_trigger_hr', self.in_hours())
         object.__setattr__(self, '_offset_hr', self.offset_day * 24 + self.offset_hour)
+        object.__setattr__(self, '_trigger_id', _trigger_table.register(self._trigger_hr, self._offset_hr))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state['_trigger_id']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        object.__setattr__(self, '_trigger_id', _trigger_table.register(self._trigger_hr, self._offset_hr))
 
     def trigger_at_interval(self, sim_time: SimTime) -> bool:
         """Return True at sim time interval and False otherwise."""
-        sim_hr = sim_time.year * 365 * 24 + sim_time.day * 24 + sim_time.hour
-        return (sim_hr - self._offset_hr) % self._trigger_hr == 0 if sim_hr >= self._offset_hr else False
+        table = _trigger_table
+        if table._hours != sim_time._hours:
+            table.update(sim_time._hours)
+        return table._fired[self._trigger_id] == 1
+
+    def trigger_at_hours(self, sim_hours: int) -> bool:
+        """Return True at sim time interval and False otherwise, for a sim time given in hours (see
+        SimTime.in_hours)."""
+        table = _trigger_table
+        if table._hours != sim_hours:
+            table.update(sim_hours)
+        return table._fired[self._trigger_id] == 1
+
+    def next_trigger_hours(self, sim_hours: int) -> int:
+        """Return the first sim time (in hours) at or after the given sim time (in hours) at which the interval
+        triggers."""
+        if sim_hours <= self._offset_hr:
+            return self._offset_hr
+        return sim_hours + (self._offset_hr - sim_hours) % self._trigger_hr
 
     def in_hours(self) -> int:
         return self.year * 365 * 24 + self.day * 24 + self.hour
 
 
+_TimeKey = Tuple[Optional[Tuple[int, ...]], Optional[Tuple[int, ...]], Optional[Tuple[int, ...]]]
+
+# the masks of the sim time tuples, interned such that the tuples that share a schedule share their masks
+_compiled_masks: Dict[_TimeKey, Tuple[bytes, bytes]] = {}
+
+
+def _compile_masks(hours: Optional[Tuple[int, ...]],
+                   week_days: Optional[Tuple[int, ...]],
+                   days: Optional[Tuple[int, ...]]) -> Tuple[bytes, bytes]:
+    key = (None if hours is None else tuple(int(h) for h in hours),
+           None if week_days is None else tuple(int(wd) for wd in week_days),
+           None if days is None else tuple(int(d) for d in days))
+    masks = _compiled_masks.get(key)
+    if masks is None:
+        hour_set = set(range(24)) if key[0] is None else set(key[0])
+        week_day_set = set(range(7)) if key[1] is None else set(key[1])
+        day_set = set(range(365)) if key[2] is None else set(key[2])
+        # one byte per hour of the week and per day of the year (a bytes lookup is cheaper than a shift of a large int)
+        week_mask = bytes(int(wd in week_day_set and h in hour_set) for wd in range(7) for h in range(24))
+        day_mask = bytes(int(d in day_set) for d in range(365))
+        masks = _compiled_masks[key] = (week_mask, day_mask)
+    return masks
+
+
 @dataclass(frozen=True)
 class SimTimeTuple:
     hours: Optional[Tuple[int, ...]] = None
     week_days: Optional[Tuple[int, ...]] = None
     days: Optional[Tuple[int, ...]] = None
 
+    _week_mask: bytes = field(init=False, repr=False, compare=False)
+    """Byte week_day * 24 + hour is 1 for the hours of the week that are contained in the tuple, 0 otherwise."""
+
+    _day_mask: bytes = field(init=False, repr=False, compare=False)
+    """Byte day is 1 for the days of the year that are contained in the tuple, 0 otherwise."""
+
     def __post_init__(self) -> None:
         if self.hours:
             for hour in self.hours:
@@ -113,22 +214,15 @@ class SimTimeTuple:
         if self.days:
             for d in self.days:
                 assert d in range(0, 365), 'day must be in (0, 364)'
+        week_mask, day_mask = _compile_masks(self.hours, self.week_days, self.days)
+        object.__setattr__(self, '_week_mask', week_mask)
+        object.__setattr__(self, '_day_mask', day_mask)
 
     def __contains__(self, item: SimTime) -> bool:
-        contains = True
-        if self.hours is not None:
-            contains = contains and (item.hour in self.hours)
-            if not contains:
-                return False
-
-        if self.week_days is not None:
-            contains = contains and (item.week_day in self.week_days)
-            if not contains:
-                return False
-
-        if self.days is not None:
-            contains = contains and (item.day in self.days)
-            if not contains:
-                return False
-
-        return True
+        return (self._week_mask[item.week_day * 24 + item.hour] & self._day_mask[item.day]) == 1
+
+    def contains_hours(self, sim_hours: int) -> bool:
+        """Return True if the sim time given in hours (see SimTime.in_hours) is contained in the tuple. The week day is
+        counted from hour 0 as in SimTime.step, it is not reset at the start of a year."""
+        days = sim_hours // 24
+        return (self._week_mask[days % 7 * 24 + sim_hours % 24] & self._day_mask[days % 365]) == 1
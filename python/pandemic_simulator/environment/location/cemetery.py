@@ -44,9 +44,9 @@ class Cemetery(BaseLocation[CemeteryState]):
                                             else rule.visitor_capacity)
 
     def remove_person_from_location(self, person_id: PersonID) -> None:
-        if person_id in self._state.assignees_in_location:
+        if person_id in self._state.assignee_occupancy:
             raise ValueError(f'Person {person_id} is already cremated. Cannot remove!')
-        elif person_id in self._state.visitors_in_location:
-            self._state.visitors_in_location.remove(person_id)
+        elif person_id in self._state.visitor_occupancy:
+            self._state.visitor_occupancy.remove(person_id)
         else:
             raise ValueError(f'Person {person_id} not in location {self.id}')
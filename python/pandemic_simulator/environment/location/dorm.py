@@ -21,7 +21,7 @@ class Dorm(BaseLocation[DormState]):
 
     def sync(self, sim_time: SimTime) -> None:
         super().sync(sim_time)
-        self._state.social_gathering_event = sim_time in self._state.visitor_time
+        self._set_social_gathering_event(sim_time in self._state.visitor_time)
 
     def update_rules(self, new_rule: LocationRule) -> None:
         pass
@@ -19,7 +19,7 @@ class Home(BaseLocation[HomeState]):
 
     def sync(self, sim_time: SimTime) -> None:
         super().sync(sim_time)
-        self._state.social_gathering_event = sim_time in self._state.visitor_time
+        self._set_social_gathering_event(sim_time in self._state.visitor_time)
 
     def update_rules(self, new_rule: LocationRule) -> None:
         pass
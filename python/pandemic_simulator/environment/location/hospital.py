@@ -26,7 +26,7 @@ class HospitalState(BusinessLocationState):
     @property
     def persons_in_location(self) -> Set[PersonID]:
         persons = super().persons_in_location
-        persons.union(self.patients_in_location)
+        persons.update(self.patients_in_location)
         return persons
 
 
@@ -0,0 +1,177 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import multiprocessing
+import weakref
+from multiprocessing.pool import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .contact_sampler import sample_location_contact_indices
+from .exposure import accumulate_column_exposures
+from .interfaces import ContactRate, PopulationStore
+
+__all__ = ['LocationShards', 'LocationContactTask', 'compute_shard_exposures']
+
+LocationContactTask = Tuple[ContactRate, np.ndarray, np.ndarray]
+"""The contact rate and the population store slots of the assignees and of the visitors of a location."""
+
+_LocationContacts = List[Tuple[np.ndarray, np.ndarray]]
+_ShardResult = Tuple[np.ndarray, _LocationContacts]
+_ShardTask = Tuple[Sequence[LocationContactTask], np.random.SeedSequence, bool]
+
+_shared_columns = (('infection_summary', np.int8),
+                   ('spread_probability', np.float64),
+                   ('infection_spread_multiplier', np.float64),
+                   ('not_infection_probability', np.float64))
+
+# views over the shared memory columns in the worker processes
+_worker_memory: List[SharedMemory] = []
+_worker_columns: Dict[str, np.ndarray] = {}
+
+
+def compute_shard_exposures(columns: Dict[str, np.ndarray],
+                            locations: Sequence[LocationContactTask],
+                            seed: np.random.SeedSequence,
+                            return_contacts: bool) -> _ShardResult:
+    """
+    Sample the contacts of the locations of a shard for one hour and apply their exposures to the given population
+    columns.
+
+    :param columns: The infection_summary, spread_probability, infection_spread_multiplier and
+        not_infection_probability population columns (see PopulationStore). The not_infection_probability column is
+        updated in place.
+    :param locations: The contact rate and the slots of the persons of each location of the shard.
+    :param seed: Seed sequence of the random number substream of the shard for this hour.
+    :param return_contacts: If True, the contacts of each location are returned.
+    :return: A tuple of the slots of the exposed persons and the contacts (as indices into the assignees followed by
+        the visitors) of each location if return_contacts is True.
+    """
+    numpy_rng = np.random.default_rng(seed)
+    slots_1: List[np.ndarray] = []
+    slots_2: List[np.ndarray] = []
+    contacts: _LocationContacts = []
+    for contact_rate, assignee_slots, visitor_slots in locations:
+        contacts_1, contacts_2 = sample_location_contact_indices(len(assignee_slots), len(visitor_slots),
+                                                                 contact_rate, numpy_rng)
+        if return_contacts:
+            contacts.append((contacts_1, contacts_2))
+        if len(contacts_1) == 0:
+            continue
+
+        location_slots = np.concatenate([assignee_slots, visitor_slots])
+        slots_1.append(location_slots[contacts_1])
+        slots_2.append(location_slots[contacts_2])
+
+    if len(slots_1) == 0:
+        return np.zeros(0, dtype=np.int64), contacts
+
+    exposed = accumulate_column_exposures(columns['infection_summary'],
+                                          columns['spread_probability'],
+                                          columns['infection_spread_multiplier'],
+                                          columns['not_infection_probability'],
+                                          np.concatenate(slots_1), np.concatenate(slots_2))
+    return exposed, contacts
+
+
+def _init_worker(memory_names: Dict[str, str], num_persons: int) -> None:
+    for name, dtype in _shared_columns:
+        memory = SharedMemory(name=memory_names[name])
+        _worker_memory.append(memory)
+        _worker_columns[name] = np.ndarray(num_persons, dtype=dtype, buffer=memory.buf)
+
+
+def _compute_shard_exposures_in_worker(args: _ShardTask) -> _ShardResult:
+    return compute_shard_exposures(_worker_columns, *args)
+
+
+def _release(pool: Pool, memories: Sequence[SharedMemory], columns: Dict[str, np.ndarray]) -> None:
+    pool.terminate()
+    pool.join()
+    # the views over the shared memory must be dropped before it is closed
+    columns.clear()
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+
+class LocationShards:
+    """Computes the contacts and exposures of one hour with a pool of worker processes, one task per shard of
+    locations. The workers apply the exposures on a shared memory copy of the population columns. A person is in a
+    single location at a time, so the shards update disjoint rows of the not_infection_probability column. The contacts
+    of each shard are sampled with a random number substream of the shard and the results are merged in the order of the
+    shards, such that they do not depend on the scheduling of the workers."""
+
+    _num_shards: int
+    _num_persons: int
+    _processes: Optional[int]
+    _memories: List[SharedMemory]
+    _columns: Dict[str, np.ndarray]
+    _pool: Pool
+    _finalizer: weakref.finalize
+
+    def __init__(self, num_shards: int, num_persons: int, processes: Optional[int] = None):
+        """
+        :param num_shards: Number of location shards.
+        :param num_persons: Number of persons in the population store.
+        :param processes: Number of worker processes. Default is one process per shard.
+        """
+        assert num_shards > 0, 'Set a positive number of shards'
+        self._num_shards = num_shards
+        self._num_persons = num_persons
+        self._processes = processes
+
+        self._memories = []
+        self._columns = {}
+        for name, dtype in _shared_columns:
+            memory = SharedMemory(create=True, size=max(num_persons * np.dtype(dtype).itemsize, 1))
+            self._memories.append(memory)
+            self._columns[name] = np.ndarray(num_persons, dtype=dtype, buffer=memory.buf)
+
+        memory_names = {name: memory.name for (name, _), memory in zip(_shared_columns, self._memories)}
+        self._pool = multiprocessing.get_context().Pool(processes or num_shards, initializer=_init_worker,
+                                                        initargs=(memory_names, num_persons))
+        self._finalizer = weakref.finalize(self, _release, self._pool, self._memories, self._columns)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'LocationShards':
+        # the workers and the shared memory hold no state between two hours, a copy gets its own
+        return LocationShards(self._num_shards, self._num_persons, self._processes)
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
+
+    def compute_exposures(self,
+                          population_store: PopulationStore,
+                          shard_locations: Sequence[Sequence[LocationContactTask]],
+                          seeds: Sequence[np.random.SeedSequence],
+                          return_contacts: bool = False) -> Tuple[np.ndarray, List[_LocationContacts]]:
+        """
+        Sample the contacts of all shards and apply their exposures to the not_infection_probability column of the
+        population store.
+
+        :param population_store: PopulationStore instance that holds the states of the persons.
+        :param shard_locations: The locations of each shard (see LocationContactTask).
+        :param seeds: Seed sequence of the random number substream of each shard for this hour (see
+            RandomStreams.spawn).
+        :param return_contacts: If True, the contacts of each location are returned.
+        :return: A tuple of the slots of the exposed persons (in the order of the shards) and the contacts of each
+            location of each shard if return_contacts is True.
+        """
+        assert len(population_store) == self._num_persons, 'The population store size changed.'
+        assert len(shard_locations) == len(seeds) == self._num_shards
+
+        for name, _ in _shared_columns:
+            self._columns[name][:] = getattr(population_store, name)
+
+        results = self._pool.map(_compute_shard_exposures_in_worker,
+                                 [(locations, seed, return_contacts)
+                                  for locations, seed in zip(shard_locations, seeds)])
+
+        population_store.not_infection_probability[:] = self._columns['not_infection_probability']
+        exposed = np.concatenate([result[0] for result in results])
+        return exposed, [result[1] for result in results]
+
+    def close(self) -> None:
+        """Terminate the worker processes and release the shared memory."""
+        self._finalizer()
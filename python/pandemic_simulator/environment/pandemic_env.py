@@ -156,6 +156,10 @@ class PandemicGymEnv(gym.Env):
 
         return self._last_observation, self._last_reward, done, {}
 
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        self._pandemic_sim.seed(seed)
+        return [seed]
+
     def reset(self) -> PandemicObservation:
         self._pandemic_sim.reset()
         self._last_observation = PandemicObservation.create_empty(
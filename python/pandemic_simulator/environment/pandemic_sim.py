@@ -1,25 +1,38 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
+import dataclasses
 from collections import defaultdict, OrderedDict
-from itertools import product as cartesianproduct, combinations
-from typing import DefaultDict, Dict, List, Optional, Sequence, cast, Type
+from copy import deepcopy
+from dataclasses import dataclass
+from operator import attrgetter, is_
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Sequence, Tuple, cast, Type
 
 import numpy as np
 from orderedset import OrderedSet
 
+from .contact_sampler import sample_location_contact_indices
 from .contact_tracing import MaxSlotContactTracer
+from .exposure import accumulate_exposures
 from .infection_model import SEIRModel, SpreadProbabilityParams
-from .interfaces import ContactRate, ContactTracer, PandemicRegulation, PandemicSimState, PandemicTesting, \
-    PandemicTestResult, \
+from .interfaces import BatchInfectionModel, ContactRate, ContactTracer, PandemicRegulation, PandemicSimState, \
+    BatchPandemicTesting, PandemicTesting, PandemicTestResult, RandomStreams, \
     DEFAULT, GlobalTestingState, InfectionModel, InfectionSummary, Location, LocationID, Person, PersonID, Registry, \
-    SimTime, SimTimeInterval, sorted_infection_summary, globals, PersonRoutineAssignment
+    SimTime, SimTimeInterval, sorted_infection_summary, globals, PersonRoutineAssignment, PopulationStore, LocationState
 from .location import Hospital
+from .location_shards import LocationContactTask, LocationShards
 from .make_population import make_population
+from .person_scheduler import PersonScheduler
 from .pandemic_testing_strategies import RandomPandemicTesting
 from .simulator_config import PandemicSimConfig
 from .simulator_opts import PandemicSimOpts
 
-__all__ = ['PandemicSim', 'make_locations']
+__all__ = ['PandemicSim', 'PandemicSimSnapshot', 'make_locations']
+
+_POSITIVE_TEST_RESULT_CODES = (PandemicTestResult.POSITIVE.value, PandemicTestResult.CRITICAL.value)
+
+# the summary counted by the global testing state for each test result code
+_TEST_RESULT_TO_SUMMARY = (InfectionSummary.NONE, InfectionSummary.NONE, InfectionSummary.INFECTED,
+                           InfectionSummary.CRITICAL, InfectionSummary.DEAD)
 
 
 def make_locations(sim_config: PandemicSimConfig) -> List[Location]:
@@ -29,6 +42,40 @@ def make_locations(sim_config: PandemicSimConfig) -> List[Location]:
             for config in sim_config.location_configs for i in range(config.num)]
 
 
+@dataclass(frozen=True)
+class PandemicSimSnapshot:
+    """A snapshot of the state of a PandemicSim (see PandemicSim.snapshot). It holds copies of the mutable values of
+    the simulator and shares the immutable ones (ids, infection states, routines, older contact traces, etc.)."""
+
+    population: Dict[str, np.ndarray]
+    """Copy of the columns of the population store"""
+
+    persons: List[Any]
+    """Snapshot of each person, in the order of the persons of the simulator"""
+
+    locations: List[LocationState]
+    """Copy of the state of each location, in the order of the locations of the simulator"""
+
+    registry: Any
+    """Snapshot of the registry"""
+
+    contact_tracer: Any
+    """Snapshot of the contact tracer (None if the simulator has no contact tracer)"""
+
+    infection_model: Any
+    """Snapshot of the infection model"""
+
+    person_scheduler: Optional[Tuple[Dict[int, List[int]], List[int]]]
+    """Snapshot of the person scheduler (None if the simulator does not use it)"""
+
+    random_state: Dict[str, Any]
+    """State of the random number streams of the simulator"""
+
+    state: PandemicSimState
+    """Copy of the simulator state. The person and location states it refers to are not copied, they are restored from
+    the person and location snapshots."""
+
+
 class PandemicSim:
     """Class that implements the pandemic simulator."""
 
@@ -41,11 +88,20 @@ class PandemicSim:
     _new_time_slot_interval: SimTimeInterval
     _infection_update_interval: SimTimeInterval
     _infection_threshold: int
-    _numpy_rng: np.random.RandomState
+    _random_streams: RandomStreams
+    _schedule_rng: np.random.Generator
+    _contacts_rng: np.random.Generator
 
     _type_to_locations: DefaultDict
     _hospital_ids: List[LocationID]
     _persons: Sequence[Person]
+    _locations: Sequence[Location]
+    _location_shards: Optional[LocationShards]
+    _location_to_shard: Dict[LocationID, int]
+    _population_store: PopulationStore
+    _person_index_to_slot: np.ndarray
+    _person_ages: np.ndarray
+    _person_scheduler: Optional[PersonScheduler]
     _state: PandemicSimState
 
     def __init__(self,
@@ -57,7 +113,10 @@ class PandemicSim:
                  new_time_slot_interval: SimTimeInterval = SimTimeInterval(day=1),
                  infection_update_interval: SimTimeInterval = SimTimeInterval(day=1),
                  person_routine_assignment: Optional[PersonRoutineAssignment] = None,
-                 infection_threshold: int = 0):
+                 infection_threshold: int = 0,
+                 use_person_scheduler: bool = False,
+                 num_location_shards: int = 1,
+                 compile_routines: bool = False):
         """
         :param locations: A sequence of Location instances.
         :param persons: A sequence of Person instances.
@@ -70,10 +129,27 @@ class PandemicSim:
             each person
         :param infection_threshold: If the infection summary is greater than the specified threshold, a
             boolean in PandemicSimState is set to True.
+        :param use_person_scheduler: If True, persons are only stepped when their next wake time (see
+            Person.next_wake_time) is due, instead of every hour. All persons are woken up after each infection update
+            and each new regulation. The persons are still drawn with replacement every hour and only the draws of the
+            due persons are stepped (a due person that is not drawn stays due), so the stepping is the same as in the
+            hourly steps. The skipped steps would not change the persons but would draw random numbers, so the random
+            number stream and the results differ from the hourly steps for the same seed.
+        :param num_location_shards: If larger than one, the locations are partitioned into shards and the contacts and
+            exposures of each shard are computed by a pool of worker processes (one per shard), with a random number
+            substream per shard and hour (spawned from the 'contacts' stream). The results only depend on the seed and
+            on the number of shards. The infection columns are copied to and from shared memory every hour, whether
+            this is faster than the in-process computation depends on the population and on the number of cores (see
+            scripts/benchmarks/location_shards_benchmark.py).
+        :param compile_routines: If True, the routines of each person are compiled (see Person.compile_routines) once
+            they are assigned, which makes the cost of a step independent of the number of routines of the persons
+            without changing the results.
         """
         assert globals.registry, 'No registry found. Create the repo wide registry first by calling init_globals()'
         self._registry = globals.registry
-        self._numpy_rng = globals.numpy_rng
+        self._random_streams = globals.random_streams
+        self._schedule_rng = self._random_streams.stream('schedule')
+        self._contacts_rng = self._random_streams.stream('contacts')
 
         self._id_to_location = OrderedDict({loc.id: loc for loc in locations})
         assert self._registry.location_ids.issuperset(self._id_to_location)
@@ -93,6 +169,7 @@ class PandemicSim:
         self._hospital_ids = [loc.id for loc in locations if isinstance(loc, Hospital)]
 
         self._persons = persons
+        self._locations = list(self._id_to_location.values())
 
         # assign routines
         if person_routine_assignment is not None:
@@ -100,6 +177,20 @@ class PandemicSim:
                 assert _loc.__name__ in globals.registry.location_types, (
                     f'Required location type {_loc.__name__} not found. Modify sim_config to include it.')
             person_routine_assignment.assign_routines(persons)
+        if compile_routines:
+            for person in persons:
+                person.compile_routines()
+
+        self._population_store = PopulationStore(location_ids=list(self._id_to_location))
+        self._population_store.bind_all([person.state for person in persons])
+        # the occupancy of locations holds the registry indices of persons, mapped to their population store slots
+        self._person_index_to_slot = np.full(len(self._registry.person_ids_by_index), -1, dtype=np.int64)
+        for slot, person in enumerate(persons):
+            self._person_index_to_slot[self._registry.person_index(person.id)] = slot
+        self._person_ages = np.array([person.id.age for person in persons], dtype=np.int64)
+        self._person_scheduler = PersonScheduler(len(persons)) if use_person_scheduler else None
+        self._location_shards = LocationShards(num_location_shards, len(persons)) if num_location_shards > 1 else None
+        self._location_to_shard = {location.id: i % num_location_shards for i, location in enumerate(self._locations)}
 
         self._state = PandemicSimState(
             id_to_person_state={person.id: person.state for person in persons},
@@ -158,79 +249,124 @@ class PandemicSim:
                            pandemic_testing=pandemic_testing,
                            contact_tracer=contact_tracer,
                            infection_threshold=sim_opts.infection_threshold,
-                           person_routine_assignment=sim_config.person_routine_assignment)
+                           person_routine_assignment=sim_config.person_routine_assignment,
+                           use_person_scheduler=sim_opts.use_person_scheduler,
+                           num_location_shards=sim_opts.num_location_shards,
+                           compile_routines=sim_opts.compile_routines)
 
     @property
     def registry(self) -> Registry:
         """Return registry"""
         return self._registry
 
-    def _compute_contacts(self, location: Location) -> OrderedSet:
-        assignees = location.state.assignees_in_location
-        visitors = location.state.visitors_in_location
-        cr = location.state.contact_rate
-
-        groups = [(assignees, assignees),
-                  (assignees, visitors),
-                  (visitors, visitors)]
-        constraints = [(cr.min_assignees, cr.fraction_assignees),
-                       (cr.min_assignees_visitors, cr.fraction_assignees_visitors),
-                       (cr.min_visitors, cr.fraction_visitors)]
+    @property
+    def population_store(self) -> PopulationStore:
+        """Return the population store that holds the state of all persons"""
+        return self._population_store
 
-        contacts: OrderedSet = OrderedSet()
+    @property
+    def persons(self) -> Sequence[Person]:
+        """Return the persons of the simulator, in the order of the population store rows and of the snapshots"""
+        return self._persons
 
-        for grp, cst in zip(groups, constraints):
-            grp1, grp2 = grp
-            minimum, fraction = cst
+    @property
+    def locations(self) -> Sequence[Location]:
+        """Return the locations of the simulator, in the order of the simulator state and of the snapshots"""
+        return self._locations
+
+    def _compute_contact_indices(self, location: Location) -> Tuple[List[PersonID], np.ndarray, np.ndarray]:
+        assignees = location.state.assignee_occupancy
+        visitors = location.state.visitor_occupancy
+        contacts_1, contacts_2 = sample_location_contact_indices(len(assignees), len(visitors),
+                                                                 location.state.contact_rate, self._contacts_rng)
+        return assignees.person_ids + visitors.person_ids, contacts_1, contacts_2
+
+    def _location_slots(self, location: Location) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the population store slots of the assignees and of the visitors in the location."""
+        return (self._person_index_to_slot[location.state.assignee_occupancy.members],
+                self._person_index_to_slot[location.state.visitor_occupancy.members])
 
-            possible_contacts = list(combinations(grp1, 2) if grp1 == grp2 else cartesianproduct(grp1, grp2))
-            num_possible_contacts = len(possible_contacts)
+    @staticmethod
+    def _contacts_from_indices(persons_in_location: List[PersonID],
+                               contacts_1: np.ndarray,
+                               contacts_2: np.ndarray) -> OrderedSet:
+        # we are using an orderedset, it's repeatable
+        return OrderedSet([(persons_in_location[i], persons_in_location[j])
+                           for i, j in zip(contacts_1.tolist(), contacts_2.tolist())])
 
-            if len(possible_contacts) == 0:
+    def _compute_contacts(self, location: Location) -> OrderedSet:
+        return self._contacts_from_indices(*self._compute_contact_indices(location))
+
+    def _contact_locations(self) -> Iterable[Location]:
+        """Return the locations whose contacts are sampled in the current step: the locations where an infection can
+        spread, or all locations with at least two persons when a contact tracer is used. With a contact tracer, the
+        skipped locations would draw no random numbers, so the results are the same as when sampling every location.
+        Without one, skipping the inert locations changes the random number stream of the contacts."""
+        # the location slots of the population store follow the order of the locations
+        num_locations = len(self._locations)
+        occupants = self._population_store.location_occupants[:num_locations]
+        if self._contact_tracer is not None:
+            # contacts are traced wherever they happen
+            slots = np.flatnonzero(occupants >= 2)
+        else:
+            # an infection can only spread where infectious and non-infectious persons meet
+            infectious = self._population_store.location_infectious[:num_locations]
+            slots = np.flatnonzero((infectious > 0) & (infectious < occupants))
+        return [self._locations[slot] for slot in slots.tolist()]
+
+    def _compute_contacts_in_locations(self) -> None:
+        hour_slots_1: List[np.ndarray] = []
+        hour_slots_2: List[np.ndarray] = []
+        for location in self._contact_locations():
+            persons_in_location, contacts_1, contacts_2 = self._compute_contact_indices(location)
+            if len(contacts_1) == 0:
                 continue
 
-            fraction_sample = min(1., max(0., self._numpy_rng.normal(fraction, 1e-2)))
-            real_fraction = max(minimum, int(fraction_sample * num_possible_contacts))
-
-            # we are using an orderedset, it's repeatable
-            contact_idx = self._numpy_rng.randint(0, num_possible_contacts, real_fraction)
-            contacts.update([possible_contacts[idx] for idx in contact_idx])
-
-        return contacts
-
-    def _compute_infection_probabilities(self, contacts: OrderedSet) -> None:
-        infectious_states = {InfectionSummary.INFECTED, InfectionSummary.CRITICAL}
-
-        for c in contacts:
-            id_person1 = c[0]
-            id_person2 = c[1]
-            person1_state = self._id_to_person[id_person1].state
-            person2_state = self._id_to_person[id_person2].state
-            person1_inf_state = person1_state.infection_state
-            person2_inf_state = person2_state.infection_state
-
-            if (
-                    # both are not infectious
-                    (person1_inf_state is None and person2_inf_state is None) or
-
-                    # both are already infected
-                    (person1_inf_state is not None and person2_inf_state is not None and
-
-                     person1_inf_state.summary in infectious_states and person2_inf_state.summary in infectious_states)
-            ):
-                continue
-            elif person1_inf_state is not None and person1_inf_state.summary in infectious_states:
-                spread_probability = (person1_inf_state.spread_probability *
-                                      person1_state.infection_spread_multiplier)
-                person2_state.not_infection_probability *= 1 - spread_probability
-                person2_state.not_infection_probability_history.append((person2_state.current_location,
-                                                                        person2_state.not_infection_probability))
-            elif person2_inf_state is not None and person2_inf_state.summary in infectious_states:
-                spread_probability = (person2_inf_state.spread_probability *
-                                      person2_state.infection_spread_multiplier)
-                person1_state.not_infection_probability *= 1 - spread_probability
-                person1_state.not_infection_probability_history.append((person1_state.current_location,
-                                                                        person1_state.not_infection_probability))
+            if self._contact_tracer:
+                self._contact_tracer.add_contacts(self._contacts_from_indices(persons_in_location,
+                                                                              contacts_1, contacts_2))
+
+            location_slots = np.concatenate(self._location_slots(location))
+            hour_slots_1.append(location_slots[contacts_1])
+            hour_slots_2.append(location_slots[contacts_2])
+
+        # the exposures of all the contacts of the hour are accumulated in one batch
+        if len(hour_slots_1) > 0:
+            self._compute_infection_probabilities(np.concatenate(hour_slots_1), np.concatenate(hour_slots_2))
+
+    def _compute_contacts_in_shards(self, location_shards: LocationShards) -> None:
+        shard_locations: List[List[LocationContactTask]] = [[] for _ in range(location_shards.num_shards)]
+        shard_persons: List[List[List[PersonID]]] = [[] for _ in range(location_shards.num_shards)]
+        for location in self._contact_locations():
+            shard = self._location_to_shard[location.id]
+            shard_locations[shard].append((location.state.contact_rate, *self._location_slots(location)))
+            if self._contact_tracer:
+                shard_persons[shard].append(location.state.assignee_occupancy.person_ids +
+                                            location.state.visitor_occupancy.person_ids)
+
+        # one substream per shard and hour
+        seeds = self._random_streams.spawn('contacts', location_shards.num_shards)
+        exposed, shard_contacts = location_shards.compute_exposures(self._population_store, shard_locations, seeds,
+                                                                    return_contacts=self._contact_tracer is not None)
+        if len(exposed) > 0:
+            self._population_store.record_exposures(exposed)
+
+        if self._contact_tracer:
+            for persons, contacts in zip(shard_persons, shard_contacts):
+                for persons_in_location, (contacts_1, contacts_2) in zip(persons, contacts):
+                    if len(contacts_1) > 0:
+                        self._contact_tracer.add_contacts(self._contacts_from_indices(persons_in_location,
+                                                                                      contacts_1, contacts_2))
+
+    def _update_positive_contacts(self, contact_tracer: ContactTracer) -> None:
+        """Flag the persons with a traced contact that tested positive, once for all the person steps of the hour."""
+        positive = np.flatnonzero(np.isin(self._population_store.test_result, _POSITIVE_TEST_RESULT_CODES))
+        contact_tracer.update_positive_contacts([self._persons[slot].id for slot in positive.tolist()])
+
+    def _compute_infection_probabilities(self, slots_1: np.ndarray, slots_2: np.ndarray) -> None:
+        exposed = accumulate_exposures(self._population_store, slots_1, slots_2)
+        if len(exposed) > 0:
+            self._population_store.record_exposures(exposed)
 
     def _update_global_testing_state(self, new_result: PandemicTestResult, prev_result: PandemicTestResult) -> None:
         if new_result == prev_result:
@@ -261,6 +397,115 @@ class PandemicSim:
             self._state.global_testing_state.summary[prv] -= 1
             self._state.global_testing_state.num_tests += 1  # update number of tests
 
+    def _update_global_testing_state_batch(self, new_results: np.ndarray, prev_results: np.ndarray) -> None:
+        """Update the global testing state with the changes of the test results of many persons at once, as
+        _update_global_testing_state would do for each person."""
+        changed = new_results != prev_results
+        new_results, prev_results = new_results[changed], prev_results[changed]
+
+        # person died - just update the test summary and __not__ the num_tests
+        died = new_results == PandemicTestResult.DEAD.value
+        # person tested positive/critical
+        tested_positive = (np.isin(new_results, _POSITIVE_TEST_RESULT_CODES) &
+                           (prev_results != PandemicTestResult.CRITICAL.value) &
+                           (prev_results != PandemicTestResult.DEAD.value))
+        # person tested negative after having tested as infected before
+        recovered = ((new_results == PandemicTestResult.NEGATIVE.value) &
+                     np.isin(prev_results, _POSITIVE_TEST_RESULT_CODES))
+
+        num_results = len(_TEST_RESULT_TO_SUMMARY)
+        added = np.bincount(new_results[tested_positive], minlength=num_results)
+        removed = np.bincount(prev_results[died | tested_positive | recovered], minlength=num_results)
+        summary = self._state.global_testing_state.summary
+        for code, infection_summary in enumerate(_TEST_RESULT_TO_SUMMARY):
+            summary[infection_summary] += int(added[code]) - int(removed[code])
+        summary[InfectionSummary.DEAD] += int(np.count_nonzero(died))
+        summary[InfectionSummary.RECOVERED] += int(np.count_nonzero(recovered))
+        self._state.global_testing_state.num_tests += int(np.count_nonzero(tested_positive | recovered))
+
+    def _attribute_exposures(self) -> None:
+        """Attribute the new infections to the location types where they happened and clear the exposures."""
+        population_store = self._population_store
+        infected = np.flatnonzero(population_store.exposed_rnb != -1.)
+        if len(infected) > 0:
+            location_slots = population_store.exposure_locations(infected, population_store.exposed_rnb[infected])
+            for location_slot in location_slots.tolist():
+                location_type = self._registry.location_id_to_type(population_store.location_ids[location_slot])
+                self._state.location_type_infection_summary[location_type] += 1
+
+        population_store.not_infection_probability[:] = 1.
+        population_store.clear_exposures()
+
+    def _update_infection_states(self) -> None:
+        global_infection_summary = {s: 0 for s in sorted_infection_summary}
+        for person in self._id_to_person.values():
+            # infection model step
+            person.state.infection_state = self._infection_model.step(person.state.infection_state,
+                                                                      person.id.age,
+                                                                      person.state.risk,
+                                                                      1 - person.state.not_infection_probability)
+
+            global_infection_summary[person.state.infection_state.summary] += 1
+
+            # test the person for infection
+            if self._pandemic_testing.admit_person(person.state):
+                new_test_result = self._pandemic_testing.test_person(person.state)
+                self._update_global_testing_state(new_test_result, person.state.test_result)
+                person.state.test_result = new_test_result
+
+        self._state.global_infection_summary = global_infection_summary
+        self._attribute_exposures()
+
+    def _update_infection_states_batch(self, infection_model: BatchInfectionModel) -> None:
+        population_store = self._population_store
+        infection_model.step_population(population_store, self._person_ages)
+
+        summary_counts = np.bincount(population_store.infection_summary, minlength=len(sorted_infection_summary))
+        self._state.global_infection_summary = {s: int(summary_counts[population_store.summary_to_code[s]])
+                                                for s in sorted_infection_summary}
+        self._attribute_exposures()
+
+        if isinstance(self._pandemic_testing, BatchPandemicTesting):
+            # test the population for infection
+            test_results = population_store.test_result
+            _, new_test_results = self._pandemic_testing.test_population(population_store.infection_summary,
+                                                                         population_store.shows_symptoms,
+                                                                         population_store.is_hospitalized,
+                                                                         test_results)
+            self._update_global_testing_state_batch(new_test_results, test_results)
+            test_results[:] = new_test_results
+            return
+
+        for person in self._id_to_person.values():
+            # test the person for infection
+            if self._pandemic_testing.admit_person(person.state):
+                new_test_result = self._pandemic_testing.test_person(person.state)
+                self._update_global_testing_state(new_test_result, person.state.test_result)
+                person.state.test_result = new_test_result
+
+    def _step_due_persons(self, person_scheduler: PersonScheduler) -> None:
+        sim_time = self._state.sim_time
+        sim_hours = sim_time.in_hours()
+        num_persons = len(self._persons)
+        # the persons are drawn with replacement as in the hourly steps, and the draws of the due persons are stepped
+        # in the same order. The other persons would not change in their steps (see Person.next_wake_time).
+        draws = self._schedule_rng.integers(0, num_persons, num_persons)
+        due = person_scheduler.pop_due(sim_hours)
+        is_due = np.zeros(num_persons, dtype=bool)
+        is_due[due] = True
+        for i in draws[is_due[draws]].tolist():
+            self._persons[i].step(sim_time, self._contact_tracer)
+
+        stepped = np.zeros(num_persons, dtype=bool)
+        stepped[draws] = True
+        for i in due:
+            if stepped[i]:
+                wake_time = self._persons[i].next_wake_time(sim_time)
+                person_scheduler.schedule(i, wake_time.in_hours() if wake_time is not None else None)
+            else:
+                # a due person that was not drawn stays due
+                person_scheduler.schedule(i, sim_hours + 1)
+
     def step(self) -> None:
         """Method that advances one step through the simulator"""
         # sync all locations
@@ -268,49 +513,33 @@ class PandemicSim:
             location.sync(self._state.sim_time)
         self._registry.update_location_specific_information()
 
+        if self._contact_tracer is not None:
+            self._update_positive_contacts(self._contact_tracer)
+
         # call person steps (randomize order)
-        for i in self._numpy_rng.randint(0, len(self._persons), len(self._persons)):
-            self._persons[i].step(self._state.sim_time, self._contact_tracer)
+        if self._person_scheduler is not None:
+            self._step_due_persons(self._person_scheduler)
+        else:
+            for i in self._schedule_rng.integers(0, len(self._persons), len(self._persons)):
+                self._persons[i].step(self._state.sim_time, self._contact_tracer)
 
         # update person contacts
-        for location in self._id_to_location.values():
-            contacts = self._compute_contacts(location)
-
-            if self._contact_tracer:
-                self._contact_tracer.add_contacts(contacts)
-
-            self._compute_infection_probabilities(contacts)
+        if self._location_shards is not None:
+            self._compute_contacts_in_shards(self._location_shards)
+        else:
+            self._compute_contacts_in_locations()
 
         # call infection model steps
         if self._infection_update_interval.trigger_at_interval(self._state.sim_time):
-            global_infection_summary = {s: 0 for s in sorted_infection_summary}
-            for person in self._id_to_person.values():
-                # infection model step
-                person.state.infection_state = self._infection_model.step(person.state.infection_state,
-                                                                          person.id.age,
-                                                                          person.state.risk,
-                                                                          1 - person.state.not_infection_probability)
-
-                if person.state.infection_state.exposed_rnb != -1.:
-                    for vals in person.state.not_infection_probability_history:
-                        if person.state.infection_state.exposed_rnb < 1 - vals[1]:
-                            infection_location = vals[0]
-                            break
-
-                    person_location_type = self._registry.location_id_to_type(infection_location)
-                    self._state.location_type_infection_summary[person_location_type] += 1
-
-                global_infection_summary[person.state.infection_state.summary] += 1
-                person.state.not_infection_probability = 1.
-                person.state.not_infection_probability_history = []
-
-                # test the person for infection
-                if self._pandemic_testing.admit_person(person.state):
-                    new_test_result = self._pandemic_testing.test_person(person.state)
-                    self._update_global_testing_state(new_test_result, person.state.test_result)
-                    person.state.test_result = new_test_result
-
-            self._state.global_infection_summary = global_infection_summary
+            if isinstance(self._infection_model, BatchInfectionModel):
+                self._update_infection_states_batch(self._infection_model)
+            else:
+                self._update_infection_states()
+
+            if self._person_scheduler is not None:
+                # test results and infection states changed, wake everyone up in the next step
+                self._person_scheduler.wake_all(self._state.sim_time.in_hours() + 1)
+
         self._state.infection_above_threshold = (self._state.global_testing_state.summary[InfectionSummary.INFECTED]
                                                  >= self._infection_threshold)
 
@@ -369,6 +598,9 @@ class PandemicSim:
         for person in self._id_to_person.values():
             person.receive_regulation(regulation)
 
+        if self._person_scheduler is not None:
+            self._person_scheduler.wake_all(self._state.sim_time.in_hours())
+
         self._state.regulation_stage = regulation.stage
 
     @property
@@ -381,12 +613,116 @@ class PandemicSim:
 
         return self._state
 
+    def seed(self, seed: Optional[int] = None) -> None:
+        """
+        Reseed the random number streams of the simulator, which are shared with the persons, the infection model and
+        the testing strategy that were created with the same globals.
+
+        :param seed: Root seed of the random number streams
+        """
+        self._random_streams.seed(seed)
+
+    @staticmethod
+    def _copy_state(state: PandemicSimState) -> PandemicSimState:
+        # the person and location states are copied by the persons and the locations
+        testing_state = state.global_testing_state
+        return dataclasses.replace(state,
+                                   location_type_infection_summary=dict(state.location_type_infection_summary),
+                                   global_infection_summary=dict(state.global_infection_summary),
+                                   global_testing_state=GlobalTestingState(summary=dict(testing_state.summary),
+                                                                           num_tests=testing_state.num_tests),
+                                   sim_time=dataclasses.replace(state.sim_time))
+
+    def snapshot(self) -> PandemicSimSnapshot:
+        """
+        Take a snapshot of the current state of the simulator: the population store, the persons (and the status of
+        their routines), the locations, the registry, the contact tracer, the infection model, the person scheduler
+        and the random number streams. The population is copied column by column and the other components only copy
+        the values that they update in place, so a snapshot is cheap enough to be taken every simulated day.
+
+        :return: A PandemicSimSnapshot instance.
+        :raises NotImplementedError: if a component of the simulator (e.g. a user-defined person, location or infection
+            model) does not support snapshots.
+        """
+        return PandemicSimSnapshot(
+            population=self._population_store.snapshot(),
+            persons=[person.snapshot() for person in self._persons],
+            locations=[location.snapshot() for location in self._locations],
+            registry=self._registry.snapshot(),
+            contact_tracer=self._contact_tracer.snapshot() if self._contact_tracer is not None else None,
+            infection_model=self._infection_model.snapshot(),
+            person_scheduler=self._person_scheduler.snapshot() if self._person_scheduler is not None else None,
+            random_state=self._random_streams.get_state(),
+            state=self._copy_state(self._state)
+        )
+
+    def restore(self, snapshot: PandemicSimSnapshot) -> None:
+        """
+        Restore the simulator, in place, to the state of a snapshot taken with the snapshot method (also after a
+        reset). The snapshot is left untouched, so it can be restored many times, e.g. to evaluate several regulation
+        strategies from the same point of an epidemic without simulating the warm-up again.
+
+        :param snapshot: A PandemicSimSnapshot instance taken from this simulator.
+        """
+        assert len(snapshot.persons) == len(self._persons) and len(snapshot.locations) == len(self._locations), \
+            'The snapshot was taken from another simulator.'
+        for location, location_snapshot in zip(self._locations, snapshot.locations):
+            location.restore(location_snapshot)
+        for person, person_snapshot in zip(self._persons, snapshot.persons):
+            person.restore(person_snapshot)
+        self._restore_components(snapshot)
+
+    def _restore_components(self, snapshot: PandemicSimSnapshot) -> None:
+        """Restore the simulator from a snapshot, except the persons and the locations (e.g. restored by a
+        checkpoint). The registry is restored after the locations, it updates its social events from its snapshot."""
+        self._population_store.restore(snapshot.population)
+
+        self._registry.restore(snapshot.registry)
+        if self._contact_tracer is not None:
+            self._contact_tracer.restore(snapshot.contact_tracer)
+        self._infection_model.restore(snapshot.infection_model)
+        if self._person_scheduler is not None and snapshot.person_scheduler is not None:
+            self._person_scheduler.restore(snapshot.person_scheduler)
+        self._random_streams.set_state(snapshot.random_state)
+
+        self._state = dataclasses.replace(
+            self._copy_state(snapshot.state),
+            id_to_person_state=self._state_map(self._state.id_to_person_state, self._persons),
+            id_to_location_state=self._state_map(self._state.id_to_location_state, self._locations),
+            global_location_summary=self._registry.global_location_summary
+        )
+
+    @staticmethod
+    def _state_map(current: Dict[Any, Any], entities: Sequence[Any]) -> Dict[Any, Any]:
+        # the persons and the locations usually restore their states in place, the current map is then copied (which
+        # is much cheaper than hashing all the ids again)
+        states = list(map(attrgetter('state'), entities))
+        if len(current) == len(states) and all(map(is_, current.values(), states)):
+            return dict(current)
+        return dict(zip(map(attrgetter('id'), entities), states))
+
+    def fork(self) -> 'PandemicSim':
+        """
+        Return an independent copy of the simulator in its current state, with its own persons, locations, registry
+        and random number streams, such that both simulators can be stepped side by side. The copy continues the
+        random number streams of the simulator, seed it to branch off. Forking deep copies the simulator, restoring a
+        snapshot is much cheaper when the branches can be run one after the other.
+
+        :return: A PandemicSim instance.
+        """
+        return deepcopy(self)
+
     def reset(self) -> None:
         for location in self._id_to_location.values():
             location.reset()
         for person in self._id_to_person.values():
             person.reset()
 
+        self._population_store.clear()
+        self._population_store.bind_all([person.state for person in self._persons])
+        if self._person_scheduler is not None:
+            self._person_scheduler.wake_all(0)
+
         self._infection_model.reset()
 
         num_persons = len(self._id_to_person)
@@ -1,15 +1,19 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
-from typing import cast
+from typing import Tuple, cast
 
 import numpy as np
 
-from ..interfaces import PersonState, InfectionSummary, IndividualInfectionState, PandemicTestResult, PandemicTesting, \
-    globals
+from ..interfaces import PersonState, InfectionSummary, IndividualInfectionState, PandemicTestResult, \
+    BatchPandemicTesting, BufferedRandom, PopulationStore, globals
 
 __all__ = ['RandomPandemicTesting']
 
+_INFECTED = PopulationStore.summary_to_code[InfectionSummary.INFECTED]
+_CRITICAL = PopulationStore.summary_to_code[InfectionSummary.CRITICAL]
+_DEAD = PopulationStore.summary_to_code[InfectionSummary.DEAD]
 
-class RandomPandemicTesting(PandemicTesting):
+
+class RandomPandemicTesting(BatchPandemicTesting):
     """Implements random pandemic testing based on the specified probabilities."""
 
     _spontaneous_testing_rate: float
@@ -18,7 +22,7 @@ class RandomPandemicTesting(PandemicTesting):
     _testing_false_positive_rate: float
     _testing_false_negative_rate: float
     _retest_rate: float
-    _numpy_rng: np.random.RandomState
+    _numpy_rng: BufferedRandom
 
     def __init__(self,
                  spontaneous_testing_rate: float = 1.,
@@ -41,7 +45,7 @@ class RandomPandemicTesting(PandemicTesting):
         self._testing_false_positive_rate = testing_false_positive_rate
         self._testing_false_negative_rate = testing_false_negative_rate
         self._retest_rate = retest_rate
-        self._numpy_rng = globals.numpy_rng
+        self._numpy_rng = globals.random_streams.buffered('testing')
 
     def admit_person(self, person_state: PersonState) -> bool:
         infection_state = cast(IndividualInfectionState, person_state.infection_state)
@@ -93,3 +97,39 @@ class RandomPandemicTesting(PandemicTesting):
                        else PandemicTestResult.POSITIVE if test_outcome else PandemicTestResult.NEGATIVE)
 
         return test_result
+
+    def test_population(self,
+                        infection_summary: np.ndarray,
+                        shows_symptoms: np.ndarray,
+                        is_hospitalized: np.ndarray,
+                        test_result: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # the persons draw the same uniforms as in admit_person and test_person, but all the admission draws are drawn
+        # before the test draws (the persons get other values of the stream than when tested one by one)
+        dead = infection_summary == _DEAD
+        critical = infection_summary == _CRITICAL
+        testable = test_result != PandemicTestResult.DEAD.value
+
+        draws = testable & ~dead
+        rnd = np.ones(len(test_result))
+        rnd[draws] = self._numpy_rng.random(int(np.count_nonzero(draws)))
+        tested_before = ((test_result == PandemicTestResult.CRITICAL.value) |
+                         (test_result == PandemicTestResult.POSITIVE.value))
+        admitted = draws & (is_hospitalized |
+                            (tested_before & (rnd < self._retest_rate)) |
+                            (shows_symptoms & critical & (rnd < self._critical_testing_rate)) |
+                            (shows_symptoms & ~critical & (rnd < self._symp_testing_rate)) |
+                            (~shows_symptoms & (rnd < self._spontaneous_testing_rate)))
+
+        new_test_result = test_result.copy()
+        new_test_result[testable & dead] = PandemicTestResult.DEAD.value
+        tested = np.flatnonzero(admitted)
+        rnd = self._numpy_rng.random(len(tested))
+        positive_state = (infection_summary[tested] == _INFECTED) | critical[tested]
+        # account for testing uncertainty
+        test_outcome = np.where(positive_state, rnd >= self._testing_false_negative_rate,
+                                rnd < self._testing_false_positive_rate)
+        new_test_result[tested] = np.where(test_outcome,
+                                           np.where(critical[tested], PandemicTestResult.CRITICAL.value,
+                                                    PandemicTestResult.POSITIVE.value),
+                                           PandemicTestResult.NEGATIVE.value)
+        return admitted | (testable & dead), new_test_result
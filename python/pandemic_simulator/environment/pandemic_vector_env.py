@@ -0,0 +1,214 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import gym
+import numpy as np
+
+from .done import DoneFunction
+from .interfaces import LocationID, PandemicObservation, PandemicRegulation
+from .pandemic_env import PandemicGymEnv
+from .reward import RewardFunction
+from .simulator_config import PandemicSimConfig
+from .simulator_opts import PandemicSimOpts
+
+__all__ = ['PandemicVectorEnv']
+
+_StepResult = Tuple[PandemicObservation, float, bool, Dict]
+
+
+class _EnvBatch:
+    """A batch of environments that are stepped one after the other in the current process, with auto-reset."""
+
+    _envs: List[PandemicGymEnv]
+
+    def __init__(self, prototype: PandemicGymEnv, seeds: Sequence[int]):
+        self._envs = []
+        for seed in seeds:
+            env = copy.deepcopy(prototype)
+            env.seed(seed)
+            self._envs.append(env)
+
+    def reset(self) -> List[PandemicObservation]:
+        return [env.reset() for env in self._envs]
+
+    def step(self, actions: Sequence[int]) -> List[_StepResult]:
+        results = []
+        for env, action in zip(self._envs, actions):
+            obs, reward, done, info = env.step(int(action))
+            if done:
+                info = dict(info, terminal_observation=obs)
+                obs = env.reset()
+            results.append((obs, reward, done, info))
+        return results
+
+
+def _run_worker(connection: Connection, prototype: PandemicGymEnv, seeds: Sequence[int]) -> None:
+    # the prototype was inherited from the parent process (fork), the copies are made here so that the parent process
+    # only holds the prototype
+    env_batch = _EnvBatch(prototype, seeds)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                connection.send(env_batch.step(data))
+            elif command == 'reset':
+                connection.send(env_batch.reset())
+            elif command == 'close':
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+
+
+class PandemicVectorEnv:
+    """A vector of PandemicGymEnv instances that are copies of one prototype environment with different seeds. The
+    environments are stepped in worker processes, that are forked after the prototype was built such that the
+    population is built only once, or in the current process. Observations are stacked along the N axis of the TNC
+    layout of PandemicObservation, and the environments are reset automatically when they are done (the last
+    observation of the episode is then given in the info dict under 'terminal_observation')."""
+
+    _num_envs: int
+    _action_space: gym.Space
+    _env_batch: Optional[_EnvBatch]
+    _connections: List[Connection]
+    _processes: List[BaseProcess]
+    _worker_sizes: List[int]
+    _closed: bool
+
+    def __init__(self,
+                 env: PandemicGymEnv,
+                 num_envs: int,
+                 num_workers: int = 0,
+                 seed: Optional[int] = None):
+        """
+        :param env: Prototype environment. It is copied for each environment of the vector and left untouched.
+        :param num_envs: Number of environments.
+        :param num_workers: Number of worker processes, each worker steps a contiguous slice of the environments. If 0,
+            the environments are stepped in the current process.
+        :param seed: Seed of the random number generator that draws the seed of each environment.
+        """
+        assert num_envs > 0, 'Set a positive number of environments'
+        self._num_envs = num_envs
+        self._action_space = env.action_space
+        self._closed = False
+
+        seeds = np.random.RandomState(seed).randint(0, 2 ** 31 - 1, size=num_envs)
+        self._env_batch = None
+        self._connections = []
+        self._processes = []
+        self._worker_sizes = []
+        if num_workers == 0:
+            self._env_batch = _EnvBatch(env, seeds.tolist())
+            return
+
+        context = multiprocessing.get_context('fork')
+        for worker_seeds in np.array_split(seeds, min(num_workers, num_envs)):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_run_worker, args=(child_connection, env, worker_seeds.tolist()),
+                                      daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+            self._worker_sizes.append(len(worker_seeds))
+
+    @classmethod
+    def from_config(cls: Type['PandemicVectorEnv'],
+                    sim_config: PandemicSimConfig,
+                    pandemic_regulations: Sequence[PandemicRegulation],
+                    num_envs: int,
+                    num_workers: int = 0,
+                    seed: Optional[int] = None,
+                    sim_opts: PandemicSimOpts = PandemicSimOpts(),
+                    reward_fn: Optional[RewardFunction] = None,
+                    done_fn: Optional[DoneFunction] = None,
+                    obs_history_size: int = 1,
+                    non_essential_business_location_ids: Optional[List[LocationID]] = None,
+                    ) -> 'PandemicVectorEnv':
+        """
+        Creates an instance using config. The population is built once, for the prototype environment.
+
+        :param sim_config: Simulator config
+        :param pandemic_regulations: A sequence of pandemic regulations
+        :param num_envs: Number of environments
+        :param num_workers: Number of worker processes (0 to step the environments in the current process)
+        :param seed: Seed of the random number generator that draws the seed of each environment
+        :param sim_opts: Simulator opts
+        :param reward_fn: reward function
+        :param done_fn: done function
+        :param obs_history_size: number of latest sim step states to include in the observation
+        :param non_essential_business_location_ids: an ordered list of non-essential business location ids
+        """
+        env = PandemicGymEnv.from_config(sim_config=sim_config,
+                                         pandemic_regulations=pandemic_regulations,
+                                         sim_opts=sim_opts,
+                                         reward_fn=reward_fn,
+                                         done_fn=done_fn,
+                                         obs_history_size=obs_history_size,
+                                         non_essential_business_location_ids=non_essential_business_location_ids)
+        return cls(env, num_envs=num_envs, num_workers=num_workers, seed=seed)
+
+    @property
+    def num_envs(self) -> int:
+        return self._num_envs
+
+    @property
+    def action_space(self) -> gym.Space:
+        """Action space of a single environment"""
+        return self._action_space
+
+    def _call(self, command: str, data: Any = None) -> List[Any]:
+        # send to all the workers first so that they run in parallel
+        for connection in self._connections:
+            connection.send((command, data))
+        return [result for connection in self._connections for result in connection.recv()]
+
+    def reset(self) -> PandemicObservation:
+        """Reset all the environments and return their stacked observations."""
+        assert not self._closed, 'The environment is closed.'
+        observations = self._env_batch.reset() if self._env_batch is not None else self._call('reset')
+        return PandemicObservation.stack(observations)
+
+    def step(self, actions: Sequence[int]) -> Tuple[PandemicObservation, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Step all the environments with one action each.
+
+        :param actions: A sequence of num_envs actions.
+        :return: A tuple of the stacked observations, the rewards, the done flags and the info dicts of the
+            environments.
+        """
+        assert not self._closed, 'The environment is closed.'
+        assert len(actions) == self._num_envs, f'Expected {self._num_envs} actions, got {len(actions)}.'
+
+        results: List[_StepResult]
+        if self._env_batch is not None:
+            results = self._env_batch.step(actions)
+        else:
+            results = []
+            offset = 0
+            for connection, size in zip(self._connections, self._worker_sizes):
+                connection.send(('step', [int(a) for a in actions[offset:offset + size]]))
+                offset += size
+            for connection in self._connections:
+                results.extend(connection.recv())
+
+        return (PandemicObservation.stack([r[0] for r in results]),
+                np.array([r[1] for r in results], dtype=np.float64),
+                np.array([r[2] for r in results], dtype=bool),
+                [r[3] for r in results])
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._closed:
+            return
+        for connection in self._connections:
+            connection.send(('close', None))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._closed = True
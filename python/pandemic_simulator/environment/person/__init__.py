@@ -4,6 +4,7 @@
 from .base import *
 from .minor import *
 from .retired import *
+from .routine_timetable import *
 from .routine_utils import *
 from .worker import *
 from .student import *
@@ -1,12 +1,12 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 import dataclasses
 from copy import deepcopy
-from typing import Optional, List, Sequence, cast
-
-import numpy as np
+from typing import Any, Optional, List, Sequence
 
+from .routine_timetable import RoutineTimetable
 from ..interfaces import Person, PersonID, PersonState, LocationID, Risk, Registry, PandemicRegulation, \
-    SimTime, NoOP, NOOP, SimTimeTuple, PandemicTestResult, ContactTracer, globals
+    SimTime, NoOP, NOOP, SimTimeTuple, PandemicTestResult, ContactTracer, BufferedRandom, PersonRoutineWithStatus, \
+    globals
 from ..location import Cemetery, Hospital
 
 __all__ = ['BasePerson']
@@ -16,11 +16,12 @@ class BasePerson(Person):
     """Class that partially implements a sim person. """
 
     _id: PersonID
+    _index: int
     _home: LocationID
     _registry: Registry
     _night_hours: SimTimeTuple
     _init_state: PersonState
-    _numpy_rng: np.random.RandomState
+    _numpy_rng: BufferedRandom
 
     _state: PersonState
     _cemetery_ids: List[LocationID]
@@ -29,6 +30,12 @@ class BasePerson(Person):
     _regulation_compliance_prob: float
     _go_home: bool
 
+    _wake_time_horizon: int = 7 * 24
+    """The maximum number of hours to look ahead for the next wake time of the person."""
+
+    _routine_timetables: Optional[List[RoutineTimetable]] = None
+    """A timetable per routine list of the person (see compile_routines), None if the routines are not compiled."""
+
     def __init__(self,
                  person_id: PersonID,
                  home: LocationID,
@@ -42,18 +49,19 @@ class BasePerson(Person):
         """
         assert globals.registry, 'No registry found. Create the repo wide registry first by calling init_globals()'
         self._registry = globals.registry
-        self._numpy_rng = globals.numpy_rng
+        self._numpy_rng = globals.random_streams.buffered('persons')
 
         self._id = person_id
         self._home = home
         self._regulation_compliance_prob = regulation_compliance_prob
         self._init_state = init_state or PersonState(infection_state=None,
                                                      current_location=home,
-                                                     risk=self._numpy_rng.choice([r for r in Risk]),
+                                                     risk=globals.numpy_rng.choice([r for r in Risk]),
                                                      infection_spread_multiplier=self._regulation_compliance_prob)
 
         self._state = deepcopy(self._init_state)
         self._registry.register_person(self)
+        self._index = self._registry.person_index(person_id)
 
         self._cemetery_ids = list(self._registry.location_ids_of_type(Cemetery))
         self._hospital_ids = list(self._registry.location_ids_of_type(Hospital))
@@ -70,6 +78,11 @@ class BasePerson(Person):
     def id(self) -> PersonID:
         return self._id
 
+    @property
+    def index(self) -> int:
+        """Return the index of the person in the registry (see Registry.person_index)."""
+        return self._index
+
     @property
     def state(self) -> PersonState:
         return self._state
@@ -78,6 +91,11 @@ class BasePerson(Person):
     def home(self) -> LocationID:
         return self._home
 
+    @property
+    def numpy_rng(self) -> BufferedRandom:
+        """Return the random number generator of the person (the 'persons' stream of the globals)"""
+        return self._numpy_rng
+
     @property
     def at_home(self) -> bool:
         """Return True if the person is at home and False otherwise"""
@@ -93,6 +111,85 @@ class BasePerson(Person):
                 self._registry.is_location_open_for_visitors(self._state.current_location, sim_time)):
             self._go_home = True
 
+    def _routine_lists(self) -> Sequence[List[PersonRoutineWithStatus]]:
+        """Return the routine lists of the person. The base person has no routines."""
+        return ()
+
+    def compile_routines(self) -> None:
+        self._routine_timetables = [RoutineTimetable(routines) for routines in self._routine_lists()]
+
+    def _recompile_routines(self) -> None:
+        """Compile the routines again if they were compiled, e.g. after routines were added."""
+        if self._routine_timetables is not None:
+            self.compile_routines()
+
+    def _refresh_routine_timetables(self) -> None:
+        """Refresh the timetables after the status of the routines was set, e.g. on restore or reset."""
+        if self._routine_timetables is not None:
+            for timetable in self._routine_timetables:
+                timetable.refresh()
+
+    def _sync_routines(self, sim_time: SimTime) -> None:
+        """Sync the status of the routines of the person with time."""
+        if self._routine_timetables is None:
+            for routines in self._routine_lists():
+                for rws in routines:
+                    rws.sync(sim_time=sim_time, person_state=self._state)
+        else:
+            for timetable in self._routine_timetables:
+                timetable.sync(sim_time=sim_time, person_state=self._state)
+
+    def _routines_to_execute(self, routines: List[PersonRoutineWithStatus]) -> Sequence[PersonRoutineWithStatus]:
+        """Return the routines of the given routine list to pass to execute_routines, only the active routines of its
+        timetable if the routines are compiled."""
+        if self._routine_timetables is not None:
+            for timetable in self._routine_timetables:
+                if timetable.routines_with_status is routines:
+                    return timetable.active_routines
+        return routines
+
+    def _waits_for_external_event(self) -> bool:
+        """Return True if only an infection update or a new regulation can change what the step of the person does."""
+        test_result = self._state.test_result
+        if test_result == PandemicTestResult.DEAD:
+            return len(self._cemetery_ids) == 0 or self._state.current_location in self._cemetery_ids
+        return (test_result == PandemicTestResult.CRITICAL and self._state.infection_state is not None and
+                self._state.infection_state.is_hospitalized)
+
+    def _needs_hourly_step(self) -> bool:
+        """Return True if the base policy of the person can act in the next step."""
+        state = self._state
+        if (
+                # move to a cemetery or a hospital, or leave the hospital
+                state.test_result in {PandemicTestResult.DEAD, PandemicTestResult.CRITICAL} or
+                (state.infection_state is not None and state.infection_state.is_hospitalized) or
+
+                # go home or clear the quarantined flag
+                self._go_home or self._registry.get_person_quarantined_state(self._id) or
+                state.current_location not in self.assigned_locations
+        ):
+            return True
+
+        # quarantine
+        return not self.at_home and (state.quarantine or
+                                     state.quarantine_if_household_quarantined or
+                                     state.quarantine_if_contact_positive or
+                                     (state.sick_at_home and state.test_result == PandemicTestResult.POSITIVE))
+
+    def _next_time_tuple_change_hours(self, sim_time: SimTime, time_tuple: SimTimeTuple, in_time_tuple: bool) -> int:
+        """Return the first sim time (in hours) after the given one at which the sim time enters or leaves the time
+        tuple, bounded by the wake time horizon."""
+        sim_hours = sim_time.in_hours()
+        for hours in range(sim_hours + 1, sim_hours + self._wake_time_horizon):
+            if time_tuple.contains_hours(hours) != in_time_tuple:
+                return hours
+        return sim_hours + self._wake_time_horizon
+
+    def next_wake_time(self, sim_time: SimTime) -> Optional[SimTime]:
+        if self._waits_for_external_event():
+            return None
+        return SimTime.from_hours(sim_time.in_hours() + 1)
+
     def _set_is_hospitalized(self, value: bool) -> None:
         inf_state_dict = dataclasses.asdict(self._state.infection_state)
         inf_state_dict['is_hospitalized'] = value
@@ -110,7 +207,7 @@ class BasePerson(Person):
         if test_result == PandemicTestResult.DEAD:
             # the person is dead - if there is a cemetery and the person is not there then move the person there.
             if len(self._cemetery_ids) > 0 and curr_loc not in self._cemetery_ids:
-                self.enter_location(self._cemetery_ids[self._numpy_rng.randint(0, len(self._cemetery_ids))])
+                self.enter_location(self._cemetery_ids[self._numpy_rng.integers(0, len(self._cemetery_ids))])
                 self._set_is_hospitalized(False)
             # nothing more to do since the person is dead - return None
             return None
@@ -153,7 +250,7 @@ class BasePerson(Person):
 
                 # quarantine if contact positive
                 (contact_tracer is not None and self._state.quarantine_if_contact_positive and not self.at_home and
-                 self._contact_positive(list(contact_tracer.get_contacts(self.id).keys())))
+                 contact_tracer.has_positive_contact(self._id))
         ):
             self.enter_location(self.home)
             self._registry.quarantine_person(self._id)
@@ -179,39 +276,31 @@ class BasePerson(Person):
         self._state.infection_spread_multiplier = (
                 1 - (1 - self._state.infection_spread_multiplier) * self._regulation_compliance_prob)
 
-    def _contact_positive(self, contacts: Sequence[PersonID]) -> bool:
-        for contact in contacts:
-            if self._registry.get_person_test_result(contact) in {PandemicTestResult.POSITIVE,
-                                                                  PandemicTestResult.CRITICAL}:
-                return True
-
-        return False
-
     def _household_quarantined(self) -> bool:
-        for hh in self._registry.get_households(self._id):
-            if self._registry.get_person_quarantined_state(hh):
-                return True
-
-        return False
+        return self._registry.is_household_quarantined(self._id)
 
     def get_social_gathering_location(self) -> Optional[LocationID]:
         ags = self._state.avoid_gathering_size
-        loc_ids = self._registry.location_ids_with_social_events
-        num_events = len(loc_ids)
         comply_to_regulation = (self._numpy_rng.uniform() < self._regulation_compliance_prob)
 
         if comply_to_regulation and ags == 0:
             return None
 
-        if num_events != 0:
-            for i in self._numpy_rng.permutation(num_events):
-                if (
-                        ags == -1 or
-                        not comply_to_regulation or
-                        (comply_to_regulation and len(self._registry.get_persons_in_location(loc_ids[i])) < ags)
-                ):
-                    return cast(LocationID, loc_ids[i])
-        return None
+        # pick one of the gatherings the person can attend uniformly at random
+        if comply_to_regulation and ags != -1:
+            loc_ids = self._registry.location_ids_with_social_events_below(ags)
+        else:
+            loc_ids = self._registry.location_ids_with_social_events
+        if len(loc_ids) == 0:
+            return None
+        return loc_ids[self._numpy_rng.integers(0, len(loc_ids))]
+
+    def snapshot(self) -> Any:
+        return self._state.snapshot(), self._go_home
+
+    def restore(self, snapshot: Any) -> None:
+        state_snapshot, self._go_home = snapshot
+        self._state.restore(state_snapshot)
 
     def reset(self) -> None:
         self._state = deepcopy(self._init_state)
@@ -1,8 +1,8 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
-from typing import Optional, Sequence, List
+from typing import Any, Optional, Sequence, List
 
 from .base import BasePerson
-from .routine_utils import execute_routines
+from .routine_utils import execute_routines, next_routine_event_hours, routines_need_hourly_steps
 from ..interfaces import PersonRoutineWithStatus, PersonState, LocationID, SimTime, NoOP, SimTimeTuple, \
     NOOP, PersonRoutine, ContactTracer, PersonID
 
@@ -66,12 +66,15 @@ class Minor(BasePerson):
             if routine not in self._routines:
                 self._routines.append(routine)
                 self._outside_school_rs.append(PersonRoutineWithStatus(routine))
+        self._recompile_routines()
+
+    def _routine_lists(self) -> Sequence[List[PersonRoutineWithStatus]]:
+        return self._outside_school_rs,
 
     def _sync(self, sim_time: SimTime) -> None:
         super()._sync(sim_time)
 
-        for rws in self._outside_school_rs:
-            rws.sync(sim_time=sim_time, person_state=self.state)
+        self._sync_routines(sim_time)
 
     def step(self, sim_time: SimTime, contact_tracer: Optional[ContactTracer] = None) -> Optional[NoOP]:
         step_ret = super().step(sim_time, contact_tracer)
@@ -84,7 +87,7 @@ class Minor(BasePerson):
                 return None
         else:
             # execute outside school routines
-            ret = execute_routines(person=self, routines_with_status=self._outside_school_rs)
+            ret = execute_routines(person=self, routines_with_status=self._routines_to_execute(self._outside_school_rs))
             if ret != NOOP:
                 return ret
 
@@ -95,7 +98,39 @@ class Minor(BasePerson):
 
         return NOOP
 
+    def next_wake_time(self, sim_time: SimTime) -> Optional[SimTime]:
+        if self._waits_for_external_event():
+            return None
+
+        # the outside school routines are only executed outside school time
+        routines = self._outside_school_rs
+        if self.school is not None and sim_time in self._school_time:
+            if not self.at_school or self._needs_hourly_step():
+                return SimTime.from_hours(sim_time.in_hours() + 1)
+            school_time = True
+        else:
+            if not self.at_home or routines_need_hourly_steps(routines) or self._needs_hourly_step():
+                return SimTime.from_hours(sim_time.in_hours() + 1)
+            school_time = False
+
+        # wake up when the school time starts or ends, or when the status of a routine changes
+        sim_hours = sim_time.in_hours()
+        horizon_hours = (self._next_time_tuple_change_hours(sim_time, self._school_time, school_time)
+                         if self.school is not None else sim_hours + self._wake_time_horizon)
+        return SimTime.from_hours(next_routine_event_hours(routines, sim_hours + 1, horizon_hours))
+
+    def snapshot(self) -> Any:
+        return super().snapshot(), [rws.snapshot() for rws in self._outside_school_rs]
+
+    def restore(self, snapshot: Any) -> None:
+        base_snapshot, routine_snapshots = snapshot
+        super().restore(base_snapshot)
+        for rws, routine_snapshot in zip(self._outside_school_rs, routine_snapshots):
+            rws.restore(routine_snapshot)
+        self._refresh_routine_timetables()
+
     def reset(self) -> None:
         super().reset()
         for rws in self._outside_school_rs:
             rws.reset()
+        self._refresh_routine_timetables()
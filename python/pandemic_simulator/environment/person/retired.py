@@ -1,9 +1,9 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
 
-from typing import Optional, Sequence, List
+from typing import Any, Optional, Sequence, List
 
 from .base import BasePerson
-from .routine_utils import execute_routines
+from .routine_utils import execute_routines, next_routine_event_hours, routines_need_hourly_steps
 from ..interfaces import LocationID, SimTime, NoOP, NOOP, PersonState, PersonRoutine, ContactTracer, PersonID, \
     PersonRoutineWithStatus
 
@@ -35,11 +35,13 @@ class Retired(BasePerson):
                          regulation_compliance_prob=regulation_compliance_prob,
                          init_state=init_state)
 
+    def _routine_lists(self) -> Sequence[List[PersonRoutineWithStatus]]:
+        return self._routines_with_status,
+
     def _sync(self, sim_time: SimTime) -> None:
         super()._sync(sim_time)
 
-        for rws in self._routines_with_status:
-            rws.sync(sim_time=sim_time, person_state=self.state)
+        self._sync_routines(sim_time)
 
     def set_routines(self, routines: Sequence[PersonRoutine]) -> None:
         """A sequence of person routines to execute"""
@@ -47,6 +49,7 @@ class Retired(BasePerson):
             if routine not in self._routines:
                 self._routines.append(routine)
                 self._routines_with_status.append(PersonRoutineWithStatus(routine))
+        self._recompile_routines()
 
     def step(self, sim_time: SimTime, contact_tracer: Optional[ContactTracer] = None) -> Optional[NoOP]:
         step_ret = super().step(sim_time, contact_tracer)
@@ -54,7 +57,7 @@ class Retired(BasePerson):
             return step_ret
 
         # execute routines
-        ret = execute_routines(person=self, routines_with_status=self._routines_with_status)
+        ret = execute_routines(person=self, routines_with_status=self._routines_to_execute(self._routines_with_status))
         if ret != NOOP:
             return ret
 
@@ -65,7 +68,31 @@ class Retired(BasePerson):
 
         return NOOP
 
+    def next_wake_time(self, sim_time: SimTime) -> Optional[SimTime]:
+        if self._waits_for_external_event():
+            return None
+
+        routines = self._routines_with_status
+        if not self.at_home or routines_need_hourly_steps(routines) or self._needs_hourly_step():
+            return SimTime.from_hours(sim_time.in_hours() + 1)
+
+        # wake up when the status of a routine changes
+        sim_hours = sim_time.in_hours()
+        return SimTime.from_hours(next_routine_event_hours(routines, sim_hours + 1,
+                                                           sim_hours + self._wake_time_horizon))
+
+    def snapshot(self) -> Any:
+        return super().snapshot(), [rws.snapshot() for rws in self._routines_with_status]
+
+    def restore(self, snapshot: Any) -> None:
+        base_snapshot, routine_snapshots = snapshot
+        super().restore(base_snapshot)
+        for rws, routine_snapshot in zip(self._routines_with_status, routine_snapshots):
+            rws.restore(routine_snapshot)
+        self._refresh_routine_timetables()
+
     def reset(self) -> None:
         super().reset()
         for rws in self._routines_with_status:
             rws.reset()
+        self._refresh_routine_timetables()
@@ -0,0 +1,92 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import List, Optional, Sequence, Tuple
+
+from ..interfaces import PersonRoutineWithStatus, PersonState, RoutineTrigger, SimTime, SimTimeRoutineTrigger
+
+__all__ = ['RoutineTimetable']
+
+_HOURS_PER_WEEK = 7 * 24
+
+
+def _weekly_trigger_hours(trigger: RoutineTrigger) -> Optional[Sequence[int]]:
+    """Return the hours of the week at which the trigger can fire, or None if they do not repeat every week."""
+    if not isinstance(trigger, SimTimeRoutineTrigger):
+        return None
+    period = trigger.in_hours()
+    if _HOURS_PER_WEEK % period != 0:
+        return None
+    return range((trigger.offset_day * 24 + trigger.offset_hour) % period, _HOURS_PER_WEEK, period)
+
+
+class RoutineTimetable:
+    """An hour-of-week index of a list of routines of a person, such that a step only syncs the routines whose status
+    can change at that hour instead of all the routines of the person.
+
+    The status of a routine changes at a sync only if its start trigger fires within its valid time (it becomes due),
+    if its reset trigger fires while it is done (it is reset), or if it is due (it can leave its valid time). The
+    hours of the week of the first two events are compiled from the triggers and valid times, and the due or ongoing
+    routines are tracked as the active routines of the timetable. Routines whose triggers or valid time do not repeat
+    every week (e.g. a trigger that is not sim time based or a valid time with days) are synced every hour. The index
+    assumes that the week day of the synced sim times follows their hours, as for the sim times stepped by the
+    simulator.
+
+    The timetable only depends on the triggers and valid times of the routines, it has to be compiled again when
+    routines are added to the list, and refreshed when the status of the routines is set outside of sync and
+    execute_routines (e.g. on restore or reset)."""
+
+    _routines: List[PersonRoutineWithStatus]
+    _slots: List[Tuple[int, ...]]
+    _active: List[int]
+
+    def __init__(self, routines_with_status: List[PersonRoutineWithStatus]):
+        """
+        :param routines_with_status: The routine list of the person. The list is referenced, not copied.
+        """
+        self._routines = routines_with_status
+
+        slots: List[List[int]] = [[] for _ in range(_HOURS_PER_WEEK)]
+        for index, rws in enumerate(routines_with_status):
+            routine = rws.routine
+            start_hours = _weekly_trigger_hours(routine.start_trigger)
+            reset_hours = _weekly_trigger_hours(routine.reset_when_done_trigger)
+            if start_hours is None or reset_hours is None or routine.valid_time.days is not None:
+                week_hours: Sequence[int] = range(_HOURS_PER_WEEK)
+            else:
+                # the day of the week of an hour of the week is its day, so contains_hours checks the week day
+                week_hours = sorted({h for h in start_hours if routine.valid_time.contains_hours(h)}.union(reset_hours))
+            for week_hour in week_hours:
+                slots[week_hour].append(index)
+        self._slots = [tuple(slot) for slot in slots]
+        self.refresh()
+
+    @property
+    def routines_with_status(self) -> List[PersonRoutineWithStatus]:
+        """Return the indexed routine list."""
+        return self._routines
+
+    @property
+    def active_routines(self) -> List[PersonRoutineWithStatus]:
+        """Return the due or ongoing routines, in the order of the routine list. Executing the active routines is the
+        same as executing the whole list."""
+        routines = self._routines
+        return [routines[index] for index in self._active]
+
+    def refresh(self) -> None:
+        """Recompute the active routines from the status of the routines."""
+        self._active = [index for index, rws in enumerate(self._routines)
+                        if rws.due or (rws.started and not rws.done)]
+
+    def sync(self, sim_time: SimTime, person_state: Optional[PersonState] = None) -> None:
+        """Sync the routines whose status can change at the given sim time, which is the same as syncing all of them."""
+        candidates: Sequence[int] = self._slots[sim_time.in_hours() % _HOURS_PER_WEEK]
+        if self._active:
+            candidates = sorted(set(candidates).union(self._active))
+
+        routines = self._routines
+        active = []
+        for index in candidates:
+            rws = routines[index]
+            rws.sync(sim_time=sim_time, person_state=person_state)
+            if rws.due or (rws.started and not rws.done):
+                active.append(index)
+        self._active = active
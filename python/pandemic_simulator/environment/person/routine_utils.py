@@ -5,7 +5,8 @@ from .base import BasePerson
 from ..interfaces import PersonRoutineWithStatus, NoOP, NOOP, LocationID, SpecialEndLoc, globals, PersonRoutine, \
     SimTimeTuple, SimTimeRoutineTrigger, RoutineTrigger
 
-__all__ = ['execute_routines', 'triggered_routine', 'weekend_routine', 'mid_day_during_week_routine', 'social_routine']
+__all__ = ['execute_routines', 'routines_need_hourly_steps', 'next_routine_event_hours', 'triggered_routine',
+           'weekend_routine', 'mid_day_during_week_routine', 'social_routine']
 
 
 def execute_routines(person: BasePerson, routines_with_status: Sequence[PersonRoutineWithStatus]) -> Optional[NoOP]:
@@ -18,7 +19,7 @@ def execute_routines(person: BasePerson, routines_with_status: Sequence[PersonRo
     :return: returns a NOOP if none of the routines were executed (typically happens when the routines
         conditions are not met), otherwise None.
     """
-    numpy_rng = globals.numpy_rng
+    numpy_rng = person.numpy_rng
     # the overall flow is that if a routine is due, start it and block the execution of other routines
     # until it has completed
 
@@ -58,7 +59,7 @@ def execute_routines(person: BasePerson, routines_with_status: Sequence[PersonRo
                     end_loc = cast(LocationID, routine.end_loc)
 
                 if (len(routine.explorable_end_locs) > 0) and (numpy_rng.uniform() < routine.explore_probability):
-                    end_loc = routine.explorable_end_locs[numpy_rng.randint(0, len(routine.explorable_end_locs))]
+                    end_loc = routine.explorable_end_locs[numpy_rng.integers(0, len(routine.explorable_end_locs))]
 
                 assert end_loc
                 if person.enter_location(end_loc):
@@ -71,6 +72,53 @@ def execute_routines(person: BasePerson, routines_with_status: Sequence[PersonRo
     return NOOP
 
 
+def routines_need_hourly_steps(routines_with_status: Sequence[PersonRoutineWithStatus]) -> bool:
+    """
+    Return True if any of the given routines can act when executed in the next step, i.e. if it is due or ongoing.
+
+    :param routines_with_status: a sequence of PersonRoutineWithStatus instances
+    :return: True if the routines need to be executed every hour
+    """
+    return any(rws.due or (rws.started and not rws.done) for rws in routines_with_status)
+
+
+def next_routine_event_hours(routines_with_status: Sequence[PersonRoutineWithStatus], sim_hours: int,
+                             horizon_hours: int) -> int:
+    """
+    Return the first sim time (in hours) in [sim_hours, horizon_hours) at which the sync of any of the given routines
+    changes its status (it becomes due, stops being due or is reset), or horizon_hours if there is no such event. The
+    events of triggers that are not sim time based are not known in advance, sim_hours is returned for those.
+
+    :param routines_with_status: a sequence of PersonRoutineWithStatus instances
+    :param sim_hours: sim time in hours (see SimTime.in_hours) to start looking for events
+    :param horizon_hours: sim time in hours to stop looking for events
+    :return: sim time in hours of the next routine event
+    """
+    for rws in routines_with_status:
+        routine = rws.routine
+        if rws.done:
+            trigger = routine.reset_when_done_trigger
+            if not isinstance(trigger, SimTimeRoutineTrigger):
+                return sim_hours
+            horizon_hours = min(horizon_hours, trigger.next_trigger_hours(sim_hours))
+        elif rws.due:
+            # a due routine stays due until it is started or leaves its valid time
+            hours = sim_hours
+            while hours < horizon_hours and routine.valid_time.contains_hours(hours):
+                hours += 1
+            horizon_hours = hours
+        elif not rws.started:
+            # the routine becomes due at the first start trigger within its valid time
+            trigger = routine.start_trigger
+            if not isinstance(trigger, SimTimeRoutineTrigger):
+                return sim_hours
+            hours = trigger.next_trigger_hours(sim_hours)
+            while hours < horizon_hours and not routine.valid_time.contains_hours(hours):
+                hours = trigger.next_trigger_hours(hours + 1)
+            horizon_hours = min(horizon_hours, hours)
+    return horizon_hours
+
+
 def _get_locations_from_type(location_type: Type) -> Tuple[LocationID, Sequence[LocationID]]:
     assert globals.registry, 'No registry found. Create the repo wide registry first by calling init_globals()'
     explorable_end_locs = globals.registry.location_ids_of_type(location_type)
@@ -1,8 +1,8 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
-from typing import Optional, Sequence, List
+from typing import Any, Optional, Sequence, List
 
 from .base import BasePerson
-from .routine_utils import execute_routines
+from .routine_utils import execute_routines, next_routine_event_hours, routines_need_hourly_steps
 from ..interfaces import PersonState, LocationID, SimTime, NoOP, SimTimeTuple, NOOP, PersonRoutine, \
     ContactTracer, PersonID, PersonRoutineWithStatus
 
@@ -66,6 +66,7 @@ class Worker(BasePerson):
             if routine not in self._routines:
                 self._routines.append(routine)
                 self._during_work_rs.append(PersonRoutineWithStatus(routine))
+        self._recompile_routines()
 
     def set_outside_work_routines(self, routines: Sequence[PersonRoutine]) -> None:
         """A sequence of person routines to run outside work time"""
@@ -73,12 +74,15 @@ class Worker(BasePerson):
             if routine not in self._routines:
                 self._routines.append(routine)
                 self._outside_work_rs.append(PersonRoutineWithStatus(routine))
+        self._recompile_routines()
+
+    def _routine_lists(self) -> Sequence[List[PersonRoutineWithStatus]]:
+        return self._during_work_rs, self._outside_work_rs
 
     def _sync(self, sim_time: SimTime) -> None:
         super()._sync(sim_time)
 
-        for rws in self._during_work_rs + self._outside_work_rs:
-            rws.sync(sim_time=sim_time, person_state=self.state)
+        self._sync_routines(sim_time)
 
     def step(self, sim_time: SimTime, contact_tracer: Optional[ContactTracer] = None) -> Optional[NoOP]:
         step_ret = super().step(sim_time, contact_tracer)
@@ -87,7 +91,7 @@ class Worker(BasePerson):
 
         if sim_time in self._work_time:
             # execute during work routines
-            ret = execute_routines(person=self, routines_with_status=self._during_work_rs)
+            ret = execute_routines(person=self, routines_with_status=self._routines_to_execute(self._during_work_rs))
             if ret != NOOP:
                 return ret
 
@@ -96,7 +100,7 @@ class Worker(BasePerson):
                 return None
         else:
             # execute outside work time routines
-            ret = execute_routines(person=self, routines_with_status=self._outside_work_rs)
+            ret = execute_routines(person=self, routines_with_status=self._routines_to_execute(self._outside_work_rs))
             if ret != NOOP:
                 return ret
 
@@ -107,7 +111,34 @@ class Worker(BasePerson):
 
         return NOOP
 
+    def next_wake_time(self, sim_time: SimTime) -> Optional[SimTime]:
+        if self._waits_for_external_event():
+            return None
+
+        # only the routines of the current time (during or outside work) are executed
+        work_time = sim_time in self._work_time
+        if ((not self.at_work if work_time else not self.at_home) or
+                routines_need_hourly_steps(self._during_work_rs if work_time else self._outside_work_rs) or
+                self._needs_hourly_step()):
+            return SimTime.from_hours(sim_time.in_hours() + 1)
+
+        # wake up when the work time starts or ends, or when the status of a routine changes
+        horizon_hours = self._next_time_tuple_change_hours(sim_time, self._work_time, work_time)
+        return SimTime.from_hours(next_routine_event_hours(self._during_work_rs + self._outside_work_rs,
+                                                           sim_time.in_hours() + 1, horizon_hours))
+
+    def snapshot(self) -> Any:
+        return super().snapshot(), [rws.snapshot() for rws in self._during_work_rs + self._outside_work_rs]
+
+    def restore(self, snapshot: Any) -> None:
+        base_snapshot, routine_snapshots = snapshot
+        super().restore(base_snapshot)
+        for rws, routine_snapshot in zip(self._during_work_rs + self._outside_work_rs, routine_snapshots):
+            rws.restore(routine_snapshot)
+        self._refresh_routine_timetables()
+
     def reset(self) -> None:
         super().reset()
         for rws in self._during_work_rs + self._outside_work_rs:
             rws.reset()
+        self._refresh_routine_timetables()
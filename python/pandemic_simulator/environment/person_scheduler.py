@@ -0,0 +1,73 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+__all__ = ['PersonScheduler']
+
+
+class PersonScheduler:
+    """A time-bucketed wake-up queue of persons (given by their index in the simulator). Persons are put in the bucket
+    of their next wake time (in sim hours) and persons without a wake time sleep until all persons are woken up."""
+
+    _num_persons: int
+    _buckets: Dict[int, List[int]]
+    _bucket_hours: List[int]
+
+    def __init__(self, num_persons: int, sim_hours: int = 0):
+        """
+        :param num_persons: Number of persons to schedule.
+        :param sim_hours: Sim time (in hours) at which all persons are initially due.
+        """
+        self._num_persons = num_persons
+        self.wake_all(sim_hours)
+
+    def schedule(self, person_index: int, wake_hours: Optional[int]) -> None:
+        """
+        Schedule a person that is not in the queue.
+
+        :param person_index: Index of the person.
+        :param wake_hours: Sim time (in hours) to wake up the person. If None, the person sleeps until wake_all.
+        """
+        if wake_hours is None:
+            return
+        bucket = self._buckets.get(wake_hours)
+        if bucket is None:
+            bucket = self._buckets[wake_hours] = []
+            heapq.heappush(self._bucket_hours, wake_hours)
+        bucket.append(person_index)
+
+    def pop_due(self, sim_hours: int) -> List[int]:
+        """
+        Remove and return the persons that are due at (or before) the given sim time.
+
+        :param sim_hours: Sim time in hours.
+        :return: Sorted indices of the due persons.
+        """
+        due: List[int] = []
+        while self._bucket_hours and self._bucket_hours[0] <= sim_hours:
+            due.extend(self._buckets.pop(heapq.heappop(self._bucket_hours)))
+        due.sort()
+        return due
+
+    def wake_all(self, sim_hours: int) -> None:
+        """
+        Make all persons due at the given sim time, including the sleeping ones.
+
+        :param sim_hours: Sim time in hours.
+        """
+        self._buckets = {sim_hours: list(range(self._num_persons))}
+        self._bucket_hours = [sim_hours]
+
+    def snapshot(self) -> Tuple[Dict[int, List[int]], List[int]]:
+        """Return a copy of the queue that can be restored later."""
+        return {hours: list(bucket) for hours, bucket in self._buckets.items()}, list(self._bucket_hours)
+
+    def restore(self, snapshot: Tuple[Dict[int, List[int]], List[int]]) -> None:
+        """Restore the queue from a snapshot returned by the snapshot method. The snapshot is left untouched."""
+        buckets, bucket_hours = snapshot
+        self._buckets = {hours: list(bucket) for hours, bucket in buckets.items()}
+        self._bucket_hours = list(bucket_hours)
+
+    def __len__(self) -> int:
+        """Return the number of persons in the queue (the sleeping persons are not counted)."""
+        return sum(len(bucket) for bucket in self._buckets.values())
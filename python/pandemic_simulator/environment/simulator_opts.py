@@ -41,5 +41,18 @@ class PandemicSimOpts:
     contact_tracer_history_size: int = 5
     """Contact tracer history size. Only used if use_contact_tracer is True."""
 
+    use_person_scheduler: bool = False
+    """Set to true to only step the persons when their next wake time is due instead of every hour. The steps that are
+    skipped would not change the persons, but the random number stream (and the results for a given seed) differ from
+    the hourly steps."""
+
+    num_location_shards: int = 1
+    """Number of location shards of the contact phase. If larger than one, the contacts and exposures of each shard
+    are computed by a worker process with a random number stream per shard."""
+
+    compile_routines: bool = False
+    """Set to true to compile the routines of each person into an hour-of-week timetable once they are assigned, such
+    that a step only syncs the routines whose status can change at that hour. The results are unchanged."""
+
     infection_threshold: int = 10
     """A threshold used by """
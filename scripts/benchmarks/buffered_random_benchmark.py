@@ -0,0 +1,56 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the scalar draws of the hot loops of the simulator (person compliance, routine starts and
+exploration, testing and infection transitions), comparing scalar calls into a numpy Generator against a BufferedRandom
+source, and the time of one simulated day."""
+import time
+import timeit
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+import pandemic_simulator as ps
+
+NUM_DRAWS = 1000000
+
+
+def draws_per_second(draw: Callable[[], Any]) -> float:
+    return NUM_DRAWS / timeit.timeit(draw, number=NUM_DRAWS)
+
+
+def run_day() -> float:
+    ps.init_globals(seed=0)
+    homes = [ps.env.Home() for _ in range(500)]
+    offices = [ps.env.Office() for _ in range(20)]
+    persons = [ps.env.Worker(person_id=ps.env.PersonID(f'worker_{i}', age=18 + i % 60), home=homes[i % 500].id,
+                             work=offices[i % 20].id)
+               for i in range(2000)]
+    locations: List[ps.env.Location] = [*homes, *offices]
+    sim = ps.env.PandemicSim(locations=locations, persons=persons)
+    sim.impose_regulation(ps.sh.austin_regulations[0])
+    start = time.time()
+    sim.step_day()
+    return time.time() - start
+
+
+def run_benchmark() -> None:
+    generator = np.random.default_rng(0)
+    buffered = ps.env.BufferedRandom(np.random.default_rng(0))
+
+    draws: List[Tuple[str, Callable[[], Any], Callable[[], Any]]] = [
+        ('uniform()', lambda: generator.uniform(), lambda: buffered.uniform()),
+        ('normal(0.5, 0.1)', lambda: generator.normal(0.5, 0.1), lambda: buffered.normal(0.5, 0.1)),
+        ('integers(0, 10)', lambda: generator.integers(0, 10), lambda: buffered.integers(0, 10)),
+    ]
+
+    print('draws per second')
+    for name, generator_draw, buffered_draw in draws:
+        generator_rate = draws_per_second(generator_draw)
+        buffered_rate = draws_per_second(buffered_draw)
+        print(f'{name:18s} generator: {generator_rate / 1e6:6.2f} M/s   buffered: {buffered_rate / 1e6:6.2f} M/s   '
+              f'speedup: {buffered_rate / generator_rate:5.1f}x')
+
+    print(f'one day of a 2000-person simulator: {run_day():.2f} s')
+
+
+if __name__ == '__main__':
+    run_benchmark()
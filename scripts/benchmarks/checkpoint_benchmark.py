@@ -0,0 +1,57 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the checkpoints of a 100k-person simulator (save_checkpoint and load_checkpoint) and compares
+the time to load a checkpoint with the time to build the simulator."""
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 100000
+PERSONS_PER_HOME = 4
+PERSONS_PER_OFFICE = 100
+NUM_HOURS = 12
+
+
+def make_sim() -> ps.env.PandemicSim:
+    ps.init_globals(seed=0)
+    homes = [ps.env.Home(loc_id=f'home_{i}') for i in range(NUM_PERSONS // PERSONS_PER_HOME)]
+    offices = [ps.env.Office(loc_id=f'office_{i}') for i in range(NUM_PERSONS // PERSONS_PER_OFFICE)]
+    persons = [ps.env.Worker(person_id=ps.env.PersonID(f'worker_{i}', age=18 + i % 60),
+                             home=homes[i // PERSONS_PER_HOME].id,
+                             work=offices[i % len(offices)].id)
+               for i in range(NUM_PERSONS)]
+    locations: List[ps.env.Location] = [*homes, *offices]
+    return ps.env.PandemicSim(locations=locations, persons=persons)
+
+
+def run_benchmark() -> None:
+    start = time.time()
+    sim = make_sim()
+    build_time = time.time() - start
+
+    sim.impose_regulation(ps.sh.austin_regulations[0])
+    for _ in range(NUM_HOURS):
+        sim.step()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'checkpoint.bin'
+        start = time.time()
+        ps.env.save_checkpoint(sim, path)
+        save_time = time.time() - start
+
+        other_sim = make_sim()
+        start = time.time()
+        ps.env.load_checkpoint(other_sim, path)
+        load_time = time.time() - start
+        size = path.stat().st_size
+
+    print(f'{NUM_PERSONS} persons after {NUM_HOURS} hours, checkpoint of {size / 2 ** 20:.1f} MiB')
+    print(f'build: {build_time:8.3f} s')
+    print(f'save:  {save_time:8.3f} s')
+    print(f'load:  {load_time:8.3f} s')
+
+
+if __name__ == '__main__':
+    run_benchmark()
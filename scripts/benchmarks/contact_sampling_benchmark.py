@@ -0,0 +1,72 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the per-hour cost of sampling contacts in a 500-person campus building, comparing the
+enumeration of all possible pairs against the pair-free contact sampler used by the simulator."""
+import copy
+import timeit
+from itertools import combinations, product as cartesianproduct
+
+import numpy as np
+from orderedset import OrderedSet
+
+import pandemic_simulator as ps
+
+NUM_ASSIGNEES = 450
+NUM_VISITORS = 50
+NUM_HOURS = 5
+
+
+def compute_contacts_by_enumeration(location: ps.env.Location, numpy_rng: np.random.Generator) -> OrderedSet:
+    """The contact sampling that enumerates all possible pairs of the location before drawing a few of them."""
+    assignees = location.state.assignees_in_location
+    visitors = location.state.visitors_in_location
+    cr = location.state.contact_rate
+
+    groups = [(assignees, assignees), (assignees, visitors), (visitors, visitors)]
+    constraints = [(cr.min_assignees, cr.fraction_assignees),
+                   (cr.min_assignees_visitors, cr.fraction_assignees_visitors),
+                   (cr.min_visitors, cr.fraction_visitors)]
+
+    contacts: OrderedSet = OrderedSet()
+    for (grp1, grp2), (minimum, fraction) in zip(groups, constraints):
+        possible_contacts = list(combinations(grp1, 2) if grp1 == grp2 else cartesianproduct(grp1, grp2))
+        if len(possible_contacts) == 0:
+            continue
+        fraction_sample = min(1., max(0., numpy_rng.normal(fraction, 1e-2)))
+        real_fraction = max(minimum, int(fraction_sample * len(possible_contacts)))
+        contact_idx = numpy_rng.integers(0, len(possible_contacts), real_fraction)
+        contacts.update([possible_contacts[idx] for idx in contact_idx])
+    return contacts
+
+
+def run_benchmark() -> None:
+    ps.init_globals(seed=0)
+
+    home = ps.env.Home()
+    campus = ps.env.Campus()
+    for i in range(NUM_ASSIGNEES + NUM_VISITORS):
+        person_id = ps.env.PersonID(f'student_{i}', 20)
+        # registered persons (the occupancy of locations holds their registry indices), assigned to the campus or not
+        ps.env.Student(person_id, home=home.id, school=campus.id if i < NUM_ASSIGNEES else None)
+        campus.add_person_to_location(person_id)
+
+    sim = ps.env.PandemicSim(locations=[campus], persons=[])
+
+    # both implementations return the same contacts for the same random state
+    numpy_rng = copy.deepcopy(ps.env.globals.random_streams.stream('contacts'))
+    assert compute_contacts_by_enumeration(campus, numpy_rng) == sim._compute_contacts(campus)
+
+    enumeration_time = timeit.timeit(lambda: compute_contacts_by_enumeration(campus, numpy_rng),
+                                     number=NUM_HOURS) / NUM_HOURS
+    sampler_time = timeit.timeit(lambda: sim._compute_contacts(campus), number=NUM_HOURS) / NUM_HOURS
+    indices_time = timeit.timeit(lambda: sim._compute_contact_indices(campus), number=NUM_HOURS) / NUM_HOURS
+
+    print(f'Campus building with {NUM_ASSIGNEES} assignees and {NUM_VISITORS} visitors '
+          f'({len(sim._compute_contacts(campus))} contacts per hour)')
+    print(f'pair enumeration: {enumeration_time * 1e3:8.2f} ms/hour')
+    print(f'contact sampler:  {sampler_time * 1e3:8.2f} ms/hour')
+    print(f'speedup:          {enumeration_time / sampler_time:8.2f}x')
+    print(f'contact indices only (no id pairs, as used without a contact tracer): {indices_time * 1e3:.2f} ms/hour')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,58 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the contact tracer at campus scale: a week of hourly contacts between 5000 persons traced in
+a 5-day tracer, reporting the time of the tracer operations and the memory held by the traces."""
+import time
+import tracemalloc
+
+import numpy as np
+from orderedset import OrderedSet
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 5000
+CONTACTS_PER_HOUR = 20000
+NUM_DAYS = 7
+NUM_QUERIES = 1000
+
+
+def run_benchmark() -> None:
+    rng = np.random.default_rng(0)
+    person_ids = [ps.env.PersonID(f'student_{i}', 20) for i in range(NUM_PERSONS)]
+    hours = [OrderedSet((person_ids[a], person_ids[b]) for a, b in rng.integers(0, NUM_PERSONS, (CONTACTS_PER_HOUR, 2))
+                        if a != b)
+             for _ in range(24)]
+
+    tracemalloc.start()
+    contact_tracer = ps.env.MaxSlotContactTracer(storage_slots=5, time_slot_scale=24)
+    add_time = slot_time = update_time = 0.
+    for _ in range(NUM_DAYS):
+        for contacts in hours:
+            start = time.time()
+            contact_tracer.add_contacts(contacts)
+            add_time += time.time() - start
+
+            start = time.time()
+            contact_tracer.update_positive_contacts(person_ids[:NUM_PERSONS // 100])
+            update_time += time.time() - start
+        start = time.time()
+        contact_tracer.new_time_slot()
+        slot_time += time.time() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.time()
+    for person_id in person_ids[:NUM_QUERIES]:
+        contact_tracer.get_contacts(person_id)
+    query_time = time.time() - start
+
+    num_hours = NUM_DAYS * 24
+    print(f'{NUM_PERSONS} persons, {CONTACTS_PER_HOUR} contacts per hour, {NUM_DAYS} days')
+    print(f'add_contacts:             {add_time / num_hours * 1e3:8.2f} ms/hour')
+    print(f'update_positive_contacts: {update_time / num_hours * 1e3:8.2f} ms/hour (1% positive persons)')
+    print(f'new_time_slot:            {slot_time / NUM_DAYS * 1e3:8.2f} ms/day')
+    print(f'get_contacts:             {query_time / NUM_QUERIES * 1e6:8.2f} us/person')
+    print(f'memory held by the traces: {memory / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    run_benchmark()
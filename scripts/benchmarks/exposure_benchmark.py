@@ -0,0 +1,89 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the accumulation of the infection probabilities of the contacts of one hour, comparing the
+per-contact python loop against the batched exposure kernel."""
+import copy
+import timeit
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Tuple
+
+import numpy as np
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 10000
+NUM_CONTACTS = 200000
+INFECTIOUS_FRACTION = 0.05
+NUM_HOURS = 5
+
+_Histories = DefaultDict[ps.env.PersonID, List[Tuple[ps.env.LocationID, float]]]
+
+
+def compute_infection_probabilities_by_loop(id_to_state: Dict[ps.env.PersonID, ps.env.PersonState],
+                                            id_to_history: _Histories,
+                                            contacts: List[Tuple[ps.env.PersonID, ps.env.PersonID]]) -> None:
+    """The per-contact accumulation of the infection probabilities, with a list of (location, probability) tuples
+    per person for the attribution of the infections."""
+    infectious_states = {ps.env.InfectionSummary.INFECTED, ps.env.InfectionSummary.CRITICAL}
+
+    for id_person1, id_person2 in contacts:
+        person1_state = id_to_state[id_person1]
+        person2_state = id_to_state[id_person2]
+        person1_inf_state = person1_state.infection_state
+        person2_inf_state = person2_state.infection_state
+
+        if ((person1_inf_state is None and person2_inf_state is None) or
+                (person1_inf_state is not None and person2_inf_state is not None and
+                 person1_inf_state.summary in infectious_states and person2_inf_state.summary in infectious_states)):
+            continue
+        elif person1_inf_state is not None and person1_inf_state.summary in infectious_states:
+            spread_probability = person1_inf_state.spread_probability * person1_state.infection_spread_multiplier
+            person2_state.not_infection_probability *= 1 - spread_probability
+            id_to_history[id_person2].append((person2_state.current_location,
+                                              person2_state.not_infection_probability))
+        elif person2_inf_state is not None and person2_inf_state.summary in infectious_states:
+            spread_probability = person2_inf_state.spread_probability * person2_state.infection_spread_multiplier
+            person1_state.not_infection_probability *= 1 - spread_probability
+            id_to_history[id_person1].append((person1_state.current_location,
+                                              person1_state.not_infection_probability))
+
+
+def compute_infection_probabilities_by_kernel(population_store: ps.env.PopulationStore,
+                                              slots_1: np.ndarray, slots_2: np.ndarray) -> None:
+    """The batched accumulation of the infection probabilities, with the exposure record of the population store for
+    the attribution of the infections."""
+    exposed = ps.env.accumulate_exposures(population_store, slots_1, slots_2)
+    population_store.record_exposures(exposed)
+
+
+def run_benchmark() -> None:
+    rng = np.random.RandomState(0)
+    infected = ps.env.IndividualInfectionState(summary=ps.env.InfectionSummary.INFECTED, spread_probability=0.03)
+
+    person_ids = [ps.env.PersonID(f'person_{i}', 30) for i in range(NUM_PERSONS)]
+    states = [ps.env.PersonState(current_location=ps.env.LocationID(f'location_{i % 100}'), risk=ps.env.Risk.LOW,
+                                 infection_state=infected if rng.uniform() < INFECTIOUS_FRACTION else None)
+              for i in range(NUM_PERSONS)]
+    slots_1, slots_2 = rng.randint(0, NUM_PERSONS, (2, NUM_CONTACTS))
+    contacts = [(person_ids[i], person_ids[j]) for i, j in zip(slots_1.tolist(), slots_2.tolist())]
+
+    loop_states = copy.deepcopy(states)
+    id_to_state = dict(zip(person_ids, loop_states))
+    id_to_history: _Histories = defaultdict(list)
+    loop_time = timeit.timeit(lambda: compute_infection_probabilities_by_loop(id_to_state, id_to_history, contacts),
+                              number=NUM_HOURS) / NUM_HOURS
+
+    population_store = ps.env.PopulationStore()
+    population_store.bind_all(states)
+    kernel_time = timeit.timeit(lambda: compute_infection_probabilities_by_kernel(population_store, slots_1, slots_2),
+                                number=NUM_HOURS) / NUM_HOURS
+
+    assert [st.not_infection_probability for st in states] == [st.not_infection_probability for st in loop_states]
+
+    print(f'{NUM_PERSONS} persons ({INFECTIOUS_FRACTION:.0%} infectious), {NUM_CONTACTS} contacts per hour')
+    print(f'per-contact loop: {loop_time * 1e3:8.2f} ms/hour')
+    print(f'exposure kernel:  {kernel_time * 1e3:8.2f} ms/hour')
+    print(f'speedup:          {loop_time / kernel_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    run_benchmark()
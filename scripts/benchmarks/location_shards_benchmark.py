@@ -0,0 +1,62 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the contact phase of one hour (contact sampling and exposures) of a 100k-person population,
+comparing the in-process computation against location shards computed by a pool of worker processes."""
+import multiprocessing
+import timeit
+from typing import List
+
+import numpy as np
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 100000
+NUM_LOCATIONS = 2000
+INFECTIOUS_FRACTION = 0.05
+NUM_HOURS = 5
+
+
+def run_benchmark() -> None:
+    rng = np.random.RandomState(0)
+    infected = ps.env.IndividualInfectionState(summary=ps.env.InfectionSummary.INFECTED, spread_probability=0.03)
+    states = [ps.env.PersonState(current_location=ps.env.LocationID(f'location_{i % NUM_LOCATIONS}'),
+                                 risk=ps.env.Risk.LOW,
+                                 infection_state=infected if rng.uniform() < INFECTIOUS_FRACTION else None)
+              for i in range(NUM_PERSONS)]
+    population_store = ps.env.PopulationStore()
+    population_store.bind_all(states)
+
+    # every location holds 20% assignees and 80% visitors
+    contact_rate = ps.env.ContactRate(5, 5, 5, 0.1, 0.05, 0.02)
+    locations: List[ps.env.LocationContactTask] = []
+    for i in range(NUM_LOCATIONS):
+        slots = np.arange(i, NUM_PERSONS, NUM_LOCATIONS)
+        num_assignees = len(slots) // 5
+        locations.append((contact_rate, slots[:num_assignees], slots[num_assignees:]))
+
+    columns = {name: getattr(population_store, name).copy() for name in ('infection_summary', 'spread_probability',
+                                                                         'infection_spread_multiplier',
+                                                                         'not_infection_probability')}
+    seed = np.random.SeedSequence(0)
+    serial_time = timeit.timeit(lambda: ps.env.compute_shard_exposures(columns, locations, seed, False),
+                                number=NUM_HOURS) / NUM_HOURS
+    print(f'{NUM_PERSONS} persons in {NUM_LOCATIONS} locations')
+    print(f'in-process:         {serial_time * 1e3:8.2f} ms/hour')
+
+    num_shards = 2
+    while num_shards <= max(multiprocessing.cpu_count(), 2):
+        shard_locations = [locations[shard::num_shards] for shard in range(num_shards)]
+        seeds = seed.spawn(num_shards)
+        location_shards = ps.env.LocationShards(num_shards, NUM_PERSONS)
+        try:
+            sharded_time = timeit.timeit(lambda: location_shards.compute_exposures(population_store, shard_locations,
+                                                                                   seeds),
+                                         number=NUM_HOURS) / NUM_HOURS
+        finally:
+            location_shards.close()
+        print(f'{num_shards:3d} shards:         {sharded_time * 1e3:8.2f} ms/hour '
+              f'(speedup {serial_time / sharded_time:5.2f}x)')
+        num_shards *= 2
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,45 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the daily testing pass over a population, comparing admit_person and test_person called for
+each person against the batched test_population of RandomPandemicTesting."""
+import time
+
+import numpy as np
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 100000
+
+
+def run_benchmark() -> None:
+    ps.init_globals(seed=0)
+    rng = np.random.RandomState(0)
+    summaries = list(ps.env.InfectionSummary)
+    states = []
+    for _ in range(NUM_PERSONS):
+        infection_state = ps.env.IndividualInfectionState(summary=summaries[rng.randint(len(summaries))],
+                                                          spread_probability=0.,
+                                                          shows_symptoms=rng.uniform() < 0.3)
+        states.append(ps.env.PersonState(current_location=ps.env.LocationID('home'), risk=ps.env.Risk.LOW,
+                                         infection_state=infection_state))
+    store = ps.env.PopulationStore()
+    store.bind_all(states)
+    testing = ps.env.RandomPandemicTesting(spontaneous_testing_rate=0.05, symp_testing_rate=0.5)
+
+    start = time.time()
+    for state in states:
+        if testing.admit_person(state):
+            testing.test_person(state)
+    per_person_time = time.time() - start
+
+    start = time.time()
+    testing.test_population(store.infection_summary, store.shows_symptoms, store.is_hospitalized, store.test_result)
+    batch_time = time.time() - start
+
+    print(f'testing pass over {NUM_PERSONS} persons')
+    print(f'per person:      {per_person_time * 1e3:8.2f} ms')
+    print(f'test_population: {batch_time * 1e3:8.2f} ms')
+    print(f'speedup:         {per_person_time / batch_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,56 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks the steps of persons with a growing number of routines per person over one week, comparing
+the sync of all the routines of a person every hour against routines compiled into an hour-of-week timetable."""
+import time
+from typing import List
+
+import pandemic_simulator as ps
+
+NUM_PERSONS = 500
+NUM_ROUTINES = (2, 8, 32)
+
+
+def make_routines(num_routines: int) -> List[ps.env.PersonRoutine]:
+    # routines valid during a few hours of some week days, started daily and reset weekly
+    return [ps.env.triggered_routine(None, ps.env.GroceryStore, 1) if i % 4 == 0 else
+            ps.env.PersonRoutine(start_loc=None,
+                                 end_loc=ps.env.SpecialEndLoc.social,
+                                 valid_time=ps.env.SimTimeTuple(hours=(i % 24, (i + 1) % 24), week_days=(i % 7,)),
+                                 start_trigger=ps.env.SimTimeRoutineTrigger(day=1, offset_hour=i % 24),
+                                 reset_when_done_trigger=ps.env.SimTimeRoutineTrigger(day=7))
+            for i in range(num_routines)]
+
+
+def run_week(num_routines: int, compile_routines: bool) -> float:
+    ps.init_globals(seed=0)
+    homes = [ps.env.Home() for _ in range(NUM_PERSONS // 4)]
+    locations: List[ps.env.Location] = [*homes, ps.env.GroceryStore()]
+    persons = [ps.env.Retired(person_id=ps.env.PersonID(f'retired_{i}', age=70), home=homes[i % len(homes)].id)
+               for i in range(NUM_PERSONS)]
+    for person in persons:
+        person.set_routines(make_routines(num_routines))
+        if compile_routines:
+            person.compile_routines()
+
+    sim_time = ps.env.SimTime()
+    start = time.time()
+    for _ in range(7 * 24):
+        for location in locations:
+            location.sync(sim_time)
+        for person in persons:
+            person.step(sim_time)
+        sim_time.step()
+    return time.time() - start
+
+
+def run_benchmark() -> None:
+    print(f'one week of {NUM_PERSONS} persons')
+    for num_routines in NUM_ROUTINES:
+        full_time = run_week(num_routines, compile_routines=False)
+        compiled_time = run_week(num_routines, compile_routines=True)
+        print(f'{num_routines:3d} routines/person   full sync: {full_time:6.2f} s  timetable: {compiled_time:6.2f} s   '
+              f'speedup: {full_time / compiled_time:5.2f}x')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,35 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+"""This script benchmarks simulator snapshots (PandemicSim.snapshot and PandemicSim.restore) against a deep copy of the
+simulator, after a warm-up of a few days, and compares them with the time to simulate one day."""
+import copy
+import timeit
+
+import pandemic_simulator as ps
+
+WARM_UP_DAYS = 5
+REPEATS = 10
+
+
+def run_benchmark() -> None:
+    ps.init_globals(seed=0)
+    sim_opts = ps.env.PandemicSimOpts(use_contact_tracer=True)
+    sim = ps.env.PandemicSim.from_config(ps.sh.ut_config, sim_opts)
+    sim.impose_regulation(ps.sh.ut_regulations[0])
+    for _ in range(WARM_UP_DAYS):
+        sim.step_day()
+
+    snapshot = sim.snapshot()
+    snapshot_time = timeit.timeit(sim.snapshot, number=REPEATS) / REPEATS
+    restore_time = timeit.timeit(lambda: sim.restore(snapshot), number=REPEATS) / REPEATS
+    deepcopy_time = timeit.timeit(lambda: copy.deepcopy(sim), number=REPEATS) / REPEATS
+    day_time = timeit.timeit(sim.step_day, number=1)
+
+    print(f'{len(sim.population_store)} persons after {WARM_UP_DAYS} days')
+    print(f'snapshot: {snapshot_time * 1e3:8.2f} ms')
+    print(f'restore:  {restore_time * 1e3:8.2f} ms')
+    print(f'deepcopy: {deepcopy_time * 1e3:8.2f} ms')
+    print(f'one day:  {day_time * 1e3:8.2f} ms')
+
+
+if __name__ == '__main__':
+    run_benchmark()
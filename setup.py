@@ -29,7 +29,6 @@ setup(
         'typing-inspect==0.5.0',  # to handle issubclass changes in python 3.7,
 
         'orderedset>=2.0.3',
-        'cachetools>=4.1.0',
         'h5py>=2.10.0',
         'tqdm>=4.48.0',
         'GPyOpt',
@@ -0,0 +1,25 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import Any, Callable, List
+
+import pytest
+
+import pandemic_simulator as ps
+
+
+@pytest.fixture
+def make_sim() -> Callable[..., ps.env.PandemicSim]:
+    """Return a function that builds a small simulator: workers (20 by default) living in 10 homes and working in 2
+    offices, with the globals initialized with seed 0. The keyword arguments of the function other than num_persons
+    and work_offset (which shifts the offices the workers are assigned to) are passed to PandemicSim."""
+
+    def _make_sim(num_persons: int = 20, work_offset: int = 0, **sim_kwargs: Any) -> ps.env.PandemicSim:
+        ps.init_globals(seed=0)
+        homes = [ps.env.Home(loc_id=f'home_{i}') for i in range(10)]
+        offices = [ps.env.Office(loc_id=f'office_{i}') for i in range(2)]
+        persons = [ps.env.Worker(person_id=ps.env.PersonID(f'worker_{i}', age=30 + i), home=homes[i % 10].id,
+                                 work=offices[(i + work_offset) % 2].id)
+                   for i in range(num_persons)]
+        locations: List[ps.env.Location] = [*homes, *offices]
+        return ps.env.PandemicSim(locations=locations, persons=persons, **sim_kwargs)
+
+    return _make_sim
@@ -0,0 +1,61 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pytest
+
+import pandemic_simulator as ps
+
+
+def _run_days(sim: ps.env.PandemicSim, num_days: int) -> List[Tuple]:
+    values = []
+    for _ in range(num_days):
+        sim.step_day()
+        state = sim.state
+        values.append((repr(state.sim_time), state.regulation_stage,
+                       sorted((s.value, n) for s, n in state.global_infection_summary.items()),
+                       [repr(person_state) for person_state in state.id_to_person_state.values()],
+                       [repr(location_state) for location_state in state.id_to_location_state.values()]))
+    return values
+
+
+def test_checkpoint_resumes_run(tmp_path: Path, make_sim: Callable[..., ps.env.PandemicSim]) -> None:
+    sim = make_sim(contact_tracer=ps.env.MaxSlotContactTracer())
+    sim.impose_regulation(ps.sh.austin_regulations[2])
+    _run_days(sim, 2)
+
+    path = tmp_path / 'checkpoint.bin'
+    ps.env.save_checkpoint(sim, path)
+    expected = _run_days(sim, 2)
+
+    # the checkpoint is loaded in a simulator built the same way
+    resumed_sim = make_sim(contact_tracer=ps.env.MaxSlotContactTracer())
+    ps.env.load_checkpoint(resumed_sim, path)
+    assert _run_days(resumed_sim, 2) == expected
+
+    with pytest.raises(ValueError):
+        ps.env.load_checkpoint(make_sim(num_persons=10, contact_tracer=ps.env.MaxSlotContactTracer()), path)
+    # the persons have the same ages but work in other offices
+    with pytest.raises(ValueError):
+        ps.env.load_checkpoint(make_sim(work_offset=1, contact_tracer=ps.env.MaxSlotContactTracer()), path)
+
+
+def test_checkpoint_loads_into_running_sim(tmp_path: Path, make_sim: Callable[..., ps.env.PandemicSim]) -> None:
+    sim = make_sim(contact_tracer=ps.env.MaxSlotContactTracer())
+    _run_days(sim, 1)
+    path = tmp_path / 'checkpoint.bin'
+    ps.env.save_checkpoint(sim, path)
+    expected = _run_days(sim, 2)
+
+    # the location states of the running simulator are decoded in place, its occupancies are cleared or replaced
+    running_sim = make_sim(contact_tracer=ps.env.MaxSlotContactTracer())
+    _run_days(running_sim, 3)
+    for _ in range(5):
+        running_sim.step()
+    ps.env.load_checkpoint(running_sim, path)
+    assert _run_days(running_sim, 2) == expected
+
+    # the checkpoint can be replaced while the arrays of a loaded simulator are mapped from it
+    ps.env.save_checkpoint(running_sim, path)
+    ps.env.load_checkpoint(sim, path)
+    assert _run_days(sim, 1) == _run_days(running_sim, 1)
@@ -0,0 +1,42 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from itertools import combinations, product
+
+import numpy as np
+import pytest
+
+from pandemic_simulator.environment import decode_contact_indices, num_possible_contacts, sample_contact_indices
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 3, 7, 50, 501])
+def test_decode_triangular_contact_indices(n: int) -> None:
+    expected = list(combinations(range(n), 2))
+    assert num_possible_contacts(n) == len(expected)
+
+    i, j = decode_contact_indices(np.arange(len(expected)), n)
+    assert list(zip(i.tolist(), j.tolist())) == expected
+
+
+@pytest.mark.parametrize(['n1', 'n2'], [[1, 1], [3, 5], [40, 2], [0, 4]])
+def test_decode_rectangular_contact_indices(n1: int, n2: int) -> None:
+    expected = list(product(range(n1), range(n2)))
+    assert num_possible_contacts(n1, n2) == len(expected)
+
+    i, j = decode_contact_indices(np.arange(len(expected)), n1, n2)
+    assert list(zip(i.tolist(), j.tolist())) == expected
+
+
+@pytest.mark.parametrize(['n1', 'n2'], [[30, None], [12, 9], [1, None]])
+def test_sample_matches_pair_enumeration(n1: int, n2: int) -> None:
+    minimum, fraction = 3, 0.4
+
+    # reference: enumerate all possible pairs and sample from the list
+    rng = np.random.default_rng(0)
+    possible = list(combinations(range(n1), 2) if n2 is None else product(range(n1), range(n2)))
+    expected = []
+    if len(possible) > 0:
+        fraction_sample = min(1., max(0., rng.normal(fraction, 1e-2)))
+        num_samples = max(minimum, int(fraction_sample * len(possible)))
+        expected = [possible[k] for k in rng.integers(0, len(possible), num_samples)]
+
+    i, j = sample_contact_indices(n1, n2, minimum, fraction, np.random.default_rng(0))
+    assert list(zip(i.tolist(), j.tolist())) == expected
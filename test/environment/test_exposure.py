@@ -0,0 +1,49 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from pandemic_simulator.environment import IndividualInfectionState, InfectionSummary, LocationID, PersonState, \
+    PopulationStore, Risk, accumulate_exposures
+
+
+def _expose_one_by_one(states: List[PersonState], contacts: List[Tuple[int, int]]) -> List[int]:
+    # reference: the per-contact update of the simulator
+    exposed = []
+    infectious_states = {InfectionSummary.INFECTED, InfectionSummary.CRITICAL}
+    for i, j in contacts:
+        inf_1, inf_2 = states[i].infection_state, states[j].infection_state
+        is_infectious_1 = inf_1 is not None and inf_1.summary in infectious_states
+        is_infectious_2 = inf_2 is not None and inf_2.summary in infectious_states
+        if is_infectious_1 == is_infectious_2:
+            continue
+        src, dst = (states[i], states[j]) if is_infectious_1 else (states[j], states[i])
+        assert src.infection_state
+        dst.not_infection_probability *= 1 - src.infection_state.spread_probability * src.infection_spread_multiplier
+        exposed.append(j if is_infectious_1 else i)
+    return exposed
+
+
+def test_accumulate_exposures_matches_one_by_one() -> None:
+    rng = np.random.RandomState(0)
+    summaries: List[Optional[InfectionSummary]] = [None, *InfectionSummary]
+
+    states = []
+    for i in range(60):
+        summary = summaries[rng.randint(len(summaries))]
+        states.append(PersonState(current_location=LocationID(f'loc_{i % 4}'), risk=Risk.LOW,
+                                  infection_state=(None if summary is None else
+                                                   IndividualInfectionState(summary, rng.uniform(0, 0.3))),
+                                  infection_spread_multiplier=rng.uniform(0.5, 1.)))
+    contacts = [(int(i), int(j)) for i, j in rng.randint(0, 60, (500, 2))]
+
+    expected = copy.deepcopy(states)
+    expected_exposed = _expose_one_by_one(expected, contacts)
+
+    store = PopulationStore()
+    store.bind_all(states)
+    exposed = accumulate_exposures(store, np.array([c[0] for c in contacts]), np.array([c[1] for c in contacts]))
+
+    assert exposed.tolist() == expected_exposed
+    assert [st.not_infection_probability for st in states] == [st.not_infection_probability for st in expected]
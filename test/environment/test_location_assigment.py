@@ -1,4 +1,7 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
+import dataclasses
+import pickle
+from typing import List
 
 import pandemic_simulator as ps
 
@@ -23,3 +26,176 @@ def test_register_persons() -> None:
 
     assert (m.id in cr.get_persons_in_location(home_id))
     assert (a.id in cr.get_persons_in_location(home_id))
+
+
+def test_location_ids_of_type() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    home = ps.env.Home()
+    office = ps.env.Office()
+    assert cr.location_ids_of_type(ps.env.Home) == (home.id,)
+
+    # locations registered after a query are returned by the next queries, in registration order
+    other_home = ps.env.Home()
+    school = ps.env.School()
+    assert cr.location_ids_of_type(ps.env.Home) == (home.id, other_home.id)
+    assert cr.location_ids_of_type((ps.env.School, ps.env.Home)) == (home.id, other_home.id, school.id)
+    assert cr.location_ids_of_type(ps.env.BusinessBaseLocation) == (office.id, school.id)
+    assert cr.location_ids_of_type(ps.env.Hospital) == ()
+
+    # a new registry does not see the locations of the previous one
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    assert cr.location_ids_of_type(ps.env.Home) == ()
+
+
+def test_global_location_summary() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    homes = [ps.env.Home(), ps.env.Home()]
+    office = ps.env.Office()
+    ps.env.Cemetery()
+    workers = [ps.env.Worker(ps.env.PersonID(f'worker_{i}', 30), homes[i].id, work=office.id) for i in range(2)]
+    retired = ps.env.Retired(ps.env.PersonID('retired_0', 70), homes[0].id)
+    locations: List[ps.env.Location] = [*homes, office]
+    for location in locations:
+        location.sync(ps.env.SimTime(hour=10))
+
+    assert workers[0].enter_location(office.id)
+    assert workers[1].enter_location(office.id)
+    assert workers[0].enter_location(homes[1].id)
+    assert retired.enter_location(homes[1].id)
+
+    summary = cr.global_location_summary
+    assert len(summary) == 4 and set(summary) == {('Home', 'Worker'), ('Office', 'Worker'), ('Home', 'Retired'),
+                                                   ('Office', 'Retired')}
+    assert summary[('Office', 'Worker')] == ps.env.LocationSummary(entry_count=1., visitor_count=0.)
+    assert summary[('Home', 'Worker')] == ps.env.LocationSummary(entry_count=0.5, visitor_count=0.5)
+    assert summary[('Home', 'Retired')] == ps.env.LocationSummary(entry_count=1., visitor_count=1.)
+
+    # the summary is a view of the counters that follows restore
+    snapshot = cr.snapshot()
+    assert workers[1].enter_location(homes[0].id)
+    assert summary[('Home', 'Worker')] == ps.env.LocationSummary(entry_count=1., visitor_count=1.)
+    cr.restore(snapshot)
+    assert summary[('Home', 'Worker')] == ps.env.LocationSummary(entry_count=0.5, visitor_count=0.5)
+
+
+def test_social_events() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    homes = [ps.env.Home(init_state=ps.env.HomeState(visitor_time=ps.env.SimTimeTuple(hours=(12, 13))))
+             for _ in range(3)]
+    restaurant = ps.env.Restaurant()
+    retired = [ps.env.Retired(ps.env.PersonID(f'retired_{i}', 70), homes[i % 3].id) for i in range(6)]
+
+    # restaurants always advertise a gathering, homes only during their visitor time
+    assert cr.location_ids_with_social_events == [restaurant.id]
+    locations: List[ps.env.Location] = [*homes, restaurant]
+    for location in locations:
+        location.sync(ps.env.SimTime(hour=12, week_day=1))
+    assert cr.location_ids_with_social_events == [*(home.id for home in homes), restaurant.id]
+
+    # the events are ordered by number of persons, which follows the entries
+    assert cr.location_ids_with_social_events_below(1) == [restaurant.id]
+    assert retired[0].enter_location(restaurant.id)
+    assert retired[3].enter_location(restaurant.id)
+    assert retired[4].enter_location(homes[0].id)
+    assert cr.location_ids_with_social_events_below(1) == []
+    assert cr.location_ids_with_social_events_below(2) == [homes[0].id, homes[1].id]
+    assert cr.location_ids_with_social_events_below(3) == [homes[0].id, homes[1].id, homes[2].id, restaurant.id]
+
+    snapshot = cr.snapshot()
+    homes[1].sync(ps.env.SimTime(hour=14, week_day=1))
+    assert cr.location_ids_with_social_events == [homes[0].id, homes[2].id, restaurant.id]
+    cr.restore(snapshot)
+    assert cr.location_ids_with_social_events == [*(home.id for home in homes), restaurant.id]
+
+
+def test_ids_and_indices() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    homes = [ps.env.Home(), ps.env.Home()]
+    persons = [ps.env.Retired(ps.env.PersonID(f'retired_{i}', 70), homes[i % 2].id) for i in range(3)]
+
+    # the ids are indexed densely in registration order
+    assert [cr.location_index(home.id) for home in homes] == [home.index for home in homes] == [0, 1]
+    assert [cr.person_index(person.id) for person in persons] == [person.index for person in persons] == [0, 1, 2]
+    assert list(cr.person_ids_by_index) == [person.id for person in persons]
+    assert list(cr.location_ids_by_index) == [home.id for home in homes]
+
+    # equal ids are interchangeable keys, also after pickling
+    person_id = ps.env.PersonID('retired_1', 70)
+    assert person_id == persons[1].id and hash(person_id) == hash(persons[1].id)
+    assert cr.person_index(pickle.loads(pickle.dumps(person_id))) == 1
+    assert person_id != ps.env.PersonID('retired_1', 71) and homes[0].id != homes[1].id
+
+    # the cached hash is not a field of the ids
+    assert dataclasses.asdict(person_id) == {'name': 'retired_1', 'age': 70}
+    assert dataclasses.astuple(homes[0].id) == (homes[0].id.name,)
+
+
+def test_location_occupancy() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    home = ps.env.Home()
+    other_home = ps.env.Home()
+    persons = [ps.env.Retired(ps.env.PersonID(f'retired_{i}', 70), home.id) for i in range(4)]
+    visitor = ps.env.Retired(ps.env.PersonID('visitor', 70), other_home.id)
+    home.sync(ps.env.SimTime(hour=12))
+    other_home.sync(ps.env.SimTime(hour=12))
+    assert visitor.enter_location(home.id)
+
+    state = home.state
+    assert state.assignee_occupancy.person_ids == [person.id for person in persons]
+    assert state.assignee_occupancy.members.tolist() == [person.index for person in persons]
+    assert list(state.visitor_occupancy) == [visitor.id] and state.visitor_occupancy.members.tolist() == [4]
+    assert state.num_persons_in_location == 5
+    assert state.persons_in_location == {*(person.id for person in persons), visitor.id}
+
+    # a remove moves the last member into the freed position
+    snapshot = home.snapshot()
+    assert persons[3].enter_location(other_home.id)
+    assert persons[0].enter_location(other_home.id)
+    assert state.assignee_occupancy.person_ids == [persons[2].id, persons[1].id]
+    assert state.assignee_occupancy.members.tolist() == [2, 1]
+    assert list(state.assignees_in_location) == [persons[2].id, persons[1].id]
+    assert persons[0].id not in state.assignee_occupancy and persons[0].id in other_home.state.visitor_occupancy
+
+    home.restore(snapshot)
+    assert home.state.assignee_occupancy.person_ids == [person.id for person in persons]
+    assert home.state.assignee_occupancy.members.tolist() == [0, 1, 2, 3]
+
+
+def test_quarantine() -> None:
+    ps.init_globals()
+    cr = ps.env.globals.registry
+    assert cr
+    homes = [ps.env.Home(), ps.env.Home()]
+    persons = [ps.env.Retired(ps.env.PersonID(f'retired_{i}', 70), homes[i % 2].id) for i in range(4)]
+
+    cr.quarantine_person(persons[0].id)
+    cr.quarantine_person(persons[0].id)
+    assert cr.get_person_quarantined_state(persons[0].id) and not cr.get_person_quarantined_state(persons[2].id)
+    assert cr.is_household_quarantined(persons[2].id) and not cr.is_household_quarantined(persons[1].id)
+
+    snapshot = cr.snapshot()
+    cr.quarantine_person(persons[2].id)
+    cr.clear_quarantined(persons[0].id)
+    assert cr.is_household_quarantined(persons[0].id)
+    cr.clear_quarantined(persons[2].id)
+    assert not cr.is_household_quarantined(persons[0].id)
+
+    # persons registered after the snapshot are not quarantined by the restore
+    other_person = ps.env.Retired(ps.env.PersonID('retired_4', 70), homes[1].id)
+    cr.quarantine_person(other_person.id)
+    cr.restore(snapshot)
+    assert [cr.get_person_quarantined_state(person.id) for person in persons] == [True, False, False, False]
+    assert [cr.is_household_quarantined(person.id) for person in persons] == [True, False, True, False]
+    assert not cr.is_household_quarantined(other_person.id)
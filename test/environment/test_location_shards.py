@@ -0,0 +1,45 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import List
+
+import numpy as np
+
+from pandemic_simulator.environment import ContactRate, IndividualInfectionState, InfectionSummary, LocationID, \
+    LocationContactTask, LocationShards, PersonState, PopulationStore, Risk, compute_shard_exposures
+
+
+def test_location_shards_match_serial_shards() -> None:
+    rng = np.random.RandomState(0)
+    num_persons = 200
+    states = [PersonState(current_location=LocationID(f'loc_{i % 10}'), risk=Risk.LOW,
+                          infection_state=(IndividualInfectionState(InfectionSummary.INFECTED, rng.uniform(0, 0.3))
+                                           if rng.uniform() < 0.2 else None))
+              for i in range(num_persons)]
+    store = PopulationStore()
+    store.bind_all(states)
+
+    # ten locations of 20 persons each (12 assignees and 8 visitors), dealt to three shards
+    contact_rate = ContactRate(1, 1, 1, 0.3, 0.2, 0.1)
+    shard_locations: List[List[LocationContactTask]] = [[], [], []]
+    for i in range(10):
+        slots = np.arange(i, num_persons, 10)
+        shard_locations[i % 3].append((contact_rate, slots[:12], slots[12:]))
+    seeds = np.random.SeedSequence(11).spawn(3)
+
+    # reference: compute the shards one after the other on a copy of the columns
+    columns = {name: getattr(store, name).copy() for name in ('infection_summary', 'spread_probability',
+                                                              'infection_spread_multiplier',
+                                                              'not_infection_probability')}
+    expected = [compute_shard_exposures(columns, locations, seed, True)
+                for locations, seed in zip(shard_locations, seeds)]
+
+    location_shards = LocationShards(3, num_persons, processes=2)
+    try:
+        exposed, contacts = location_shards.compute_exposures(store, shard_locations, seeds, return_contacts=True)
+    finally:
+        location_shards.close()
+
+    assert exposed.tolist() == np.concatenate([e[0] for e in expected]).tolist()
+    assert np.array_equal(store.not_infection_probability, columns['not_infection_probability'])
+    for shard_contacts, (_, expected_contacts) in zip(contacts, expected):
+        assert [(c1.tolist(), c2.tolist()) for c1, c2 in shard_contacts] == \
+               [(c1.tolist(), c2.tolist()) for c1, c2 in expected_contacts]
@@ -109,3 +109,25 @@ def test_contact_removal(contact_tracer: MaxSlotContactTracer) -> None:
     assert len(traces) == 1
     assert p3 in traces
     np.testing.assert_array_almost_equal(traces[p3], [1. / 24., 1. / 24., 1. / 24., 1. / 24., 1. / 24.])
+
+
+def test_positive_contacts(contact_tracer: MaxSlotContactTracer) -> None:
+    p1 = PersonID('a', 30)
+    p2 = PersonID('b', 40)
+    p3 = PersonID('c', 50)
+    p4 = PersonID('d', 50)
+
+    contact_tracer.add_contacts(OrderedSet([(p1, p2), (p2, p3)]))
+    contact_tracer.new_time_slot()
+    contact_tracer.add_contacts(OrderedSet([(p3, p4)]))
+
+    contact_tracer.update_positive_contacts([p2])
+    assert [contact_tracer.has_positive_contact(p) for p in (p1, p2, p3, p4)] == [True, False, True, False]
+    contact_tracer.update_positive_contacts([p3, p4])
+    assert [contact_tracer.has_positive_contact(p) for p in (p1, p2, p3, p4)] == [False, True, True, True]
+
+    # contacts older than the storage slots are not traced
+    for _ in range(4):
+        contact_tracer.new_time_slot()
+    contact_tracer.update_positive_contacts([p3])
+    assert [contact_tracer.has_positive_contact(p) for p in (p1, p2, p3, p4)] == [False, False, False, True]
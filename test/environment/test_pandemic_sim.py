@@ -0,0 +1,93 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import Callable, List, Sequence, Set, Tuple
+
+import pytest
+
+import pandemic_simulator as ps
+
+
+def _run_days(sim: ps.env.PandemicSim, stages: Sequence[int]) -> List[Tuple]:
+    """Run the simulator for a day per given regulation stage and return the infection and contact tracing results of
+    each day."""
+    contact_tracer = sim._contact_tracer
+    values = []
+    for day, stage in enumerate(stages):
+        if day == 0 or stage != stages[day - 1]:
+            sim.impose_regulation(ps.sh.austin_regulations[stage])
+        sim.step_day()
+        state = sim.state
+        contacts = [] if contact_tracer is None else [
+            sorted((contact_id.name, trace.tolist()) for contact_id, trace in
+                   contact_tracer.get_contacts(person.id).items())
+            for person in sim.persons]
+        values.append((sorted((s.value, n) for s, n in state.global_infection_summary.items()),
+                       [repr(person_state) for person_state in state.id_to_person_state.values()],
+                       contacts))
+    return values
+
+
+def test_inert_locations_skipped(make_sim: Callable[..., ps.env.PandemicSim],
+                                 monkeypatch: pytest.MonkeyPatch) -> None:
+    # with a contact tracer, the skipped locations hold fewer than two persons and would draw no random numbers
+    sim = make_sim(num_persons=40, contact_tracer=ps.env.MaxSlotContactTracer())
+    num_skipped = 0
+    original_contact_locations = sim._contact_locations
+
+    def contact_locations() -> List[ps.env.Location]:
+        nonlocal num_skipped
+        locations = list(original_contact_locations())
+        num_skipped += len(sim._locations) - len(locations)
+        return locations
+
+    monkeypatch.setattr(sim, '_contact_locations', contact_locations)
+    expected = _run_days(sim, [0, 0, 0])
+    assert num_skipped > 0
+
+    all_locations_sim = make_sim(num_persons=40, contact_tracer=ps.env.MaxSlotContactTracer())
+    monkeypatch.setattr(all_locations_sim, '_contact_locations', lambda: all_locations_sim._locations)
+    assert _run_days(all_locations_sim, [0, 0, 0]) == expected
+    assert expected[-1][0] != expected[0][0], 'the infection should spread'
+
+
+@pytest.mark.parametrize('use_contact_tracer', [False, True])
+def test_location_shards_deterministic(make_sim: Callable[..., ps.env.PandemicSim], use_contact_tracer: bool) -> None:
+    def run() -> List[Tuple]:
+        contact_tracer = ps.env.MaxSlotContactTracer() if use_contact_tracer else None
+        return _run_days(make_sim(num_persons=40, contact_tracer=contact_tracer, num_location_shards=2), [0, 0])
+
+    # the results of the shards are merged in shard order, independently of the scheduling of the workers
+    assert run() == run()
+
+
+def test_person_scheduler_skips_idle_persons(make_sim: Callable[..., ps.env.PandemicSim],
+                                             monkeypatch: pytest.MonkeyPatch) -> None:
+    sim = make_sim(num_persons=40, contact_tracer=ps.env.MaxSlotContactTracer(), use_person_scheduler=True)
+    person_scheduler = sim._person_scheduler
+    assert person_scheduler is not None
+    step_due_persons = sim._step_due_persons
+    num_skipped = 0
+
+    def checked_step_due_persons(scheduler: ps.env.PersonScheduler) -> None:
+        nonlocal num_skipped
+        sim_time = sim.state.sim_time
+        buckets, _ = scheduler.snapshot()
+        due: Set[int] = {i for hours, bucket in buckets.items() if hours <= sim_time.in_hours() for i in bucket}
+        step_due_persons(scheduler)
+
+        # the persons that were not due would not change if they were stepped after the due persons
+        snapshot = sim.snapshot()
+        for i, person in enumerate(sim.persons):
+            if i not in due:
+                before = (repr(person.state), person.snapshot())
+                assert person.step(sim_time, sim._contact_tracer) in (ps.env.NOOP, None)
+                assert (repr(person.state), person.snapshot()) == before
+                num_skipped += 1
+        sim.restore(snapshot)
+
+    monkeypatch.setattr(sim, '_step_due_persons', checked_step_due_persons)
+    values = _run_days(sim, [0, 3, 3])
+    assert num_skipped > 0
+
+    # the checks are undone by the restores
+    assert _run_days(make_sim(num_persons=40, contact_tracer=ps.env.MaxSlotContactTracer(),
+                              use_person_scheduler=True), [0, 3, 3]) == values
@@ -0,0 +1,34 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import Callable
+
+import numpy as np
+
+import pandemic_simulator as ps
+
+
+def test_vector_env_workers_match_in_process(make_sim: Callable[..., ps.env.PandemicSim]) -> None:
+    env = ps.env.PandemicGymEnv(make_sim(infection_threshold=1000), pandemic_regulations=ps.sh.austin_regulations,
+                                done_fn=ps.env.NoPandemicDone(num_days=1))
+    in_process = ps.env.PandemicVectorEnv(env, num_envs=3, seed=1)
+    workers = ps.env.PandemicVectorEnv(env, num_envs=3, num_workers=2, seed=1)
+    try:
+        obs_1, obs_2 = in_process.reset(), workers.reset()
+        assert obs_1.global_infection_summary.shape == (1, 3, len(ps.env.InfectionSummary))
+        assert np.array_equal(obs_1.global_infection_summary, obs_2.global_infection_summary)
+
+        # each step runs one day and the environments are done after two days
+        for step, actions in enumerate([[0, 1, 2], [1, 1, 1], [2, 0, 1], [0, 0, 0]]):
+            obs_1, rewards_1, dones_1, infos_1 = in_process.step(actions)
+            obs_2, rewards_2, dones_2, infos_2 = workers.step(actions)
+            assert np.array_equal(obs_1.global_infection_summary, obs_2.global_infection_summary)
+            assert np.array_equal(obs_1.stage, obs_2.stage)
+            assert np.array_equal(rewards_1, rewards_2)
+            assert np.array_equal(dones_1, dones_2)
+
+            # done environments are reset
+            for i in np.flatnonzero(dones_1):
+                assert infos_1[i]['terminal_observation'].time_day[-1].item() > 1
+                assert obs_1.time_day[-1, i].item() == 0
+            assert list(dones_1) == [step % 2 == 1] * 3
+    finally:
+        workers.close()
@@ -96,3 +96,48 @@ def test_person_routine_with_status_state_trigger() -> None:
     assert not rws.started
     assert rws.due
     assert not rws.done
+
+
+def test_routine_timetable_matches_full_sync() -> None:
+    ps.init_globals()
+
+    home = ps.env.Home()
+    store = ps.env.GroceryStore()
+
+    routines = [
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id),
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id,
+                             valid_time=ps.env.SimTimeTuple(hours=tuple(range(11, 14)), week_days=(0, 2, 4)),
+                             reset_when_done_trigger=ps.env.SimTimeRoutineTrigger(day=7, offset_hour=3)),
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id,
+                             start_trigger=ps.env.SimTimeRoutineTrigger(day=2, offset_day=1, offset_hour=15)),
+        # not weekly: synced every hour
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id,
+                             start_trigger=ps.env.SimTimeRoutineTrigger(day=3, offset_hour=8)),
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id, valid_time=ps.env.SimTimeTuple(days=(1, 9, 10))),
+        ps.env.PersonRoutine(start_loc=None, end_loc=store.id, start_trigger=StateRoutineTrigger()),
+    ]
+    full = [ps.env.PersonRoutineWithStatus(r) for r in routines]
+    compiled = [ps.env.PersonRoutineWithStatus(r) for r in routines]
+    timetable = ps.env.RoutineTimetable(compiled)
+    person_state = PersonState(home.id, risk=ps.env.Risk.LOW)
+
+    sim_time = ps.env.SimTime()
+    for _ in range(3 * 7 * 24):
+        person_state.risk = ps.env.Risk.HIGH if sim_time.hour == 20 else ps.env.Risk.LOW
+        for rws in full:
+            rws.sync(sim_time, person_state)
+        timetable.sync(sim_time, person_state)
+        assert [rws.snapshot() for rws in compiled] == [rws.snapshot() for rws in full]
+        assert [routines.index(rws.routine) for rws in timetable.active_routines] == [
+            i for i, rws in enumerate(full) if rws.due or (rws.started and not rws.done)]
+
+        # complete the ongoing routines and start the first due routine, every other hour
+        for routine_list in (full, compiled):
+            for rws in routine_list:
+                if rws.started:
+                    rws.done = True
+            due = [rws for rws in routine_list if rws.due]
+            if due and sim_time.hour % 2 == 0:
+                due[0].due, due[0].started = False, True
+        sim_time.step()
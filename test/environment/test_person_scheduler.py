@@ -0,0 +1,74 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+
+import pytest
+
+from pandemic_simulator.environment import LocationID, PersonRoutine, PersonRoutineWithStatus, PersonScheduler, \
+    SimTime, SimTimeInterval, SimTimeRoutineTrigger, SimTimeTuple
+from pandemic_simulator.environment.person.routine_utils import next_routine_event_hours
+
+
+def test_person_scheduler_pop_due() -> None:
+    scheduler = PersonScheduler(4, sim_hours=2)
+    assert scheduler.pop_due(1) == []
+    assert scheduler.pop_due(2) == [0, 1, 2, 3]
+
+    scheduler.schedule(3, 5)
+    scheduler.schedule(0, 3)
+    scheduler.schedule(2, 5)
+    scheduler.schedule(1, None)
+    assert len(scheduler) == 3
+
+    assert scheduler.pop_due(4) == [0]
+    assert scheduler.pop_due(6) == [2, 3]
+    assert len(scheduler) == 0
+
+    # sleeping persons are only woken up by wake_all
+    scheduler.wake_all(7)
+    assert scheduler.pop_due(7) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize(['hour', 'day', 'offset_hour', 'offset_day'],
+                         [[1, 0, 0, 0], [5, 0, 2, 0], [0, 1, 10, 0], [0, 3, 0, 2]])
+def test_next_trigger_hours(hour: int, day: int, offset_hour: int, offset_day: int) -> None:
+    interval = SimTimeInterval(hour=hour, day=day, offset_hour=offset_hour, offset_day=offset_day)
+    for sim_hours in range(24 * 10):
+        expected = next(h for h in range(sim_hours, sim_hours + 24 * 10)
+                        if interval.trigger_at_interval(SimTime.from_hours(h)))
+        assert interval.next_trigger_hours(sim_hours) == expected
+
+
+def test_contains_hours() -> None:
+    time_tuple = SimTimeTuple(hours=(9, 10, 11), week_days=(1, 2), days=tuple(range(1, 300)))
+    # over more than a year of stepped days, the week day of the sim time keeps counting from the first day
+    sim_time = SimTime()
+    for sim_hours in range(24 * 400):
+        assert sim_time.in_hours() == sim_hours
+        assert time_tuple.contains_hours(sim_hours) == (sim_time in time_tuple)
+        sim_time.step()
+
+
+@pytest.mark.parametrize(['due', 'started', 'done'], [[False, False, False], [True, False, False],
+                                                      [False, True, False], [False, True, True]])
+def test_next_routine_event_hours(due: bool, started: bool, done: bool) -> None:
+    routines = [PersonRoutine(start_loc=None, end_loc=LocationID('store'),
+                              valid_time=SimTimeTuple(hours=tuple(range(15, 20))),
+                              reset_when_done_trigger=SimTimeRoutineTrigger(day=7)),
+                PersonRoutine(start_loc=None, end_loc=LocationID('bar'),
+                              valid_time=SimTimeTuple(week_days=(5, 6)),
+                              start_trigger=SimTimeRoutineTrigger(day=3, offset_day=1))]
+
+    for sim_hours in range(0, 24 * 14, 5):
+        for routine in routines:
+            rws = PersonRoutineWithStatus(routine, due=due, started=started, done=done)
+
+            # reference: the first hour at which the sync changes the status of the routine
+            expected = sim_hours + 24 * 7
+            for h in range(sim_hours, expected):
+                synced = copy.copy(rws)
+                synced.sync(SimTime.from_hours(h))
+                if (synced.due, synced.started, synced.done) != (due, started, done):
+                    expected = h
+                    break
+
+            assert next_routine_event_hours([rws], sim_hours, sim_hours + 24 * 7) == expected
@@ -0,0 +1,124 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from pandemic_simulator.environment import InfectionSummary, IndividualInfectionState, LocationID, \
+    PandemicTestResult, PersonState, PopulationStore, Risk
+
+
+def _make_states(num: int) -> List[PersonState]:
+    return [PersonState(current_location=LocationID(f'home_{i % 3}'), risk=Risk(i % 2),
+                        infection_spread_multiplier=0.5 + i) for i in range(num)]
+
+
+def test_bind_keeps_values() -> None:
+    states = _make_states(20)
+    expected = [copy.deepcopy(st) for st in states]
+
+    store = PopulationStore(capacity=2)
+    store.bind_all(states[:5])
+    for st in states[5:]:
+        store.bind(st)
+
+    assert len(store) == 20
+    assert all(st._store is store for st in states)
+    assert states == expected
+    assert list(store.risk) == [i % 2 for i in range(20)]
+    assert [store.location_ids[s] for s in store.current_location] == [st.current_location for st in expected]
+
+
+def test_writes_go_to_columns() -> None:
+    states = _make_states(3)
+    store = PopulationStore(location_ids=[LocationID('hospital')])
+    store.bind_all(states)
+
+    states[1].current_location = LocationID('hospital')
+    states[1].infection_state = IndividualInfectionState(summary=InfectionSummary.CRITICAL, spread_probability=0.2)
+    states[1].not_infection_probability *= 0.5
+    states[2].test_result = PandemicTestResult.POSITIVE
+
+    assert list(store.current_location) == [store.location_slot(LocationID('home_0')), 0,
+                                            store.location_slot(LocationID('home_2'))]
+    assert list(store.infection_summary) == [-1, store.summary_to_code[InfectionSummary.CRITICAL], -1]
+    assert np.allclose(store.spread_probability, [0., 0.2, 0.])
+    assert np.allclose(store.not_infection_probability, [1., 0.5, 1.])
+    assert list(store.test_result) == [0, 0, PandemicTestResult.POSITIVE.value]
+
+    # and column writes are visible through the person states
+    store.not_infection_probability[0] = 0.25
+    assert states[0].not_infection_probability == 0.25
+
+
+def test_copies_are_detached() -> None:
+    states = _make_states(2)
+    store = PopulationStore()
+    store.bind_all(states)
+
+    state_copy = copy.deepcopy(states[0])
+    assert state_copy._store is None
+    assert state_copy == states[0]
+
+    state_copy.not_infection_probability = 0.1
+    assert states[0].not_infection_probability == 1.
+
+    store.clear()
+    assert len(store) == 0 and states[1]._store is None
+    assert states[1].infection_spread_multiplier == 1.5
+
+
+def test_exposure_record_matches_history() -> None:
+    rng = np.random.RandomState(0)
+    num_persons = 30
+    locations = [LocationID(f'loc_{i}') for i in range(3)]
+
+    states = _make_states(num_persons)
+    store = PopulationStore(location_ids=locations)
+    store.bind_all(states)
+
+    # reference: the history of (location, not_infection_probability) after each exposure
+    histories: List[List[Tuple[LocationID, float]]] = [[] for _ in range(num_persons)]
+    for _ in range(24):
+        for st in states:
+            st.current_location = locations[rng.randint(len(locations))]
+        exposed = rng.randint(0, num_persons, 20)
+        for slot in exposed:
+            states[slot].not_infection_probability *= rng.uniform(0.8, 1.)
+            histories[slot].append((states[slot].current_location, states[slot].not_infection_probability))
+        store.record_exposures(exposed)
+
+    infected = np.array([slot for slot, hist in enumerate(histories) if len(hist) > 0])
+    exposed_rnb = rng.uniform(0, 1 - store.not_infection_probability[infected])
+
+    expected = []
+    for slot, rnb in zip(infected, exposed_rnb):
+        expected.append(next(loc for loc, value in histories[slot] if rnb < 1 - value))
+    location_slots = store.exposure_locations(infected, exposed_rnb)
+    assert [store.location_ids[s] for s in location_slots] == expected
+
+
+def test_location_counts_follow_moves_and_infections() -> None:
+    rng = np.random.RandomState(0)
+    summaries: List[Optional[InfectionSummary]] = [None, *InfectionSummary]
+    locations = [LocationID(f'home_{i}') for i in range(3)] + [LocationID('school')]
+
+    states = _make_states(30)
+    store = PopulationStore(capacity=4)
+    store.bind_all(states)
+
+    for _ in range(200):
+        st = states[rng.randint(len(states))]
+        if rng.uniform() < 0.5:
+            st.current_location = locations[rng.randint(len(locations))]
+        else:
+            summary = summaries[rng.randint(len(summaries))]
+            st.infection_state = None if summary is None else IndividualInfectionState(summary, 0.1)
+
+        # reference: count the persons of each location
+        occupants = [sum(s.current_location == loc for s in states) for loc in store.location_ids]
+        infectious = [sum(s.current_location == loc and s.infection_state is not None and
+                          s.infection_state.summary in {InfectionSummary.INFECTED, InfectionSummary.CRITICAL}
+                          for s in states) for loc in store.location_ids]
+        assert store.location_occupants.tolist() == occupants
+        assert store.location_infectious.tolist() == infectious
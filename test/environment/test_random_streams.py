@@ -0,0 +1,53 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import numpy as np
+
+from pandemic_simulator.environment import BufferedRandom, RandomStreams
+
+
+def test_streams_do_not_depend_on_other_streams() -> None:
+    streams = RandomStreams(seed=0)
+    contacts = streams.stream('contacts').random(5)
+
+    # other streams are created first and draw in between
+    other_streams = RandomStreams(seed=0)
+    other_streams.stream('persons').random(3)
+    assert np.array_equal(other_streams.stream('contacts').random(5), contacts)
+
+    assert not np.array_equal(RandomStreams(seed=1).stream('contacts').random(5), contacts)
+
+
+def test_seed_and_state() -> None:
+    streams = RandomStreams(seed=0)
+    generator = streams.stream('persons')
+    expected = generator.random(5)
+    expected_seeds = [s.generate_state(2).tolist() for s in streams.spawn('persons', 2)]
+
+    # the generators handed out earlier are reseeded in place
+    streams.seed(0)
+    assert np.array_equal(generator.random(5), expected)
+    assert [s.generate_state(2).tolist() for s in streams.spawn('persons', 2)] == expected_seeds
+
+    state = streams.get_state()
+    expected = generator.random(5)
+    expected_seeds = [s.generate_state(2).tolist() for s in streams.spawn('persons', 2)]
+    streams.seed(1)
+    streams.set_state(state)
+    assert np.array_equal(generator.random(5), expected)
+    assert [s.generate_state(2).tolist() for s in streams.spawn('persons', 2)] == expected_seeds
+
+
+def test_buffered_random_follows_generator() -> None:
+    buffered = BufferedRandom(np.random.default_rng(0), block_size=7)
+    expected = np.random.default_rng(0).random(30)
+
+    # scalar and array draws hand out the values of the generator in order, across blocks
+    values = [buffered.random() for _ in range(5)] + buffered.random(10).tolist() + [buffered.random()]
+    state = buffered.get_state()
+    values += buffered.random(14).tolist()
+    assert values == expected.tolist()
+
+    buffered.set_state(state)
+    assert buffered.random(14).tolist() == expected[16:].tolist()
+
+    assert all(2 <= buffered.integers(2, 5) < 5 for _ in range(100))
+    assert buffered.choice(['a', 'b', 'c'], p=[0., 1., 0.]) == 'b'
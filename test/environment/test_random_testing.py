@@ -0,0 +1,62 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+import itertools
+
+import numpy as np
+
+import pandemic_simulator as ps
+from pandemic_simulator.environment import IndividualInfectionState, InfectionSummary, LocationID, PandemicTestResult, \
+    PersonState, PopulationStore, RandomPandemicTesting, Risk
+
+
+def _random_population(rng: np.random.RandomState, num_persons: int) -> PopulationStore:
+    summaries = list(InfectionSummary)
+    states = []
+    for _ in range(num_persons):
+        state = PersonState(current_location=LocationID('home'), risk=Risk.LOW,
+                            infection_state=IndividualInfectionState(summary=summaries[rng.randint(len(summaries))],
+                                                                     spread_probability=0.,
+                                                                     is_hospitalized=rng.uniform() < 0.1,
+                                                                     shows_symptoms=rng.uniform() < 0.3))
+        state.test_result = PandemicTestResult(rng.randint(len(PandemicTestResult)))
+        states.append(state)
+    store = PopulationStore()
+    store.bind_all(states)
+    return store
+
+
+def test_test_population_matches_admit_and_test() -> None:
+    ps.init_globals(seed=0)
+    rng = np.random.RandomState(1)
+    store = _random_population(rng, 200)
+
+    # with rates of 0 or 1 the outcomes do not depend on the draws, which are made in another order by the batch
+    for spontaneous, symptomatic, critical, retest in itertools.product((0., 1.), repeat=4):
+        testing = RandomPandemicTesting(spontaneous_testing_rate=spontaneous, symp_testing_rate=symptomatic,
+                                        critical_testing_rate=critical, testing_false_positive_rate=0.,
+                                        testing_false_negative_rate=0., retest_rate=retest)
+        admitted, new_test_result = testing.test_population(store.infection_summary, store.shows_symptoms,
+                                                            store.is_hospitalized, store.test_result)
+        for i, state in enumerate(store.states):
+            assert admitted[i] == testing.admit_person(state)
+            expected = testing.test_person(state) if admitted[i] else state.test_result
+            assert new_test_result[i] == expected.value
+
+
+def test_global_testing_state_batch() -> None:
+    ps.init_globals(seed=0)
+    rng = np.random.RandomState(2)
+    home = ps.env.Home()
+    sim = ps.env.PandemicSim(locations=[home], persons=[])
+    prev_results: np.ndarray = rng.randint(len(PandemicTestResult), size=1000).astype(np.int8)
+    new_results: np.ndarray = np.where(rng.uniform(size=1000) < 0.5,
+                                       rng.randint(len(PandemicTestResult), size=1000), prev_results).astype(np.int8)
+
+    initial_state = copy.deepcopy(sim.state.global_testing_state)
+    for new_result, prev_result in zip(new_results, prev_results):
+        sim._update_global_testing_state(PandemicTestResult(new_result), PandemicTestResult(prev_result))
+    expected = copy.deepcopy(sim.state.global_testing_state)
+
+    sim.state.global_testing_state = initial_state
+    sim._update_global_testing_state_batch(new_results, prev_results)
+    assert sim.state.global_testing_state == expected
@@ -0,0 +1,44 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+import copy
+import dataclasses
+
+import numpy as np
+
+import pandemic_simulator as ps
+from pandemic_simulator.environment import LocationID, PersonState, PopulationStore, Risk, SEIRModel
+
+
+def test_step_population_matches_step() -> None:
+    ps.init_globals(seed=0)
+    rng = np.random.RandomState(1)
+
+    num_persons = 300
+    ages = rng.randint(0, 100, num_persons)
+    states = [PersonState(current_location=LocationID('home'), risk=Risk(rng.randint(2)))
+              for _ in range(num_persons)]
+    expected = copy.deepcopy(states)
+
+    store = PopulationStore()
+    store.bind_all(states)
+
+    # the copy holds a copy of the random state, so both models make the same draws
+    model = SEIRModel()
+    model_copy = copy.deepcopy(model)
+
+    for _ in range(30):
+        # random exposures, with a few persons becoming hospitalized
+        not_infection_probability = rng.uniform(0.5, 1., num_persons)
+        for st, nip in zip(expected, not_infection_probability):
+            st.not_infection_probability = nip
+            if st.infection_state is not None and st.infection_state.shows_symptoms and rng.uniform() < 0.2:
+                st.infection_state = dataclasses.replace(st.infection_state, is_hospitalized=True)
+        for st, exp in zip(states, expected):
+            st.not_infection_probability = exp.not_infection_probability
+            st.infection_state = exp.infection_state
+
+        # reference: step every person in order
+        for st, age in zip(expected, ages):
+            st.infection_state = model_copy.step(st.infection_state, age, st.risk, 1 - st.not_infection_probability)
+
+        model.step_population(store, ages)
+        assert [st.infection_state for st in states] == [st.infection_state for st in expected]
@@ -0,0 +1,76 @@
+# Confidential, Copyright 2021, Sony Corporation of America, All rights reserved.
+from typing import Callable, List, Optional, Tuple
+
+import pytest
+
+import pandemic_simulator as ps
+
+
+class _NoSnapshotInfectionModel(ps.env.InfectionModel):
+    """An infection model that does not implement snapshots and never infects anyone."""
+
+    def step(self, subject_infection_state: Optional[ps.env.IndividualInfectionState], subject_age: int,
+             subject_risk: ps.env.Risk, infection_probability: float) -> ps.env.IndividualInfectionState:
+        return subject_infection_state or ps.env.IndividualInfectionState(summary=ps.env.InfectionSummary.NONE,
+                                                                          spread_probability=0.)
+
+    def needs_contacts(self, subject_infection_state: Optional[ps.env.IndividualInfectionState]) -> bool:
+        return False
+
+    def reset(self) -> None:
+        pass
+
+
+def _sim_values(sim: ps.env.PandemicSim) -> Tuple:
+    state = sim.state
+    return (repr(state.sim_time), sorted((s.value, n) for s, n in state.global_infection_summary.items()),
+            sorted((s.value, n) for s, n in state.global_testing_state.summary.items()),
+            [repr(person_state) for person_state in state.id_to_person_state.values()],
+            [repr(location_state) for location_state in state.id_to_location_state.values()])
+
+
+def _run_branch(sim: ps.env.PandemicSim, stage: int) -> List[Tuple]:
+    sim.impose_regulation(ps.sh.austin_regulations[stage])
+    values = []
+    for _ in range(2):
+        sim.step_day()
+        values.append(_sim_values(sim))
+    return values
+
+
+def test_restore_replays_branch(make_sim: Callable[..., ps.env.PandemicSim]) -> None:
+    sim = make_sim(contact_tracer=ps.env.MaxSlotContactTracer())
+    sim.impose_regulation(ps.sh.austin_regulations[0])
+    sim.step_day()
+    sim.step_day()
+
+    snapshot = sim.snapshot()
+    snapshot_values = _sim_values(sim)
+    branch_values = _run_branch(sim, 2)
+
+    sim.restore(snapshot)
+    assert _sim_values(sim) == snapshot_values
+    assert _run_branch(sim, 2) == branch_values
+
+    # the snapshot is left untouched by a restore, and it can be restored after a reset
+    sim.reset()
+    sim.restore(snapshot)
+    assert _run_branch(sim, 2) == branch_values
+
+    sim.restore(snapshot)
+    fork = sim.fork()
+    assert _run_branch(fork, 2) == branch_values
+    assert _sim_values(sim) == snapshot_values
+
+
+def test_snapshot_is_opt_in() -> None:
+    ps.init_globals(seed=0)
+    home = ps.env.Home()
+    persons = [ps.env.Retired(person_id=ps.env.PersonID(f'retired_{i}', age=70), home=home.id) for i in range(2)]
+    sim = ps.env.PandemicSim(locations=[home], persons=persons, infection_model=_NoSnapshotInfectionModel())
+    sim.step_day()
+
+    # the sim steps and forks with components that do not implement snapshots, only snapshot raises
+    sim.fork().step_day()
+    with pytest.raises(NotImplementedError):
+        sim.snapshot()
@@ -1,8 +1,10 @@
 # Confidential, Copyright 2020, Sony Corporation of America, All rights reserved.
+import pickle
+from typing import Optional, Tuple
 
 import pytest
 
-from pandemic_simulator.environment import SimTime, SimTimeInterval
+from pandemic_simulator.environment import SimTime, SimTimeInterval, SimTimeTuple
 
 
 def test_sim_time_interval_trigger_hour() -> None:
@@ -47,3 +49,44 @@ def test_sim_time_interval_trigger_offset(hour: int, day: int, offset_hour: int,
     for i in range(1, 3):
         assert interval.trigger_at_interval(SimTime(day=day * i + offset_day, hour=hour * i + offset_hour))
         assert not interval.trigger_at_interval(SimTime(day=day * i, hour=hour * i))
+
+
+@pytest.mark.parametrize(['hours', 'week_days', 'days'],
+                         [
+                             [(9, 10, 11), None, None],
+                             [None, (0, 6), None],
+                             [(23,), (2, 3), (5, 100, 364)],
+                             [(), None, None],
+                             [None, None, None]
+                         ]
+                         )
+def test_sim_time_tuple_contains(hours: Optional[Tuple[int, ...]],
+                                 week_days: Optional[Tuple[int, ...]],
+                                 days: Optional[Tuple[int, ...]]) -> None:
+    time_tuple = SimTimeTuple(hours=hours, week_days=week_days, days=days)
+    # the sim time is stepped as in the sim, the week day is not reset at the start of a year
+    sim_time = SimTime()
+    for sim_hours in range(24 * 370):
+        expected = ((hours is None or sim_time.hour in hours) and
+                    (week_days is None or sim_time.week_day in week_days) and
+                    (days is None or sim_time.day in days))
+        assert (sim_time in time_tuple) == expected
+        assert time_tuple.contains_hours(sim_hours) == expected
+        sim_time.step()
+
+    # the tuples of the same schedule share their compiled masks
+    other = SimTimeTuple(hours=hours, week_days=week_days, days=days)
+    assert other == time_tuple and other._week_mask is time_tuple._week_mask
+
+
+def test_sim_time_interval_trigger_table() -> None:
+    intervals = [SimTimeInterval(hour=3), SimTimeInterval(day=2, offset_hour=5), SimTimeInterval(hour=3)]
+    for sim_hours in range(24 * 10):
+        sim_time = SimTime.from_hours(sim_hours)
+        if sim_hours == 50:
+            # intervals registered after the flags of the hour were computed, and intervals unpickled
+            intervals += [SimTimeInterval(hour=7, offset_day=1), pickle.loads(pickle.dumps(intervals[1]))]
+        for interval in intervals:
+            period, offset = interval.in_hours(), interval.offset_day * 24 + interval.offset_hour
+            expected = sim_hours >= offset and (sim_hours - offset) % period == 0
+            assert interval.trigger_at_interval(sim_time) == interval.trigger_at_hours(sim_hours) == expected